@@ -0,0 +1,52 @@
+# pylint: disable=C0103
+"""
+Python script "Benchmark_info.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+
+Commit and platform information for benchmark results files.
+"""
+
+
+from datetime import datetime, timezone
+import os
+import platform
+import subprocess
+import numpy as np
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def git_commit():
+    """Current commit hash, and whether the working tree has changes."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCHMARK_DIR, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                cwd=BENCHMARK_DIR, check=True, capture_output=True,
+                                text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False  # str, bool
+    return commit, bool(status)  # str, bool
+
+
+def results_fname(benchmark, commit, dirty):
+    """Default results file name, by benchmark and commit."""
+    return os.path.join(BENCHMARK_DIR, 'results', '%s_%s%s.json' %
+                        (benchmark, commit[:10], '_dirty' if dirty else ''))  # str
+
+
+def benchmark_info(benchmark, commit, dirty):
+    """Leading entries of a benchmark results file."""
+    info = {'benchmark': benchmark, 'commit': commit, 'dirty': dirty,
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'cpu_count': os.cpu_count()}
+    return info  # dict
+
+# end Benchmark_info.py
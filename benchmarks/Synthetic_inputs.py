@@ -0,0 +1,227 @@
+# pylint: disable=C0103,R0913,R0914
+"""
+Python script "Synthetic_inputs.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+
+Synthetic but realistic model inputs for benchmarks, generated to cover the
+simulation domain of a Simulation object:
+    1. WRF grids on a d03-sized grid, as in the reduced wrfout_subset files
+       (surface variables, and 3D variables on the lowest model levels),
+       optionally written as wrfout_subset netCDF files for WRFgrids
+    2. BioSIM output CSV file with moth emergence dates, locations, attributes
+    3. Landcover GeoTIFF map (IGBP-modified MODIS categories)
+"""
+
+
+from datetime import datetime, timedelta, timezone as tz
+import numpy as np
+import pandas as pd
+
+
+# approximate WRF d03 grid dimensions (south_north, west_east) and number of
+# model levels kept by reduce_wrfout.py (bottom_top <= 10)
+D03_SHAPE = (300, 450)
+N_LEVELS = 11
+
+# variables of the reduced wrfout_subset files: file variable name, WRFgrids
+# attribute name, units ('pressure' is also derived from P + PB by wrf-python)
+WRF_VARIABLES = [('T2', 'T2', 'C'), ('PSFC', 'PSFC', 'hPa'),
+                 ('precipitation', 'precip', 'mm/h'), ('u10_e', 'U10', 'm s-1'),
+                 ('v10_e', 'V10', 'm s-1'), ('LU_INDEX', 'landcover', ''),
+                 ('HGT', 'topography', 'm'), ('geopotential_height', 'GpH', 'm'),
+                 ('temperature', 'temperature', 'C'), ('pressure', 'pressure', 'hPa'),
+                 ('rain', 'rain', 'mm/h'), ('ue_unstaggered', 'uwind', 'm s-1'),
+                 ('ve_unstaggered', 'vwind', 'm s-1'), ('w_unstaggered', 'wwind', 'm s-1')]
+
+# IGBP-modified MODIS landcover categories and their relative frequencies
+LANDCOVER_FRACTIONS = {1: 0.25, 5: 0.25, 2: 0.05, 4: 0.10, 8: 0.10, 10: 0.05,
+                       12: 0.08, 13: 0.02, 17: 0.06, 21: 0.04}
+
+
+def landcover_categories(rng, shape, block):
+    """Landcover category grid in patches of block x block cells."""
+    nrows = -(-shape[0] // block)
+    ncols = -(-shape[1] // block)
+    categories = rng.choice(list(LANDCOVER_FRACTIONS.keys()), size=(nrows, ncols),
+                            p=list(LANDCOVER_FRACTIONS.values()))
+    grid = np.repeat(np.repeat(categories, block, axis=0), block, axis=1)
+    return grid[:shape[0], :shape[1]]  # numpy 2D array
+
+
+def level_heights(n_levels):
+    """Model level heights above ground [m], stretched upward."""
+    dz = 50.0 * 1.15**np.arange(n_levels)
+    return np.cumsum(dz) - 0.5 * dz  # numpy 1D array
+
+
+def synthetic_wrf_fields(sim, shape=D03_SHAPE, n_levels=N_LEVELS, hours=0.0, seed=0):
+    """WRF grid variables keyed by WRFgrids attribute name, in the units of the
+       reduced wrfout_subset files, on a slightly curvilinear grid covering the
+       simulation domain; hours since the simulation start moves the weather."""
+    rng = np.random.default_rng(seed)
+    nrows, ncols = shape
+    lat_c = 0.5 * (sim.grid_min_lat + sim.grid_max_lat)
+    lon_c = 0.5 * (sim.grid_min_lon + sim.grid_max_lon)
+    lat_1D = np.linspace(sim.grid_min_lat - 0.25, sim.grid_max_lat + 0.25, nrows)
+    lon_1D = np.linspace(sim.grid_min_lon - 0.25, sim.grid_max_lon + 0.25, ncols)
+    lons, lats = np.meshgrid(lon_1D, lat_1D)
+    # meridian convergence, as on a Lambert conformal grid
+    lons = lons + 0.05 * (lats - lat_c) * (lons - lon_c) / (lon_1D[-1] - lon_c)
+    y = (lats - lat_1D[0]) / (lat_1D[-1] - lat_1D[0])
+    x = (lons - lon_1D[0]) / (lon_1D[-1] - lon_1D[0])
+    #
+    # surface variables
+    topography = 300.0 + 250.0 * np.sin(3.0 * np.pi * x) * np.cos(2.0 * np.pi * y) + \
+        150.0 * np.sin(11.0 * np.pi * x + 1.0) * np.sin(7.0 * np.pi * y) + \
+        rng.normal(scale=20.0, size=shape)
+    topography = np.maximum(topography, 0.0)
+    landcover = landcover_categories(rng, shape, 10).astype(np.float32)
+    topography = np.where(np.isin(landcover, [17, 21]), np.minimum(topography, 100.0),
+                          topography)
+    T2 = 24.0 - 0.0065 * topography - 6.0 * (y - 0.5) - 0.5 * hours + \
+        2.0 * np.sin(2.0 * np.pi * (x + 0.02 * hours))
+    PSFC = 1013.25 * np.exp(-topography / 8434.0)
+    U10 = 3.0 + 2.0 * np.sin(2.0 * np.pi * (y + 0.03 * hours))
+    V10 = 2.0 * np.cos(2.0 * np.pi * (x - 0.03 * hours))
+    band = np.exp(-((x - 0.2 - 0.05 * hours) / 0.05)**2) * np.maximum(np.sin(5.0 * np.pi * y), 0.0)
+    precip = np.where(band > 0.1, 8.0 * band, 0.0)
+    #
+    # 3D variables on model levels
+    z = level_heights(n_levels)[:, np.newaxis, np.newaxis]
+    GpH = topography + z
+    temperature = T2 - 0.0065 * z + 3.0 * np.exp(-z / 200.0)  # evening inversion
+    pressure = 1013.25 * np.exp(-GpH / 8434.0)
+    shear = (z / 10.0)**0.14
+    uwind = U10 * shear + 0.004 * z
+    vwind = V10 * shear
+    wwind = 0.05 * np.sin(9.0 * np.pi * x) * np.sin(7.0 * np.pi * y) * np.sin(np.pi * z / z[-1])
+    rain = precip * np.maximum(1.0 - z / 2000.0, 0.0)
+    #
+    fields = {'lats': lats, 'lons': lons, 'T2': T2, 'PSFC': PSFC, 'precip': precip,
+              'U10': U10, 'V10': V10, 'landcover': landcover, 'topography': topography,
+              'GpH': GpH, 'temperature': temperature, 'pressure': pressure, 'rain': rain,
+              'uwind': uwind, 'vwind': vwind, 'wwind': wwind}
+    fields = {name: np.asarray(field, dtype=np.float32) for name, field in fields.items()}
+    fields['map_lats'] = fields['lats']
+    fields['map_lons'] = fields['lons']
+    fields['map_topography'] = fields['topography']
+    return fields  # dict of numpy arrays
+
+
+def wrf_file_name(wrf_grid, date_time):
+    """wrfout_subset file name for the given WRF grid and (UTC) time."""
+    return 'wrfout_subset_%s_%s:00.nc' % (wrf_grid, date_time.strftime("%Y-%m-%d_%H:%M"))
+
+
+def write_wrf_file(sim, fields, fname, date_time):
+    """Write synthetic WRF fields as a wrfout_subset netCDF file, with the WRF
+       coordinate variables and map projection attributes wrf-python expects."""
+    from netCDF4 import Dataset
+    n_levels, nrows, ncols = np.shape(fields['GpH'])
+    ncfile = Dataset(fname, 'w')
+    ncfile.createDimension('Time', None)
+    ncfile.createDimension('DateStrLen', 19)
+    ncfile.createDimension('bottom_top', n_levels)
+    ncfile.createDimension('south_north', nrows)
+    ncfile.createDimension('west_east', ncols)
+    lat_c = 0.5 * (sim.grid_min_lat + sim.grid_max_lat)
+    lon_c = 0.5 * (sim.grid_min_lon + sim.grid_max_lon)
+    dy = 111200.0 * (fields['lats'][-1, 0] - fields['lats'][0, 0]) / (nrows - 1)
+    ncfile.setncatts({'TITLE': ' OUTPUT FROM WRF V3.9 MODEL (synthetic)',
+                      'WEST-EAST_GRID_DIMENSION': ncols + 1,
+                      'SOUTH-NORTH_GRID_DIMENSION': nrows + 1,
+                      'BOTTOM-TOP_GRID_DIMENSION': n_levels + 1, 'DX': dy, 'DY': dy,
+                      'MAP_PROJ': 1, 'TRUELAT1': 30.0, 'TRUELAT2': 60.0, 'STAND_LON': lon_c,
+                      'CEN_LAT': lat_c, 'CEN_LON': lon_c, 'MOAD_CEN_LAT': lat_c,
+                      'POLE_LAT': 90.0, 'POLE_LON': 0.0, 'GRID_ID': int(sim.WRF_grid[-1])})
+    times = ncfile.createVariable('Times', 'S1', ('Time', 'DateStrLen'))
+    times[0, :] = np.array(list(date_time.strftime('%Y-%m-%d_%H:%M:%S')), dtype='S1')
+    xtime = ncfile.createVariable('XTIME', 'f4', ('Time',))
+    xtime.setncatts({'units': 'minutes since %s' % date_time.strftime('%Y-%m-%d %H:%M:%S'),
+                     'description': 'minutes since simulation start'})
+    xtime[0] = 0.0
+    dims_2D = ('Time', 'south_north', 'west_east')
+    dims_3D = ('Time', 'bottom_top', 'south_north', 'west_east')
+    variables = [('XLAT', 'lats', 'degree_north'), ('XLONG', 'lons', 'degree_east')] + \
+        WRF_VARIABLES + [('P', None, 'Pa'), ('PB', 'pressure', 'Pa')]
+    for var_name, field_name, units in variables:
+        if field_name is None:
+            values = np.zeros_like(fields['pressure'])
+        elif var_name == 'PB':
+            values = 100.0 * fields['pressure']
+        else:
+            values = fields[field_name]
+        is_3D = np.ndim(values) == 3
+        var = ncfile.createVariable(var_name, 'f4', dims_3D if is_3D else dims_2D)
+        var.setncatts({'FieldType': 104, 'MemoryOrder': 'XYZ' if is_3D else 'XY ',
+                       'description': var_name, 'units': units, 'stagger': '',
+                       'coordinates': 'XLONG XLAT XTIME'})
+        var[0] = values
+    ncfile.close()
+    return
+
+
+def emergence_dates(sim, start_dt):
+    """Emergence dates of moths that BioSIM selection accepts at simulation start."""
+    dates = list()
+    for ndays in range(sim.biosim_ndays_max + 2):
+        date = (start_dt - timedelta(days=ndays)).date()
+        age = start_dt - datetime(date.year, date.month, date.day, tzinfo=tz.utc)
+        if timedelta(days=sim.biosim_ndays_min) <= age <= timedelta(days=sim.biosim_ndays_max):
+            dates.append(date)
+    return dates  # list of date objects
+
+
+def write_biosim_csv(sim, clock, sbw, fname, n_fliers, seed=0):
+    """BioSIM output CSV file listing n_fliers moths inside the simulation
+       domain, all ready to fly on the simulation start date; morphological
+       attributes follow the SBW empirical distributions."""
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(sim.grid_min_lat, sim.grid_max_lat, n_fliers)
+    lons = rng.uniform(sim.grid_min_lon, sim.grid_max_lon, n_fliers)
+    dates = emergence_dates(sim, clock.start_dt)
+    date_idxs = rng.integers(len(dates), size=n_fliers)
+    sex = rng.integers(2, size=n_fliers)
+    A_mean = np.array(sbw.A_mean)[sex]
+    A_stdv = np.array(sbw.A_stdv)[sex]
+    A = np.clip(rng.normal(A_mean, A_stdv), np.array(sbw.A_min)[sex], np.array(sbw.A_max)[sex])
+    F_err = rng.normal(loc=sbw.F_err_mean, scale=sbw.F_err_stdv, size=n_fliers)
+    F = np.where(sex, sbw.calc_fecundity(A, np.maximum(F_err, 0.1)), 0.0)
+    M_err = rng.normal(loc=sbw.M_F_err_mean, scale=sbw.M_F_err_stdv, size=n_fliers)
+    M_males = sbw.calc_mass_from_wing_area(0, A, np.maximum(M_err, 0.5))
+    M_females = sbw.calc_mass_from_gravidity(A, 1.0, np.maximum(M_err, 0.5))  # fully gravid
+    biosim_df = pd.DataFrame({'Year': [dates[i].year for i in date_idxs],
+                              'Month': [dates[i].month for i in date_idxs],
+                              'Day': [dates[i].day for i in date_idxs],
+                              'Latitude': lats, 'Longitude': lons, 'Sex': sex, 'A': A,
+                              'M': np.where(sex, M_females, M_males), 'F': F, 'F_0': F})
+    biosim_df.to_csv(fname, index=False)
+    return biosim_df  # pandas DataFrame
+
+
+def write_landcover_geotiff(sim, fname, dx=0.01, seed=0):
+    """Landcover GeoTIFF map (geographic coordinates, dx degree cells) covering
+       the simulation domain with a margin."""
+    from osgeo import gdal, osr
+    rng = np.random.default_rng(seed)
+    SW_lat, SW_lon = sim.grid_min_lat - 0.5, sim.grid_min_lon - 0.5
+    NE_lat, NE_lon = sim.grid_max_lat + 0.5, sim.grid_max_lon + 0.5
+    nrows = int(round((NE_lat - SW_lat) / dx))
+    ncols = int(round((NE_lon - SW_lon) / dx))
+    grid = landcover_categories(rng, (nrows, ncols), 20)
+    ds = gdal.GetDriverByName('GTiff').Create(fname, ncols, nrows, 1, gdal.GDT_Byte)
+    ds.SetGeoTransform((SW_lon, dx, 0.0, NE_lat, 0.0, -dx))
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    ds.SetProjection(srs.ExportToWkt())
+    ds.GetRasterBand(1).WriteArray(grid.astype(np.uint8))  # north-up rows
+    ds.FlushCache()
+    ds = None
+    return nrows, ncols  # 2 * int
+
+# end Synthetic_inputs.py
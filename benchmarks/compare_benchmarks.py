@@ -0,0 +1,63 @@
+# pylint: disable=C0103
+"""
+Python script "compare_benchmarks.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+
+Compare two benchmark JSON results files (e.g. from two commits), e.g.
+    python compare_benchmarks.py results/hot_functions_<old>.json \
+        results/hot_functions_<new>.json [--threshold=1.10]
+Lists best times side by side with the new/old ratio, flags those slower than
+the threshold ratio, and exits with status 1 if any are.
+"""
+
+
+import json
+import sys
+
+
+threshold = 1.10
+args = list()
+for arg in sys.argv[1:]:
+    if arg.startswith('--threshold='):
+        threshold = float(arg.split('=', 1)[1])
+    else:
+        args.append(arg)
+with open(args[0], 'r') as oldf:
+    old = json.load(oldf)
+with open(args[1], 'r') as newf:
+    new = json.load(newf)
+#
+print()
+print('old: %s (%s)' % (old['commit'][:10] + (' dirty' if old['dirty'] else ''), old['date']))
+print('new: %s (%s)' % (new['commit'][:10] + (' dirty' if new['dirty'] else ''), new['date']))
+print()
+print('%-28s %8s %12s %12s %8s' % ('benchmark', 'size', 'old best s', 'new best s', 'ratio'))
+n_slower = 0
+for name, new_sizes in new['results'].items():
+    for size, new_result in new_sizes.items():
+        old_result = old['results'].get(name, dict()).get(size)
+        if old_result is None:
+            print('%-28s %8s %12s %12.4f' % (name, size, '-', new_result['best_s']))
+            continue
+        ratio = new_result['best_s'] / old_result['best_s']
+        flag = ''
+        if ratio > threshold:
+            flag = '  SLOWER'
+            n_slower += 1
+        elif ratio < 1.0 / threshold:
+            flag = '  faster'
+        print('%-28s %8s %12.4f %12.4f %8.2f%s' %
+              (name, size, old_result['best_s'], new_result['best_s'], ratio, flag))
+for name, reason in new['skipped'].items():
+    print('%-28s skipped (%s)' % (name, reason))
+print()
+print('%d result(s) slower than %.2f x' % (n_slower, threshold))
+print()
+sys.exit(1 if n_slower else 0)
+
+# end compare_benchmarks.py
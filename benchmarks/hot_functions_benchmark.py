@@ -0,0 +1,294 @@
+# pylint: disable=C0103,C0413,C0415,E0401,R0914
+"""
+Python script "hot_functions_benchmark.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+
+Time the model's per-flier hot functions on synthetic inputs (see
+Synthetic_inputs.py) at increasing numbers of fliers, and save the timings as
+JSON for comparison between commits (see compare_benchmarks.py), e.g.
+    python hot_functions_benchmark.py
+    python hot_functions_benchmark.py --sizes=1000,10000 --repeats=5 --levels=20
+Options: --sizes (numbers of fliers), --repeats (best of N), --levels (WRF model
+levels), --shape (WRF grid south_north,west_east), --out (JSON file name).
+Model modules are imported by each benchmark, so that a benchmark whose
+packages (e.g. wrf-python, gdal) are not installed is skipped and noted.
+"""
+
+
+import json
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+import numpy as np
+import scipy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'source'))
+from Simulation_specifications import Simulation
+from Clock import Clock
+from SBW_empirical import SBW
+from Sim_logging import configure_logging
+from Benchmark_info import benchmark_info, git_commit, results_fname
+from Synthetic_inputs import D03_SHAPE, N_LEVELS, synthetic_wrf_fields
+from Synthetic_inputs import write_biosim_csv, write_landcover_geotiff
+
+
+SIZES = [1000, 10000, 100000]
+REPEATS = 3
+BENCH_HOURS = 5.0  # benchmark time: hours after simulation start (evening flight)
+STATE_MIX = ['INITIALIZED', 'READY', 'LIFTOFF', 'FLIGHT', 'LANDING_T', 'HOST']
+
+
+def benchmark_inputs(workdir, n_max, shape, n_levels):
+    """Simulation, clock, synthetic WRF fields, and synthetic input files."""
+    sim = Simulation()
+    sim.n_fliers = n_max
+    sim.sequential = False
+    sim.sequential_use_prev_survivors = False
+    sim.use_initial_flier_polygon = False
+    sim.use_defoliation = False
+    sim.calculate_circadian_from_WRF = False
+    sim.biosim_fname = os.path.join(workdir, 'synthetic_BioSIM_output.csv')
+    sim.landcover_fname = os.path.join(workdir, 'synthetic_landcover.tif')
+    clock = Clock(sim)
+    clock.current_s = int(BENCH_HOURS * 3600) // clock.dt_interval * clock.dt_interval
+    sbw = SBW()
+    print('generating synthetic WRF grids %s, %d levels' % (str(shape), n_levels))
+    fields = synthetic_wrf_fields(sim, shape, n_levels, BENCH_HOURS)
+    print('generating synthetic BioSIM output (%d fliers)' % n_max)
+    write_biosim_csv(sim, clock, sbw, sim.biosim_fname, n_max)
+    #
+    # flier locations: every other flier aloft
+    rng = np.random.default_rng(1)
+    lats = rng.uniform(sim.grid_min_lat, sim.grid_max_lat, n_max)
+    lons = rng.uniform(sim.grid_min_lon, sim.grid_max_lon, n_max)
+    alt_AGL = np.where(np.arange(n_max) % 2, rng.uniform(50.0, 1000.0, n_max), 0.0)
+    rows = np.abs(fields['lats'][:, 0][:, np.newaxis] - lats).argmin(axis=0)
+    cols = np.abs(fields['lons'][0, :][:, np.newaxis] - lons).argmin(axis=0)
+    alt_MSL = fields['topography'][rows, cols] + alt_AGL
+    inputs = SimpleNamespace(sim=sim, clock=clock, sbw=sbw, fields=fields, lats=lats,
+                             lons=lons, alt_AGL=alt_AGL, alt_MSL=alt_MSL, rows=rows,
+                             cols=cols, fliers=None)
+    return inputs
+
+
+def wrf_grids(inputs):
+    """WRFgrids object carrying the synthetic fields."""
+    from WRFgrids_class import WRFgrids
+    grids = object.__new__(WRFgrids)
+    grids.date_time = inputs.clock.to_datetime(inputs.clock.current_s)
+    grids.fname = 'synthetic'
+    for name, field in inputs.fields.items():
+        setattr(grids, name, field)
+    return grids  # WRFgrids object
+
+
+def prepare_interpolate_space(inputs, n):
+    """WRF variable values at n flier locations, half of them aloft."""
+    from Geography import calc_GpH
+    grids = wrf_grids(inputs)
+    locations = dict()
+    for i in range(n):
+        locations['flier_%d' % i] = [inputs.lats[i], inputs.lons[i], inputs.alt_AGL[i],
+                                     inputs.alt_MSL[i], calc_GpH(inputs.lats[i], inputs.alt_MSL[i])]
+    return None, lambda: grids.interpolate_space(inputs.sim, locations)
+
+
+def prepare_get_vals_1D(inputs, n):
+    """Vertical interpolation within n WRF columns."""
+    from Interpolation import get_vals_1D
+    GpH_columns = inputs.fields['GpH'][:, inputs.rows[:n], inputs.cols[:n]]
+    T_columns = inputs.fields['temperature'][:, inputs.rows[:n], inputs.cols[:n]]
+    locs_GpH = inputs.alt_MSL[:n] + 100.0
+    return None, lambda: get_vals_1D(GpH_columns, T_columns, inputs.sim.WRF_vinterp, locs_GpH)
+
+
+def prepare_get_nearest_locs(inputs, n):
+    """Nearest WRF grid row/column of n flier locations."""
+    grids = wrf_grids(inputs)
+    lons, lats = list(inputs.lons[:n]), list(inputs.lats[:n])
+    return None, lambda: grids.get_nearest_locs(lons, lats)
+
+
+def prepare_map_get_values(inputs, n):
+    """Landcover map categories at n flier locations."""
+    from Map_class import Map
+    if not os.path.exists(inputs.sim.landcover_fname):
+        write_landcover_geotiff(inputs.sim, inputs.sim.landcover_fname)
+    landcover = Map(inputs.sim, inputs.sim.landcover_fname)
+    lons, lats = list(inputs.lons[:n]), list(inputs.lats[:n])
+    return None, lambda: Map.get_values(landcover, lons, lats)
+
+
+def prepare_count_grid(inputs, n):
+    """Counts of n flier locations on the radar grid, some outside it."""
+    from Radar_class import Radar
+    radar = Radar(inputs.sim)
+    rng = np.random.default_rng(2)
+    margin = 0.1 * (radar.grid_ne_north - radar.grid_sw_north)
+    norths = rng.uniform(radar.grid_sw_north - margin, radar.grid_ne_north + margin, n)
+    easts = rng.uniform(radar.grid_sw_east - margin, radar.grid_ne_east + margin, n)
+    return None, lambda: radar.count_grid(norths, easts)
+
+
+def prepare_update_suntimes(inputs, n):
+    """Sunset/sunrise times of n fliers."""
+    from Solar_calculations import update_suntimes
+    fliers = [SimpleNamespace(lat=lat, lon=lon) for lat, lon in
+              zip(inputs.lats[:n], inputs.lons[:n])]
+
+    def run():
+        for flier in fliers:
+            update_suntimes(inputs.clock, flier)
+        return
+    return None, run
+
+
+def prepare_calc_circadian_p(inputs, n):
+    """Circadian liftoff probability of n fliers, most within their windows."""
+    from Circadian_calculations import calc_circadian_p
+    rng = np.random.default_rng(3)
+    t_c_s = inputs.clock.current_s + rng.integers(-7200, 3600, n)
+    fliers = [SimpleNamespace(t_c_s=t_c, t_0_s=t_c - 1800, t_m_s=t_c + 18000, circadian_p=0.0)
+              for t_c in t_c_s]
+
+    def run():
+        for flier in fliers:
+            calc_circadian_p(inputs.clock, flier)
+        return
+    return None, run
+
+
+def benchmark_fliers(inputs):
+    """Flier objects for all synthetic BioSIM moths, with suntimes, circadian
+       attributes and environments, as at initial setup."""
+    if inputs.fliers is None:
+        from Flier_class import Flier
+        from Flier_setup import read_flier_locations_attributes
+        from Flier_summary import summarize_locations
+        from Solar_calculations import update_suntimes
+        from Circadian_calculations import initialize_circadian_attributes
+        sim, clock, sbw = inputs.sim, inputs.clock, inputs.sbw
+        flier_locations, flier_attributes = read_flier_locations_attributes(sim, clock)
+        fliers = dict()
+        for f, (location, attributes) in enumerate(zip(flier_locations, flier_attributes)):
+            flier_id = 'flier_%s' % str(f).zfill(9)
+            fliers[flier_id] = Flier(sim, sbw, flier_id, location, attributes)
+            update_suntimes(clock, fliers[flier_id])
+            initialize_circadian_attributes(sim, clock, sbw, fliers[flier_id])
+        environments = wrf_grids(inputs).interpolate_space(sim, summarize_locations(clock,
+                                                                                   fliers))
+        for flier_id, flier in fliers.items():
+            flier.update_environment(environments[flier_id][3:])
+        inputs.fliers = list(fliers.values())
+    return inputs.fliers  # list of Flier objects
+
+
+def prepare_state_decisions(inputs, n):
+    """State decisions of n fliers in a mix of ground and flight states."""
+    from Radar_class import Radar
+    fliers = benchmark_fliers(inputs)[:n]
+    radar = Radar(inputs.sim)
+    sim, clock, sbw = inputs.sim, inputs.clock, inputs.sbw
+
+    def setup():
+        np.random.seed(0)
+        for f, flier in enumerate(fliers):
+            flier.state = STATE_MIX[f % len(STATE_MIX)]
+            flier.nflights = 0
+            flier.active = 1
+            flier.alt_AGL = 0.0 if flier.state in ['INITIALIZED', 'READY', 'HOST'] else 200.0
+            flier.alt_MSL = flier.sfc_elev + flier.alt_AGL
+        return
+
+    def run():
+        liftoff_locations, landing_locations, survivors = dict(), dict(), dict()
+        for flier in fliers:
+            flier.state_decisions(sim, clock, sbw, None, radar, liftoff_locations,
+                                  landing_locations, survivors)
+        return
+    return setup, run
+
+
+BENCHMARKS = [('WRFgrids.interpolate_space', prepare_interpolate_space),
+              ('get_vals_1D', prepare_get_vals_1D),
+              ('WRFgrids.get_nearest_locs', prepare_get_nearest_locs),
+              ('Map.get_values', prepare_map_get_values),
+              ('Radar.count_grid', prepare_count_grid),
+              ('update_suntimes', prepare_update_suntimes),
+              ('calc_circadian_p', prepare_calc_circadian_p),
+              ('Flier.state_decisions', prepare_state_decisions)]
+
+
+def time_benchmark(setup, run, repeats):
+    """Wall-clock times of repeated runs."""
+    times = list()
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return times  # list of float
+
+
+def run_benchmarks(inputs, sizes, repeats):
+    """Time each benchmark at each number of fliers; note skipped benchmarks."""
+    results = dict()
+    skipped = dict()
+    for name, prepare in BENCHMARKS:
+        results[name] = dict()
+        for n in sizes:
+            try:
+                setup, run = prepare(inputs, n)
+            except ImportError as err:
+                skipped[name] = str(err)
+                print('%-28s skipped (%s)' % (name, err))
+                break
+            times = time_benchmark(setup, run, repeats)
+            results[name][str(n)] = {'best_s': min(times), 'median_s': float(np.median(times)),
+                                     'us_per_flier': 1.0e6 * min(times) / n}
+            print('%-28s %8d fliers  %10.4f s  %8.2f us/flier' %
+                  (name, n, min(times), 1.0e6 * min(times) / n))
+        if not results[name]:
+            del results[name]
+    return results, skipped  # 2 * dict
+
+
+options = {'sizes': ','.join(str(n) for n in SIZES), 'repeats': str(REPEATS),
+           'levels': str(N_LEVELS), 'shape': '%d,%d' % D03_SHAPE, 'out': None}
+for arg in sys.argv[1:]:
+    key, value = arg.lstrip('-').split('=', 1)
+    options[key] = value
+sizes = [int(n) for n in options['sizes'].split(',')]
+repeats = int(options['repeats'])
+n_levels = int(options['levels'])
+shape = tuple(int(n) for n in options['shape'].split(','))
+commit, dirty = git_commit()
+if options['out'] is None:
+    options['out'] = results_fname('hot_functions', commit, dirty)
+configure_logging('WARNING')
+np.random.seed(0)
+#
+print()
+with tempfile.TemporaryDirectory() as workdir:
+    bench_inputs = benchmark_inputs(workdir, max(sizes), shape, n_levels)
+    print()
+    bench_results, bench_skipped = run_benchmarks(bench_inputs, sizes, repeats)
+report = benchmark_info('hot_functions', commit, dirty)
+report.update({'scipy': scipy.__version__, 'wrf_shape': list(shape), 'wrf_levels': n_levels,
+               'sizes': sizes, 'repeats': repeats, 'results': bench_results,
+               'skipped': bench_skipped})
+os.makedirs(os.path.dirname(os.path.abspath(options['out'])), exist_ok=True)
+with open(options['out'], 'w') as outf:
+    json.dump(report, outf, indent=1)
+print()
+print('wrote %s' % options['out'])
+print()
+
+# end hot_functions_benchmark.py
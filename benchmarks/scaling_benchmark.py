@@ -0,0 +1,266 @@
+# pylint: disable=C0103,C0413,C0415,E0401,R0914,W0603
+"""
+Python script "scaling_benchmark.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+
+End-to-end scaling benchmark: runs the whole simulation (Model_control
+ATM_main) on synthetic WRF files and BioSIM output (see Synthetic_inputs.py)
+over a short window of simulated time, at increasing numbers of fliers and
+for each time step; records wall time, time steps per second, peak RSS and
+output bytes of each run as JSON (comparable between commits with
+compare_benchmarks.py) and plots the scaling curves, e.g.
+    python scaling_benchmark.py
+    python scaling_benchmark.py --sizes=1000,10000 --dts=30,60,120 --timeout=1800
+Options: --sizes (numbers of fliers), --dts (time steps [s]), --window (UTC
+simulation start,end; on WRF input times), --levels (WRF model levels),
+--shape (WRF grid south_north,west_east), --timeout (per run [s]), --workdir
+(kept; default a temporary directory), --out (JSON file name).
+Each run is a separate process (started with --run=CONFIG) in its own
+directory; runs that fail or time out are recorded as such. Single-flight
+plots are off and the log is quiet; all other options are the
+Simulation_specifications.py defaults. Everything runs offline.
+"""
+
+
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'source'))
+from Simulation_specifications import Simulation
+from Clock import Clock
+from SBW_empirical import SBW
+from Synthetic_inputs import D03_SHAPE, N_LEVELS, synthetic_wrf_fields
+from Synthetic_inputs import wrf_file_name, write_wrf_file, write_biosim_csv
+from Benchmark_info import benchmark_info, git_commit, results_fname
+
+
+SIZES = [1000, 10000, 100000, 1000000]
+DTS = [60]
+WINDOW = '2013-07-15T22:00,2013-07-16T00:30'  # covers the evening liftoff period
+TIMEOUT = 3600  # [s]
+SIMULATION_NAME = 'ATM_scaling'
+SIM_OVERRIDES = dict()
+
+
+class BenchmarkSimulation(Simulation):
+    """Simulation specifications with the benchmark run's overrides."""
+
+    def __init__(self):
+        Simulation.__init__(self)
+        for name, value in SIM_OVERRIDES.items():
+            setattr(self, name, value)
+        return
+
+
+def run_overrides(window, inputs_path, n_fliers, dt):
+    """Simulation attribute values for a benchmark run."""
+    start_dt, end_dt = window
+    overrides = {'simulation_name': SIMULATION_NAME, 'n_fliers': n_fliers, 'dt': dt,
+                 'start_year': start_dt.year, 'start_month': start_dt.month,
+                 'start_day': start_dt.day, 'start_hour': start_dt.hour,
+                 'start_minute': start_dt.minute, 'end_year': end_dt.year,
+                 'end_month': end_dt.month, 'end_day': end_dt.day, 'end_hour': end_dt.hour,
+                 'end_minute': end_dt.minute, 'WRF_input_path': inputs_path,
+                 'biosim_fname': os.path.join(inputs_path, 'synthetic_BioSIM_output.csv'),
+                 'use_defoliation': False, 'use_initial_flier_polygon': False,
+                 'topography_fname': 'WRF', 'landcover_fname': 'WRF', 'flight_plots': 'off',
+                 'log_quiet': True, 'phase_timing': True, 'profile_mode': None,
+                 'memory_diagnostics': False, 'metrics_export': None}
+    return overrides  # dict
+
+
+def write_inputs(inputs_path, window, n_fliers, shape, n_levels):
+    """Synthetic WRF files (at each WRF input time from the circadian reference
+       time or simulation start to past the simulation end) and BioSIM output."""
+    global SIM_OVERRIDES
+    SIM_OVERRIDES = run_overrides(window, inputs_path, n_fliers, DTS[0])
+    sim = BenchmarkSimulation()
+    clock = Clock(sim)
+    sbw = SBW()
+    local_ref_time = datetime(sim.start_year, sim.start_month, sim.start_day,
+                              tzinfo=timezone.utc) + timedelta(hours=sbw.circadian['ref_time'])
+    ref_time = local_ref_time - timedelta(hours=sim.UTC_offset)
+    interval = timedelta(minutes=sim.WRF_input_interval)
+    first_time = clock.start_dt - ((clock.start_dt - ref_time) // interval + 1) * interval
+    date_time = min(clock.start_dt, first_time)
+    n_files = 0
+    while date_time <= clock.end_dt + 2 * interval:
+        hours = (date_time - clock.start_dt).total_seconds() / 3600.0
+        fields = synthetic_wrf_fields(sim, shape, n_levels, hours)
+        write_wrf_file(sim, fields, os.path.join(inputs_path, wrf_file_name(sim.WRF_grid,
+                                                                            date_time)),
+                       date_time)
+        date_time += interval
+        n_files += 1
+    print('wrote %d synthetic WRF files %s, %d levels' % (n_files, str(shape), n_levels))
+    write_biosim_csv(sim, clock, sbw, sim.biosim_fname, n_fliers)
+    print('wrote synthetic BioSIM output (%d fliers)' % n_fliers)
+    return
+
+
+def output_bytes(run_path):
+    """Total size of the files a run wrote."""
+    n_bytes = 0
+    for dirpath, _, fnames in os.walk(run_path):
+        for fname in fnames:
+            if fname not in ['run_config.json', 'run_result.json', 'run_log.txt']:
+                n_bytes += os.path.getsize(os.path.join(dirpath, fname))
+    return n_bytes  # int
+
+
+def run_simulation(config_fname):
+    """Benchmark run (in its own process and directory): the simulation
+       time loop with the configured overrides; wall time and peak RSS."""
+    global SIM_OVERRIDES
+    with open(config_fname, 'r') as configf:
+        SIM_OVERRIDES = json.load(configf)
+    for suffix in ['summary', 'output']:
+        os.makedirs('%s_simulation_00001_%s' % (SIMULATION_NAME, suffix), exist_ok=True)
+    import Model_control
+    Model_control.Simulation = BenchmarkSimulation
+    sys.argv = ['Model_control.py', '1']
+    start = time.perf_counter()
+    Model_control.ATM_main()
+    result = {'wall_s': time.perf_counter() - start,
+              'peak_rss_bytes': 1024 * resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    with open('run_result.json', 'w') as resultf:
+        json.dump(result, resultf)
+    return
+
+
+def benchmark_run(workdir, window, n_fliers, dt, timeout):
+    """Run the simulation in a separate process; collect its measurements."""
+    run_path = os.path.join(workdir, 'n%d_dt%d' % (n_fliers, dt))
+    os.makedirs(run_path, exist_ok=True)
+    with open(os.path.join(run_path, 'run_config.json'), 'w') as configf:
+        json.dump(run_overrides(window, os.path.join(workdir, 'inputs'), n_fliers, dt), configf)
+    run = {'n_fliers': n_fliers, 'dt': dt, 'status': 'ok'}
+    with open(os.path.join(run_path, 'run_log.txt'), 'w') as logf:
+        try:
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--run=run_config.json'],
+                           cwd=run_path, stdout=logf, stderr=subprocess.STDOUT, check=True,
+                           timeout=timeout)
+        except subprocess.TimeoutExpired:
+            run['status'] = 'timeout'
+        except subprocess.CalledProcessError as err:
+            run['status'] = 'failed (exit status %d, see %s)' % (err.returncode, logf.name)
+    if run['status'] != 'ok':
+        return run  # dict
+    with open(os.path.join(run_path, 'run_result.json'), 'r') as resultf:
+        run.update(json.load(resultf))
+    timing_fname = os.path.join(run_path, '%s_simulation_00001_summary' % SIMULATION_NAME,
+                                'timing_00001.json')
+    with open(timing_fname, 'r') as timingf:
+        timing = json.load(timingf)
+    run['n_steps'] = timing['n_steps']
+    run['loop_wall_s'] = timing['wall_s']
+    run['steps_per_s'] = timing['n_steps'] / timing['wall_s']
+    run['flier_steps_moving'] = timing['counters'].get('fliers_moving', 0)
+    run['output_bytes'] = output_bytes(run_path)
+    return run  # dict
+
+
+def plot_scaling(runs, plot_fname, title):
+    """Wall time, time steps per second, peak RSS and output bytes against
+       number of fliers, one curve per time step."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    panels = [('wall_s', 'wall time [s]'), ('steps_per_s', 'time steps per second'),
+              ('peak_rss_bytes', 'peak RSS [MB]'), ('output_bytes', 'output [MB]')]
+    fig, axes = plt.subplots(2, 2, figsize=(10, 8))
+    for ax, (key, label) in zip(axes.flatten(), panels):
+        scale = 1.0e-6 if key.endswith('bytes') else 1.0
+        for dt in sorted(set(run['dt'] for run in runs)):
+            dt_runs = [run for run in runs if (run['dt'] == dt) and (run['status'] == 'ok')]
+            ax.plot([run['n_fliers'] for run in dt_runs],
+                    [scale * run[key] for run in dt_runs], 'o-', label='dt = %d s' % dt)
+        ax.axvline(1000, color='gray', linestyle=':', linewidth=1)
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('number of fliers')
+        ax.set_ylabel(label)
+        ax.grid(True, which='both', alpha=0.3)
+        ax.legend()
+    fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(plot_fname, dpi=100)
+    plt.close(fig)
+    return
+
+
+options = {'sizes': ','.join(str(n) for n in SIZES), 'dts': ','.join(str(dt) for dt in DTS),
+           'window': WINDOW, 'levels': str(N_LEVELS), 'shape': '%d,%d' % D03_SHAPE,
+           'timeout': str(TIMEOUT), 'workdir': None, 'out': None, 'run': None}
+for arg in sys.argv[1:]:
+    key, value = arg.lstrip('-').split('=', 1)
+    options[key] = value
+if options['run'] is not None:
+    run_simulation(options['run'])
+    sys.exit(0)
+sizes = [int(n) for n in options['sizes'].split(',')]
+dts = [int(dt) for dt in options['dts'].split(',')]
+sim_window = [datetime.fromisoformat(timestr).replace(tzinfo=timezone.utc)
+              for timestr in options['window'].split(',')]
+n_levels = int(options['levels'])
+shape = tuple(int(n) for n in options['shape'].split(','))
+commit, dirty = git_commit()
+if options['out'] is None:
+    options['out'] = results_fname('scaling', commit, dirty)
+bench_workdir = options['workdir'] or tempfile.mkdtemp(prefix='ATM_scaling_')
+os.makedirs(os.path.join(bench_workdir, 'inputs'), exist_ok=True)
+#
+print()
+write_inputs(os.path.join(bench_workdir, 'inputs'), sim_window, max(sizes), shape, n_levels)
+print()
+bench_runs = list()
+for run_dt in dts:
+    for n_run_fliers in sizes:
+        bench_run = benchmark_run(bench_workdir, sim_window, n_run_fliers, run_dt,
+                                  int(options['timeout']))
+        bench_runs.append(bench_run)
+        if bench_run['status'] == 'ok':
+            print('dt %4d s %8d fliers  %9.1f s  %7.2f steps/s  %8.1f MB RSS  %9.1f MB output' %
+                  (run_dt, n_run_fliers, bench_run['wall_s'], bench_run['steps_per_s'],
+                   bench_run['peak_rss_bytes'] / 1.0e6, bench_run['output_bytes'] / 1.0e6))
+        else:
+            print('dt %4d s %8d fliers  %s' % (run_dt, n_run_fliers, bench_run['status']))
+if (options['workdir'] is None) and all(run['status'] == 'ok' for run in bench_runs):
+    shutil.rmtree(bench_workdir)
+else:
+    print('run directories kept in %s' % bench_workdir)
+#
+results = dict()
+for bench_run in bench_runs:
+    if bench_run['status'] == 'ok':
+        results.setdefault('ATM_main dt=%d' % bench_run['dt'], dict())
+        results['ATM_main dt=%d' % bench_run['dt']][str(bench_run['n_fliers'])] = \
+            {'best_s': bench_run['wall_s']}
+report = benchmark_info('scaling', commit, dirty)
+report.update({'window': options['window'], 'wrf_shape': list(shape), 'wrf_levels': n_levels,
+               'runs': bench_runs, 'results': results,
+               'skipped': {'ATM_main dt=%d n=%d' % (run['dt'], run['n_fliers']): run['status']
+                           for run in bench_runs if run['status'] != 'ok'}})
+os.makedirs(os.path.dirname(os.path.abspath(options['out'])), exist_ok=True)
+with open(options['out'], 'w') as outf:
+    json.dump(report, outf, indent=1)
+print()
+print('wrote %s' % options['out'])
+if results:
+    plot_scaling(bench_runs, options['out'].replace('.json', '.png'),
+                 'ATM scaling, %s (%s)' % (commit[:10], options['window']))
+    print('wrote %s' % options['out'].replace('.json', '.png'))
+print()
+
+# end scaling_benchmark.py
@@ -1,4 +1,4 @@
-# pylint: disable=C0103,C0413,R0913,R0914,R0915,R1711,W0621
+# pylint: disable=C0103,C0413,E0401,R0913,R0914,R0915,R1711,W0621
 """
 Python script "combine_dvel_grids.py"
 by Matthew Garcia, Postdoctoral Research Associate
@@ -15,12 +15,21 @@ import sys
 from glob import glob
 import numpy as np
 import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'source'))
 from plot_combined_grids import plot_grid
+from RadarCube_class import read_radar_cube, cube_grid, cube_occupied_times
 
 
 fields = {'dens': 9, 'dvel': 4}
 
 
+def load_grid(fname, timestr, field):
+    """Load per-time-step .npy grid, or one time step of a radar grid cube."""
+    if fname in cubes:
+        return cube_grid(cubes[fname], timestr, field)
+    return np.load(fname)  # numpy 2D array
+
+
 UTM_zone = 19
 sw_east = 481000.0
 sw_north = 5249000.0
@@ -50,12 +59,27 @@ else:
                                   (inpath, minute, str(int(experiment)).zfill(2))))
     dvel_fname_list = sorted(glob('%s/dvel_*%d:00+00:00_%s_000??_XAM_grid.npy' %
                                   (inpath, minute, str(int(experiment)).zfill(2))))
-print('- found %d files to process' % len(dvel_fname_list))
+times = [f.split('/')[-1].split('_')[1] for f in dvel_fname_list]
+#
+# run-level radar grid cubes, one file per simulation with all time steps
+if experiment == 'default':
+    cube_list = sorted(glob('%s/radar_cube_000??_XAM.npz' % inpath))
+else:
+    cube_list = sorted(glob('%s/radar_cube_%s_000??_XAM.npz' %
+                            (inpath, str(int(experiment)).zfill(2))))
+cubes = {fname: read_radar_cube(fname) for fname in cube_list}
+for fname, cube in cubes.items():
+    for timestr in cube_occupied_times(cube):
+        if timestr.endswith('%d:00+00:00' % minute):
+            dens_fname_list.append(fname)
+            dvel_fname_list.append(fname)
+            times.append(timestr)
+print('- found %d files (%d radar cubes) to process' % (len(dvel_fname_list), len(cube_list)))
 files_df = pd.DataFrame({'dens_fname': dens_fname_list,
                          'dvel_fname': dvel_fname_list})
 # 'dens_2013-07-15T23/54/00+00:00_10_00000_XAM_grid.npy'
 # 'dvel_2013-07-15T23/54/00+00:00_10_00000_XAM_grid.npy'
-times = [f.split('/')[-1].split('_')[1] for f in dvel_fname_list]
+# 'radar_cube_10_00000_XAM.npz'
 files_df['time'] = times
 if experiment == 'default':
     iteration = [f.split('/')[-1].split('_')[2] for f in dvel_fname_list]
@@ -113,12 +137,12 @@ for timestr in times:
         if not os.path.isfile(dvel_fname):
             print('%s not found, skipping' % dvel_fname)
             continue
-        dens_grid = np.load(dens_fname)
+        dens_grid = load_grid(dens_fname, timestr, 'dens')
         nmoths = int(np.sum(dens_grid))
         file_dens_nmoths.append(nmoths)
         print('- %s (%d moths)' % (iteration, nmoths))
         dens_combined_grid += dens_grid
-        dvel_grid = np.load(dvel_fname)
+        dvel_grid = load_grid(dvel_fname, timestr, 'dvel')
         dvel_combined_grid += dens_grid * dvel_grid
     #
     nmoths = int(np.sum(dens_combined_grid))
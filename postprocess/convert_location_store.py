@@ -0,0 +1,38 @@
+# pylint: disable=C0103,C0413,E0401
+"""
+Python script "convert_location_store.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+
+Convert a run-level flier location store (locs_*.bin + sidecar files) to the
+per-time-step locs_<time>_<simulation>.csv files, e.g.
+    python convert_location_store.py \
+        WRF-NARR_d03_20130715_simulation_00001_summary/locs_00001
+"""
+
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'source'))
+from LocationStore_class import read_location_index, read_locations_at
+
+
+print()
+prefix = sys.argv[1]
+outpath = os.path.dirname(prefix)
+suffix = os.path.basename(prefix)[len('locs_'):]
+#
+index_df = read_location_index(prefix)
+print('found %d time steps in %s' % (len(index_df), prefix))
+for timestr, seconds in zip(index_df['date_time'], index_df['seconds']):
+    location_df = read_locations_at(prefix, int(seconds))
+    outfname = os.path.join(outpath, 'locs_%s_%s.csv' % (timestr, suffix))
+    location_df.to_csv(outfname)
+    print('- wrote %s (%d fliers)' % (outfname.split('/')[-1], len(location_df)))
+print()
+
+# end convert_location_store.py
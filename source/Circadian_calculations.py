@@ -11,10 +11,11 @@ Copyright (C) 2021 by Matthew Garcia
 
 
 from datetime import datetime, timedelta
-from datetime import timezone as tz
 import numpy as np
 from Interpolation import interpolate_time
 from WRFgrids_class import check_for_WRF_file, WRFgrids
+from Solar_calculations import utc_suntimes
+from Sim_logging import LOGGER
 
 
 def calc_circadian_deltas(sbw, T_ref):
@@ -39,7 +40,7 @@ def calc_circadian_deltas(sbw, T_ref):
     return deltas  # list of 4 * float
 
 
-def initialize_circadian_attributes(sim, sbw, flier):
+def initialize_circadian_attributes(sim, clock, sbw, flier):
     """Calculate liftoff circadian rhythm offsets and times; Regniere et al. [2019]"""
     if sim.calculate_circadian_from_WRF:
         deltas = calc_circadian_deltas(sbw, flier.circadian_T_ref)
@@ -52,22 +53,16 @@ def initialize_circadian_attributes(sim, sbw, flier):
         flier.circadian_delta_0 = 0.5 * sbw.circadian['delta_f']
         flier.circadian_delta_f = sbw.circadian['delta_f']
         flier.circadian_delta_f_potential = 0.0
-    flier.local_t_c = \
-        flier.local_sunset_time + timedelta(hours=flier.circadian_delta_s)
-    flier.local_t_0 = \
-        flier.local_t_c + timedelta(hours=flier.circadian_delta_0)
+    utc_sunset_time, _ = utc_suntimes(clock, flier.lat, flier.lon)
+    utc_t_c = utc_sunset_time + timedelta(hours=flier.circadian_delta_s)
+    utc_t_0 = utc_t_c + timedelta(hours=flier.circadian_delta_0)
     if flier.circadian_delta_f_potential:
-        flier.local_t_m = \
-            flier.local_t_0 + timedelta(hours=flier.circadian_delta_f_potential)
+        utc_t_m = utc_t_0 + timedelta(hours=flier.circadian_delta_f_potential)
     else:
-        flier.local_t_m = \
-            flier.local_t_0 + timedelta(hours=flier.circadian_delta_f)
-    flier.utc_t_c = flier.local_t_c - timedelta(hours=sim.UTC_offset)
-    flier.utc_t_c = flier.utc_t_c.replace(tzinfo=tz.utc)
-    flier.utc_t_0 = flier.local_t_0 - timedelta(hours=sim.UTC_offset)
-    flier.utc_t_0 = flier.utc_t_0.replace(tzinfo=tz.utc)
-    flier.utc_t_m = flier.local_t_m - timedelta(hours=sim.UTC_offset)
-    flier.utc_t_m = flier.utc_t_m.replace(tzinfo=tz.utc)
+        utc_t_m = utc_t_0 + timedelta(hours=flier.circadian_delta_f)
+    flier.t_c_s = clock.seconds(utc_t_c)
+    flier.t_0_s = clock.seconds(utc_t_0)
+    flier.t_m_s = clock.seconds(utc_t_m)
     return
 
 
@@ -75,30 +70,28 @@ def get_flier_environments(sim, locations, topography, landcover, ref_time):
     """Get WRF-based environments of all Fliers."""
     dt_str = 'initial setup'
     grids = WRFgrids(ref_time, sim.WRF_input_path, sim.WRF_grid, dt_str)
-    print('%s : WRF %s grids object initialized' %
-          (dt_str, str(ref_time.isoformat())))
-    print('%s : querying potential flier environments' % dt_str)
+    LOGGER.info('%s : WRF %s grids object initialized', dt_str, str(ref_time.isoformat()))
+    LOGGER.info('%s : querying potential flier environments', dt_str)
     flier_environments = \
         grids.get_flier_environments(sim, locations, topography, landcover)
     return flier_environments
 
 
-def calc_circadian_from_WRF_T(sim, sbw, fliers, locations, topography, landcover):
+def calc_circadian_from_WRF_T(sim, clock, sbw, fliers, locations, topography, landcover):
     """Calculate flier circadian attributes using WRF-based temperatures."""
     dt_str = 'initial setup'
-    print('%s : calculating flier circadian attributes' % dt_str)
+    LOGGER.info('%s : calculating flier circadian attributes', dt_str)
     circadian_ref_hh = int(sbw.circadian['ref_time'])
     circadian_ref_mm = int(60 * (sbw.circadian['ref_time'] - circadian_ref_hh))
     local_circadian_ref_time = datetime(sim.start_year, sim.start_month, sim.start_day,
                                         circadian_ref_hh, circadian_ref_mm, 0)
     circadian_ref_time = local_circadian_ref_time - timedelta(hours=sim.UTC_offset)  # UTC
-    print('%s : circadian reference time %s UTC' %
-          (dt_str, str(circadian_ref_time.isoformat())))
+    LOGGER.info('%s : circadian reference time %s UTC', dt_str, str(circadian_ref_time.isoformat()))
     file_exists, _ = check_for_WRF_file(circadian_ref_time, sim.WRF_input_path, sim.WRF_grid)
     if file_exists:
         flier_environments = get_flier_environments(sim, locations, topography, landcover,
                                                     circadian_ref_time)
-        print('%s : updating flier circadian reference temperatures' % dt_str)
+        LOGGER.info('%s : updating flier circadian reference temperatures', dt_str)
         for flier_id, flier in fliers.items():
             flier.circadian_T_ref = flier_environments[flier_id][5]
     else:
@@ -111,46 +104,66 @@ def calc_circadian_from_WRF_T(sim, sbw, fliers, locations, topography, landcover
         circadian_ref_time2 = circadian_ref_time1 + timedelta(minutes=sim.WRF_input_interval)  # UTC
         flier_environments2 = get_flier_environments(sim, locations, topography, landcover,
                                                      circadian_ref_time2)
-        print('%s : updating flier circadian reference temperatures' % dt_str)
+        LOGGER.info('%s : updating flier circadian reference temperatures', dt_str)
         for flier_id, flier in fliers.items():
             flier.circadian_T_ref = \
                 interpolate_time(flier_environments1[flier_id][5], circadian_ref_time1,
                                  flier_environments2[flier_id][5], circadian_ref_time2,
                                  circadian_ref_time)
     for flier in fliers.values():
-        initialize_circadian_attributes(sim, sbw, flier)
+        initialize_circadian_attributes(sim, clock, sbw, flier)
     return
 
 
-def assign_circadian(sim, sbw, fliers):
+def assign_circadian(sim, clock, sbw, fliers):
     """Assign flier circadian attributes with user-specified values."""
-    print('initial setup : assigning specified flier circadian attributes')
+    LOGGER.info('initial setup : assigning specified flier circadian attributes')
     for flier in fliers.values():
-        initialize_circadian_attributes(sim, sbw, flier)
+        initialize_circadian_attributes(sim, clock, sbw, flier)
     return
 
 
-def calc_circadian_p(clock, flier):
-    """Regniere et al. [2019]; clock contains an offset-aware datetime object in UTC."""
+def circadian_p_at(flier, seconds):
+    """Regniere et al. [2019]; circadian liftoff probability at the given time
+       (integer seconds since simulation start)."""
     C = 1.0 - (2.0 / 3.0) + (1.0 / 5.0)
-    if clock.current_dt < flier.utc_t_0:
-        flier.circadian_p = 0.0
-    elif clock.current_dt > flier.utc_t_m:
-        flier.circadian_p = 1.0
+    if seconds < flier.t_0_s:
+        circadian_p = 0.0
+    elif seconds > flier.t_m_s:
+        circadian_p = 1.0
     else:
-        if clock.current_dt <= flier.utc_t_c:
-            num_t_diff = flier.utc_t_c - clock.current_dt
-            tau_num = -1 * num_t_diff.seconds / 3600.0
-            denom_t_diff = flier.utc_t_c - flier.utc_t_0
+        if seconds <= flier.t_c_s:
+            tau_num = -1 * (flier.t_c_s - seconds) / 3600.0
+            tau_denom = (flier.t_c_s - flier.t_0_s) / 3600.0
         else:
-            num_t_diff = clock.current_dt - flier.utc_t_c
-            tau_num = num_t_diff.seconds / 3600.0
-            denom_t_diff = flier.utc_t_m - flier.utc_t_c
-        tau_denom = denom_t_diff.seconds / 3600.0
+            tau_num = (seconds - flier.t_c_s) / 3600.0
+            tau_denom = (flier.t_m_s - flier.t_c_s) / 3600.0
         tau = tau_num / tau_denom
         term2 = (2.0 / 3.0) * tau**3
         term3 = (1.0 / 5.0) * tau**5
-        flier.circadian_p = (C + tau - term2 + term3) / (2 * C)
+        circadian_p = (C + tau - term2 + term3) / (2 * C)
+    return circadian_p  # float
+
+
+def calc_circadian_p(clock, flier):
+    """Regniere et al. [2019]; clock contains integer seconds since simulation start."""
+    flier.circadian_p = circadian_p_at(flier, clock.current_s)
     return
 
+
+def calc_circadian_ready_time(clock, flier):
+    """First simulation time step after the current one at which the Flier's
+       circadian_p reaches its threshold (i.e. it would switch to READY).
+       circadian_p is non-decreasing in time, so a bisection over time steps suffices."""
+    dt = clock.dt_interval
+    lo = 1
+    hi = max(1, -(-(flier.t_m_s - clock.current_s) // dt) + 1)  # past t_m, so p = 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if circadian_p_at(flier, clock.current_s + mid * dt) >= flier.circadian_p_threshold:
+            hi = mid
+        else:
+            lo = mid + 1
+    return clock.current_s + lo * dt  # int seconds since simulation start
+
 # end Circadian_calculations.py
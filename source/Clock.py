@@ -11,10 +11,14 @@ Copyright (C) 2021 by Matthew Garcia
 
 
 from datetime import datetime, timedelta, timezone
+from Sim_logging import LOGGER
 
 
 class Clock:
-    """Simulation clock in UTC."""
+    """Simulation clock in UTC.
+       Simulation time is kept as integer seconds since the simulation start
+       (current_s); the current datetime object is updated as the clock advances
+       and the ISO string is generated on request."""
 
     def __init__(self, sim):
         self.start_dt = datetime(sim.start_year, sim.start_month, sim.start_day,
@@ -33,18 +37,42 @@ class Clock:
         #
         self.dt_interval = sim.dt
         #
+        self.end_s = self.seconds(self.end_dt)
+        self.current_s = 0
         self.current_dt = self.start_dt
-        self.current_dt_str = self.current_dt.isoformat()
-        self.current_dt_local = self.current_dt + timedelta(hours=self.UTC_offset)
-        #
-        self.elapsed_time = self.current_dt - self.start_dt
+        self._current_dt_str = None
+        self._current_dt_str_s = None
+
+    def seconds(self, date_time):
+        """Convert offset-aware datetime object to integer seconds since simulation start."""
+        return (date_time - self.start_dt) // timedelta(seconds=1)  # int
+
+    def to_datetime(self, seconds):
+        """Convert integer seconds since simulation start to datetime object in UTC."""
+        return self.start_dt + timedelta(seconds=int(seconds))
+
+    def isoformat(self, seconds):
+        """Convert integer seconds since simulation start to ISO string in UTC."""
+        return self.to_datetime(seconds).isoformat()
+
+    @property
+    def current_dt_str(self):
+        """Current simulation time as ISO string, generated once per time step as needed."""
+        if self._current_dt_str_s != self.current_s:
+            self._current_dt_str = self.isoformat(self.current_s)
+            self._current_dt_str_s = self.current_s
+        return self._current_dt_str
 
     def advance_clock(self):
         """Advance simulation time by dt_interval, in seconds."""
-        print('%s : advancing clock, dt = %d seconds' % (self.current_dt_str, self.dt_interval))
-        self.current_dt += timedelta(seconds=self.dt_interval)
-        self.current_dt_str = self.current_dt.isoformat()
-        self.current_dt_local = self.current_dt + timedelta(hours=self.UTC_offset)
-        self.elapsed_time = self.current_dt - self.start_dt
+        LOGGER.debug('%s : advancing clock, dt = %d seconds', self.current_dt_str, self.dt_interval)
+        self.current_s += self.dt_interval
+        self.current_dt = self.to_datetime(self.current_s)
+
+    def advance_clock_to(self, next_s):
+        """Advance simulation time directly to a later time step (adaptive stepping)."""
+        LOGGER.debug('%s : advancing clock to %s', self.current_dt_str, self.isoformat(next_s))
+        self.current_s = next_s
+        self.current_dt = self.to_datetime(self.current_s)
 
 # end Clock.py
@@ -0,0 +1,171 @@
+# pylint: disable=C0103,R0205,R0902,R0913,R0914,R1711
+"""
+Python script "EventTable_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import numpy as np
+import pandas as pd
+from pyproj import Proj, Transformer
+
+
+# liftoff events: Flier.liftoff_loc_info (times as integer seconds since simulation start)
+LIFTOFF_COLUMNS = [('latitude', np.float64), ('longitude', np.float64),
+                   ('UTM_zone', np.int16), ('easting', np.float64), ('northing', np.float64),
+                   ('sfc_elev', np.float64), ('lc_type', 'U16'), ('defoliation', np.float64),
+                   ('sex', np.int8), ('M', np.float64), ('A', np.float64),
+                   ('AMratio', np.float64), ('F', np.float64), ('nu', np.float64),
+                   ('nu_L', np.float64), ('liftoff_time', np.int64), ('sunset_time', np.int64),
+                   ('T_ref', np.float64), ('t_0', np.int64), ('t_c', np.int64),
+                   ('t_m', np.int64), ('circadian_p', np.float64), ('v_h', np.float64),
+                   ('v_z', np.float64), ('T', np.float64), ('P', np.float64),
+                   ('U', np.float64), ('V', np.float64), ('W', np.float64)]
+
+# landing events: Flier.landing_loc_info
+LANDING_COLUMNS = [('latitude', np.float64), ('longitude', np.float64),
+                   ('UTM_zone', np.int16), ('easting', np.float64), ('northing', np.float64),
+                   ('sfc_elev', np.float64), ('lc_type', 'U16'), ('defoliation', np.float64),
+                   ('sex', np.int8), ('M', np.float64), ('F', np.float64)]
+
+# egg deposition events: Oviposition_calculations.update_flier_morphology
+EGGS_COLUMNS = [('latitude', np.float64), ('longitude', np.float64),
+                ('UTM_zone', np.int16), ('easting', np.float64), ('northing', np.float64),
+                ('n_eggs', np.int64)]
+
+# float columns written as integers when all values are whole numbers, as for the
+#   Flier attribute values (defoliation levels are integers unless mapped as floats)
+WHOLE_NUMBER_COLUMNS = ['defoliation']
+
+# domain grids accumulated from liftoff/landing events, and their weights
+FLIER_GRIDS = {'all': lambda records: np.ones(len(records)),
+               'female': lambda records: (records['sex'] != 0).astype(float),
+               'fecundity': lambda records: records['F'] * (records['sex'] != 0),
+               'male': lambda records: (records['sex'] == 0).astype(float)}
+
+# domain grid accumulated from egg deposition events
+EGGS_GRIDS = {'eggs': lambda records: records['n_eggs'].astype(float)}
+
+
+class DomainGrids(object):
+    """Domain-wide grids (sim.grid_*) of event counts or weighted sums, updated
+       incrementally as events are added (or replaced)."""
+
+    def __init__(self, sim, weights):
+        self.south = bool(sim.grid_min_lat < 0.0)
+        self.UTM_zone = sim.grid_UTM_zone
+        self.proj = Proj(proj="utm", zone=self.UTM_zone, ellps="WGS84", south=self.south)
+        self.sw_east, self.sw_north = self.proj(sim.grid_min_lon, sim.grid_min_lat)
+        ne_east, ne_north = self.proj(sim.grid_max_lon, sim.grid_max_lat)
+        self.dx = sim.grid_dx
+        self.dy = sim.grid_dy
+        self.nrows = int((ne_north - self.sw_north) / self.dy)
+        self.ncols = int((ne_east - self.sw_east) / self.dx)
+        self.weights = weights
+        self.grids = {name: np.zeros((self.nrows, self.ncols)) for name in weights}
+        self.zone_transformers = dict()
+        return
+
+    def grid_coords(self, UTM_zones, eastings, northings):
+        """Event locations in domain grid UTM zone, reprojected in one batch per zone."""
+        eastings = np.array(eastings, dtype=float)
+        northings = np.array(northings, dtype=float)
+        for UTM_zone in np.unique(UTM_zones[UTM_zones != self.UTM_zone]):
+            if UTM_zone not in self.zone_transformers:
+                proj = Proj(proj="utm", zone=int(UTM_zone), ellps="WGS84", south=self.south)
+                self.zone_transformers[UTM_zone] = Transformer.from_proj(proj, self.proj)
+            in_zone = (UTM_zones == UTM_zone)
+            eastings[in_zone], northings[in_zone] = \
+                self.zone_transformers[UTM_zone].transform(eastings[in_zone],
+                                                           northings[in_zone])
+        return eastings, northings  # 2 * numpy 1D array
+
+    def add(self, records, sign=1.0):
+        """Bin event records onto all grids (sign -1.0 removes replaced events)."""
+        eastings, northings = self.grid_coords(records['UTM_zone'], records['easting'],
+                                               records['northing'])
+        rows = np.round((northings - self.sw_north) / self.dy).astype(np.int64)
+        cols = np.round((eastings - self.sw_east) / self.dx).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.nrows) & (cols >= 0) & (cols < self.ncols)
+        cells = rows[inside] * self.ncols + cols[inside]
+        for name, weight in self.weights.items():
+            self.grids[name] += sign * np.bincount(
+                cells, weights=weight(records)[inside],
+                minlength=self.nrows * self.ncols).reshape((self.nrows, self.ncols))
+        return
+
+
+class EventTable(object):
+    """Typed, growable table of Flier events (liftoffs, landings, egg deposition)
+       keyed by event id. Events are set like dict items while the Fliers are
+       updated and committed in bulk, e.g. once per time step; a later event
+       with the same id replaces the earlier one. Domain grids are updated with
+       each commit if sim.npy_grids, so that wrap-up only writes them out."""
+
+    def __init__(self, sim, columns, grid_weights=None):
+        self.columns = [col for col, _ in columns]
+        self.dtype = np.dtype(columns)
+        self.records = np.zeros(1024, dtype=self.dtype)
+        self.n_events = 0
+        self.event_ids = list()
+        self.event_rows = dict()
+        self.pending = list()
+        if sim.npy_grids and grid_weights:
+            self.domain = DomainGrids(sim, grid_weights)
+        else:
+            self.domain = None
+        return
+
+    def __setitem__(self, event_id, values):
+        self.pending.append((event_id, values))
+        return
+
+    def __len__(self):
+        self.commit()
+        return self.n_events
+
+    def commit(self):
+        """Append (or replace) all pending events, and update domain grids."""
+        if not self.pending:
+            return
+        latest = dict(self.pending)  # last event per id
+        self.pending = list()
+        new_ids = [event_id for event_id in latest if event_id not in self.event_rows]
+        while self.n_events + len(new_ids) > len(self.records):
+            self.records = np.concatenate([self.records, np.zeros_like(self.records)])
+        for event_id in new_ids:
+            self.event_rows[event_id] = len(self.event_ids)
+            self.event_ids.append(event_id)
+        rows = np.array([self.event_rows[event_id] for event_id in latest], dtype=np.int64)
+        records = np.array([tuple(values) for values in latest.values()], dtype=self.dtype)
+        replaced = rows < self.n_events
+        if self.domain is not None:
+            if np.any(replaced):
+                self.domain.add(self.records[rows[replaced]], sign=-1.0)
+            self.domain.add(records)
+        self.records[rows] = records
+        self.n_events = len(self.event_ids)
+        return
+
+    def frame(self):
+        """All events as DataFrame indexed by event id."""
+        self.commit()
+        records = self.records[:self.n_events]
+        data = {col: records[col] for col in self.columns}
+        for col in WHOLE_NUMBER_COLUMNS:
+            if (col in data) and np.all(np.mod(data[col], 1.0) == 0.0):
+                data[col] = data[col].astype(np.int64)
+        return pd.DataFrame(data, index=list(self.event_ids), columns=self.columns)
+
+    def grid(self, name):
+        """Domain grid accumulated from all committed events."""
+        self.commit()
+        return self.domain.grids[name]  # numpy 2D array
+
+
+# end EventTable_class.py
@@ -10,12 +10,13 @@ Copyright (C) 2021 by Matthew Garcia
 """
 
 
+import logging
 import numpy as np
-import pandas as pd
 from Geography import lat_lon_to_utm, utm_to_lat_lon, inside_grid, calc_GpH
 from Map_class import lc_category
-from Flier_summary import flight_status_columns
-from Plots_gen import plot_single_flight
+from OutputWriter_class import write_output
+from Plots_gen import plot_single_flight, single_flight_record
+from Sim_logging import LOGGER
 
 
 class Flier:
@@ -31,8 +32,9 @@ class Flier:
         self.state = 'INITIALIZED'
         self.nflights = 0
         self.max_nflights = sim.max_nflights
-        self.flight_status = dict()
         self.flight_status_idx = 0
+        self.recorder = None  # StatusRecorder object (to be attached elsewhere)
+        self.recorder_idx = -1
         #
         # location-based attributes
         self.lat = flier_location[0]
@@ -52,10 +54,8 @@ class Flier:
             self.defoliation_level = 0
         #
         # solar time attributes (to be initialized elsewhere)
-        self.utc_sunset_time = None
-        self.local_sunset_time = None
-        self.utc_sunrise_time = None
-        self.local_sunrise_time = None
+        self.sunset_s = 0  # integer seconds since simulation start
+        self.sunrise_s = 0
         #
         # circadian rhythm attributes (to be initialized elsewhere)
         self.circadian_T_ref = 0.0
@@ -63,12 +63,9 @@ class Flier:
         self.circadian_delta_0 = 0.0
         self.circadian_delta_f = 0.0
         self.circadian_delta_f_potential = 0.0
-        self.utc_t_c = None
-        self.local_t_c = None
-        self.utc_t_0 = None
-        self.local_t_0 = None
-        self.utc_t_m = None
-        self.local_t_m = None
+        self.t_c_s = 0  # integer seconds since simulation start
+        self.t_0_s = 0
+        self.t_m_s = 0
         self.circadian_p = 0.0
         self.circadian_p_threshold = np.random.uniform()
         #
@@ -115,10 +112,12 @@ class Flier:
         self.bearing = 0.0
         self.flight_range = 0.0
         self.flight_distance = 0.0
+        self.step_error = 0.0  # trajectory integration error estimate [m]
         #
         # doppler (radar-relative) motion
         self.v_radial = 0.0
         self.v_azimuthal = 0.0
+        self.doppler_due = False
         return
 
     def calc_AM_ratio(self):
@@ -163,13 +162,18 @@ class Flier:
             x_dist = (self.v_x + self.U) * clock.dt_interval
             y_dist = (self.v_y + self.V) * clock.dt_interval
             z_dist = (self.v_z + self.W) * clock.dt_interval
-            self.flight_range += np.sqrt(x_dist**2 + y_dist**2)
-            self.flight_distance += np.sqrt(x_dist**2 + y_dist**2 + z_dist**2)
-            self.easting += x_dist
-            self.northing += y_dist
-            self.lat, self.lon = utm_to_lat_lon(self.easting, self.northing, self.UTM_zone)
-            self.alt_MSL += z_dist
-            self.GpH = calc_GpH(self.lat, self.alt_MSL)
+            self.displace(x_dist, y_dist, z_dist)
+        return
+
+    def displace(self, x_dist, y_dist, z_dist):
+        """Move Flier by the given ground-relative displacement [m]."""
+        self.flight_range += np.sqrt(x_dist**2 + y_dist**2)
+        self.flight_distance += np.sqrt(x_dist**2 + y_dist**2 + z_dist**2)
+        self.easting += x_dist
+        self.northing += y_dist
+        self.lat, self.lon = utm_to_lat_lon(self.easting, self.northing, self.UTM_zone)
+        self.alt_MSL += z_dist
+        self.GpH = calc_GpH(self.lat, self.alt_MSL)
         return
 
     def inside_grid(self, sim):
@@ -234,11 +238,10 @@ class Flier:
             self.v_z = np.min([self.v_z, 0.0])
         else:
             self.zero_motion(sim)
-        if sim.use_radar and (self.alt_AGL > radar.min_alt_AGL):
-            self.v_radial, self.v_azimuthal = \
-                radar.doppler_vel(self.UTM_zone, self.easting, self.northing,
-                                  (self.U + self.v_x), (self.V + self.v_y))
-        else:
+        # Doppler velocity components are computed for all such Fliers at once
+        # (update_flier_dopplers) before flight status is recorded
+        self.doppler_due = bool(sim.use_radar and (self.alt_AGL > radar.min_alt_AGL))
+        if not self.doppler_due:
             self.v_radial = 0.0
             self.v_azimuthal = 0.0
         return
@@ -254,6 +257,7 @@ class Flier:
         if sim.use_radar:
             self.v_radial = 0.0
             self.v_azimuthal = 0.0
+        self.doppler_due = False
         return
 
     def update_empirical_values(self, sim, sbw):
@@ -299,14 +303,14 @@ class Flier:
         return True
 
     def liftoff_loc_info(self, clock):
-        """Concatenate info on Flier liftoff location and conditions."""
+        """Concatenate info on Flier liftoff location and conditions
+           (times as integer seconds since simulation start)."""
         loc_info = [self.lat, self.lon, self.UTM_zone, self.easting, self.northing,
                     self.sfc_elev, self.lc_type, self.defoliation_level, self.sex,
                     self.mass, self.forewing_A, self.AMratio, self.fecundity, self.nu,
-                    self.nu_L, clock.current_dt_str, self.utc_sunset_time.isoformat(),
-                    self.circadian_T_ref, self.utc_t_0.isoformat(), self.utc_t_c.isoformat(),
-                    self.utc_t_m.isoformat(), self.circadian_p, self.v_h, self.v_z, self.T,
-                    self.P, self.U, self.V, self.W]
+                    self.nu_L, clock.current_s, self.sunset_s, self.circadian_T_ref,
+                    self.t_0_s, self.t_c_s, self.t_m_s, self.circadian_p, self.v_h, self.v_z,
+                    self.T, self.P, self.U, self.V, self.W]
         return loc_info
 
     def landing_loc_info(self):
@@ -334,7 +338,7 @@ class Flier:
 
     def state_decisions(self, sim, clock, sbw, defoliation, radar,
                         liftoff_locations, landing_locations, survivors):
-        """The main decision-making block."""
+        """The main decision-making block; the caller records the updated status."""
         self.update_nu(sim, sbw)
         remove = False
         #
@@ -343,7 +347,7 @@ class Flier:
                 self.update_state('READY')
         elif self.state in ['READY', 'HOST', 'FOREST', 'NONFOREST']:
             # sunrise
-            if clock.current_dt > self.utc_sunrise_time:
+            if clock.current_s > self.sunrise_s:
                 self.update_state('SUNRISE')
             # liftoff
             if self.state not in ['SUNRISE', 'SPENT']:
@@ -359,7 +363,7 @@ class Flier:
         elif self.state in ['LIFTOFF', 'FLIGHT']:
             if not self.inside_grid(sim):
                 self.update_state_motion(sim, sbw, radar, 'EXIT')
-            elif clock.current_dt > self.utc_sunrise_time:
+            elif clock.current_s > self.sunrise_s:
                 self.update_state_motion(sim, sbw, radar, 'LANDING_S')
             elif self.Precip >= sim.max_precip:
                 self.update_state_motion(sim, sbw, radar, 'LANDING_P')
@@ -412,7 +416,6 @@ class Flier:
                 self.update_state('EXIT')
                 self.sfc_elev = 0.0
             self.alt_MSL = self.sfc_elev
-        self.update_status(clock)
         if self.state == 'SUNRISE':
             if sim.sequential:
                 survivors[self.flier_id] = self.survivor_info()
@@ -422,28 +425,15 @@ class Flier:
             remove = True
         return remove, liftoff_locations, landing_locations, survivors  # bool + 3 * dict
 
-    def flight_status_info(self, clock):
-        """Concatenate info on Flier location, status, and conditions."""
-        status_info = [self.flight_status_idx, clock.current_dt_str, self.prev_state,
-                       self.state, self.northing, self.easting, self.UTM_zone, self.lat,
-                       self.lon, self.sfc_elev, self.alt_AGL, self.alt_MSL,
-                       self.defoliation_level, self.sex, self.mass, self.forewing_A,
-                       self.fecundity_0, self.fecundity, self.gravidity, self.nu,
-                       self.nu_L, self.v_h, self.v_x, self.v_y, self.v_z, self.v_radial,
-                       self.v_azimuthal, self.bearing, self.flight_range, self.P, self.T,
-                       self.Precip, self.GpH, self.U, self.V, self.W]
-        return status_info
-
     def update_status(self, clock):
         """Record Flier status for output."""
-        flight_status_str = '%s_%s' % (self.flier_id,
-                                       str(self.flight_status_idx).zfill(7))
-        self.flight_status[flight_status_str] = self.flight_status_info(clock)
+        self.recorder.record(self, clock)
         self.flight_status_idx += 1
         return
 
-    def report_status(self, sim, clock, trajectories):
-        """Write out full listing of Flier status and plot trajectory."""
+    def report_status(self, sim, clock, trajectories, status_store=None, plot_service=None):
+        """Write out full listing of Flier status (to the run-level status store,
+           if provided) and plot trajectory (via the plot service, if provided)."""
         if sim.experiment_number:
             outpath = '%s_simulation_%s_%s_output' % \
                       (sim.simulation_name, str(sim.experiment_number).zfill(2),
@@ -451,18 +441,21 @@ class Flier:
         else:
             outpath = '%s_simulation_%s_output' % \
                       (sim.simulation_name, str(sim.simulation_number).zfill(5))
-        status_df = pd.DataFrame.from_dict(self.flight_status, orient='index')
-        status_df.columns = flight_status_columns()
-        status_df = status_df.sort_values(by=['flight_status'])
-        if sim.experiment_number:
-            outfname = '%s/flier_%s_%s_%s_report.csv' % \
-                       (outpath, str(sim.experiment_number).zfill(2),
-                        str(sim.simulation_number).zfill(5), self.flier_id)
+        if status_store is not None:
+            status_store.append(self.recorder, self.recorder_idx)
+            status_df = self.recorder.flier_frame(self.recorder_idx)
         else:
-            outfname = '%s/flier_%s_%s_report.csv' % \
-                       (outpath, str(sim.simulation_number).zfill(5), self.flier_id)
-        status_df.to_csv(outfname)
-        print('%s UTC : wrote %s' % (clock.current_dt_str, outfname.split('/')[-1]))
+            status_df = self.recorder.flier_frame(self.recorder_idx, clock)
+            if sim.experiment_number:
+                outfname = '%s/flier_%s_%s_%s_report.csv' % \
+                           (outpath, str(sim.experiment_number).zfill(2),
+                            str(sim.simulation_number).zfill(5), self.flier_id)
+            else:
+                outfname = '%s/flier_%s_%s_report.csv' % \
+                           (outpath, str(sim.simulation_number).zfill(5), self.flier_id)
+            write_output('csv', outfname, status_df,
+                         '%s UTC : wrote %s' % (clock.current_dt_str, outfname.split('/')[-1]),
+                         logging.DEBUG)
         self.output_written = 1
         #
         if sim.experiment_number:
@@ -472,8 +465,16 @@ class Flier:
         else:
             outfname = '%s/flier_%s_%s_trajectory.png' % \
                        (outpath, str(sim.simulation_number).zfill(5), self.flier_id)
-        if plot_single_flight(sim, status_df, outfname):
-            print('%s UTC : wrote %s' % (clock.current_dt_str, outfname.split('/')[-1]))
+        if plot_service is not None:
+            flight_record = single_flight_record(status_df)
+            if flight_record is not None:
+                plot_service.submit(clock, self.flier_id, flight_record, outfname)
+            plotted = flight_record is not None
+        else:
+            plotted = plot_single_flight(sim, status_df, outfname)
+            if plotted:
+                LOGGER.debug('%s UTC : wrote %s', clock.current_dt_str, outfname.split('/')[-1])
+        if plotted:
             lats = np.array(status_df['lat'])
             lons = np.array(status_df['lon'])
             alts = np.array(status_df['alt_AGL'])
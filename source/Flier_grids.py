@@ -10,114 +10,49 @@ Copyright (C) 2021 by Matthew Garcia
 """
 
 
-import numpy as np
-import pandas as pd
-from pyproj import Proj
+import logging
+from OutputWriter_class import write_output
 
 
-def grid_flier_locations(sim, clock, radar, locations):
-    """Count Fliers and generate/save radar-relative grid."""
-    north_upa = list()
-    east_upa = list()
-    for location in locations.values():
-        if location[2] > radar.min_alt_AGL:
-            north_upa.append(location[7])
-            east_upa.append(location[6])
-    if north_upa:
-        upa_grid = radar.count_grid(north_upa, east_upa)
-        if sim.experiment_number:
-            outfname = '%s_simulation_%s_%s_summary/dens_%s_%s_%s_%s_grid.npy' % \
-                (sim.simulation_name, str(sim.experiment_number).zfill(2),
-                 str(sim.simulation_number).zfill(5), clock.current_dt_str,
-                 str(sim.experiment_number).zfill(2),
-                 str(sim.simulation_number).zfill(5), radar.radar_id)
-        else:
-            outfname = '%s_simulation_%s_summary/dens_%s_%s_%s_grid.npy' % \
-                (sim.simulation_name, str(sim.simulation_number).zfill(5),
-                 clock.current_dt_str, str(sim.simulation_number).zfill(5),
-                 radar.radar_id)
-        np.save(outfname, upa_grid)
-        print('%s UTC : wrote %s' % (clock.current_dt_str, outfname.split('/')[-1]))
-    return
-
-
-def grid_flier_dvels(sim, clock, radar, locations):
-    """Average Flier doppler velocity and generate/save radar-relative grid."""
-    north_upa = list()
-    east_upa = list()
-    dvel_upa = list()
-    for location in locations.values():
-        if location[2] > radar.min_alt_AGL:
-            north_upa.append(location[7])
-            east_upa.append(location[6])
-            dvel_upa.append(location[11])
-    if north_upa:
-        upa_grid = radar.average_grid(north_upa, east_upa, dvel_upa)
-        if sim.experiment_number:
-            outfname = '%s_simulation_%s_%s_summary/dvel_%s_%s_%s_%s_grid.npy' % \
-                (sim.simulation_name, str(sim.experiment_number).zfill(2),
-                 str(sim.simulation_number).zfill(5), clock.current_dt_str,
-                 str(sim.experiment_number).zfill(2),
-                 str(sim.simulation_number).zfill(5), radar.radar_id)
-        else:
-            outfname = '%s_simulation_%s_summary/dvel_%s_%s_%s_grid.npy' % \
-                (sim.simulation_name, str(sim.simulation_number).zfill(5),
-                 clock.current_dt_str, str(sim.simulation_number).zfill(5),
-                 radar.radar_id)
-        np.save(outfname, upa_grid)
-        print('%s UTC : wrote %s' % (clock.current_dt_str, outfname.split('/')[-1]))
+def radar_grid_fname(sim, clock, field, radar_id):
+    """Output file name for per-time-step radar-relative grid."""
+    if sim.experiment_number:
+        outfname = '%s_simulation_%s_%s_summary/%s_%s_%s_%s_%s_grid.npy' % \
+            (sim.simulation_name, str(sim.experiment_number).zfill(2),
+             str(sim.simulation_number).zfill(5), field, clock.current_dt_str,
+             str(sim.experiment_number).zfill(2),
+             str(sim.simulation_number).zfill(5), radar_id)
+    else:
+        outfname = '%s_simulation_%s_summary/%s_%s_%s_%s_grid.npy' % \
+            (sim.simulation_name, str(sim.simulation_number).zfill(5), field,
+             clock.current_dt_str, str(sim.simulation_number).zfill(5), radar_id)
+    return outfname  # str
+
+
+def grid_flier_locations(sim, clock, radars, locations):
+    """Count Fliers and average Flier doppler velocity, and generate/save
+       radar-relative grids for each radar in the radar network."""
+    if not len(radars.snapshot(locations)):
+        return
+    for radar_id, (dens_grid, dvel_grid) in radars.grid_stats(locations).items():
+        for field, upa_grid in [('dens', dens_grid), ('dvel', dvel_grid)]:
+            outfname = radar_grid_fname(sim, clock, field, radar_id)
+            write_output('npy', outfname, upa_grid,
+                         '%s UTC : wrote %s' % (clock.current_dt_str, outfname.split('/')[-1]),
+                         logging.DEBUG)
     return
 
 
-def create_fill_grids(sim, df):
-    """Generate and fill liftoff/landing grids."""
-    proj = Proj(proj="utm", zone=sim.grid_UTM_zone, ellps="WGS84",
-                south=bool(sim.grid_min_lat < 0.0))
-    grid_sw_east, grid_sw_north = proj(sim.grid_min_lon, sim.grid_min_lat)
-    grid_ne_east, grid_ne_north = proj(sim.grid_max_lon, sim.grid_max_lat)
-    grid_nrows = int((grid_ne_north - grid_sw_north) / sim.grid_dy)
-    grid_ncols = int((grid_ne_east - grid_sw_east) / sim.grid_dx)
-    #
-    grid = np.zeros((grid_nrows, grid_ncols))
-    females_grid = np.zeros((grid_nrows, grid_ncols))
-    fecundity_grid = np.zeros((grid_nrows, grid_ncols))
-    males_grid = np.zeros((grid_nrows, grid_ncols))
-    #
-    UTM_zone = list(df['UTM_zone'])
-    east = list(df['easting'])
-    north = list(df['northing'])
-    sex = list(df['sex'])
-    fecundity = list(df['F'])
-    #
-    for i, female in enumerate(sex):
-        if UTM_zone[i] != sim.grid_UTM_zone:
-            proj1 = Proj(proj="utm", zone=UTM_zone[i], ellps="WGS84",
-                         south=bool(sim.grid_min_lat < 0.0))
-            lon, lat = proj1(east[i], north[i], inverse=True)
-            proj2 = Proj(proj="utm", zone=sim.grid_UTM_zone, ellps="WGS84",
-                         south=bool(sim.grid_min_lat < 0.0))
-            east[i], north[i] = proj2(lon, lat)
-        r = int(round((north[i] - grid_sw_north) / sim.grid_dy))
-        c = int(round((east[i] - grid_sw_east) / sim.grid_dx))
-        if 0 <= r < grid_nrows:
-            if 0 <= c < grid_ncols:
-                grid[r, c] += 1
-                if female:
-                    females_grid[r, c] += 1
-                    fecundity_grid[r, c] += fecundity[i]
-                else:
-                    males_grid[r, c] += 1
-    return grid, females_grid, fecundity_grid, males_grid
-
-
-def grid_liftoff_locations(sim, liftoff_locations):
-    """Save Flier liftoff locations and generate domain-wide grid."""
-    liftoff_df = pd.DataFrame.from_dict(liftoff_locations, orient='index')
+def grid_liftoff_locations(sim, clock, liftoff_locations):
+    """Save Flier liftoff locations and accumulated domain-wide grids."""
+    liftoff_df = liftoff_locations.frame()
     liftoff_df.columns = ['latitude', 'longitude', 'UTM_zone', 'easting', 'northing',
                           'sfc_elev', 'lc_type', 'defoliation', 'sex', 'M', 'A',
                           'AMratio', 'F', 'nu', 'nu_L', 'liftoff_time', 'sunset_time',
                           'T_ref', 't_c', 't_0', 't_m', 'circadian_p', 'v_h', 'v_z',
                           'T', 'P', 'U', 'V', 'W']
+    for var in ['liftoff_time', 'sunset_time', 't_c', 't_0', 't_m']:
+        liftoff_df[var] = [clock.isoformat(s) for s in liftoff_df[var]]
     if sim.experiment_number:
         outfname = '%s_simulation_%s_%s_summary/liftoff_locs_times_%s_%s.csv' % \
             (sim.simulation_name, str(sim.experiment_number).zfill(2),
@@ -127,12 +62,14 @@ def grid_liftoff_locations(sim, liftoff_locations):
         outfname = '%s_simulation_%s_summary/liftoff_locs_times_%s.csv' % \
             (sim.simulation_name, str(sim.simulation_number).zfill(5),
              str(sim.simulation_number).zfill(5))
-    liftoff_df.to_csv(outfname)
-    print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+    write_output('csv', outfname, liftoff_df,
+                 'simulation wrapup : wrote %s' % outfname.split('/')[-1])
     #
     if sim.npy_grids:
-        liftoff_grid, liftoff_females_grid, liftoff_fecundity_grid, liftoff_males_grid = \
-            create_fill_grids(sim, liftoff_df)
+        liftoff_grid = liftoff_locations.grid('all')
+        liftoff_females_grid = liftoff_locations.grid('female')
+        liftoff_fecundity_grid = liftoff_locations.grid('fecundity')
+        liftoff_males_grid = liftoff_locations.grid('male')
         #
         if sim.experiment_number:
             outfname = '%s_simulation_%s_%s_summary/liftoff_all_locs_%s_%s.npy' % \
@@ -143,8 +80,8 @@ def grid_liftoff_locations(sim, liftoff_locations):
             outfname = '%s_simulation_%s_summary/liftoff_all_locs_%s.npy' % \
                 (sim.simulation_name, str(sim.simulation_number).zfill(5),
                  str(sim.simulation_number).zfill(5))
-        np.save(outfname, liftoff_grid)
-        print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+        write_output('npy', outfname, liftoff_grid,
+                     'simulation wrapup : wrote %s' % outfname.split('/')[-1])
         #
         if sim.experiment_number:
             outfname = '%s_simulation_%s_%s_summary/liftoff_female_locs_%s_%s.npy' % \
@@ -155,8 +92,8 @@ def grid_liftoff_locations(sim, liftoff_locations):
             outfname = '%s_simulation_%s_summary/liftoff_female_locs_%s.npy' % \
                 (sim.simulation_name, str(sim.simulation_number).zfill(5),
                  str(sim.simulation_number).zfill(5))
-        np.save(outfname, liftoff_females_grid)
-        print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+        write_output('npy', outfname, liftoff_females_grid,
+                     'simulation wrapup : wrote %s' % outfname.split('/')[-1])
         #
         if sim.experiment_number:
             outfname = '%s_simulation_%s_%s_summary/liftoff_fecundity_locs_%s_%s.npy' % \
@@ -167,8 +104,8 @@ def grid_liftoff_locations(sim, liftoff_locations):
             outfname = '%s_simulation_%s_summary/liftoff_fecundity_locs_%s.npy' % \
                 (sim.simulation_name, str(sim.simulation_number).zfill(5),
                  str(sim.simulation_number).zfill(5))
-        np.save(outfname, liftoff_fecundity_grid)
-        print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+        write_output('npy', outfname, liftoff_fecundity_grid,
+                     'simulation wrapup : wrote %s' % outfname.split('/')[-1])
         #
         if sim.experiment_number:
             outfname = '%s_simulation_%s_%s_summary/liftoff_male_locs_%s_%s.npy' % \
@@ -179,14 +116,14 @@ def grid_liftoff_locations(sim, liftoff_locations):
             outfname = '%s_simulation_%s_summary/liftoff_male_locs_%s.npy' % \
                 (sim.simulation_name, str(sim.simulation_number).zfill(5),
                  str(sim.simulation_number).zfill(5))
-        np.save(outfname, liftoff_males_grid)
-        print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+        write_output('npy', outfname, liftoff_males_grid,
+                     'simulation wrapup : wrote %s' % outfname.split('/')[-1])
     return
 
 
 def grid_landing_locations(sim, landing_locations):
-    """Save Flier landing locations and generate domain-wide grid."""
-    landing_df = pd.DataFrame.from_dict(landing_locations, orient='index')
+    """Save Flier landing locations and accumulated domain-wide grids."""
+    landing_df = landing_locations.frame()
     landing_df.columns = ['latitude', 'longitude', 'UTM_zone', 'easting',
                           'northing', 'sfc_elev', 'lc_type', 'defoliation',
                           'sex', 'M', 'F']
@@ -200,12 +137,14 @@ def grid_landing_locations(sim, landing_locations):
         outfname = '%s_simulation_%s_summary/landing_locs_%s.csv' % \
             (sim.simulation_name, str(sim.simulation_number).zfill(5),
              str(sim.simulation_number).zfill(5))
-    landing_df.to_csv(outfname)
-    print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+    write_output('csv', outfname, landing_df,
+                 'simulation wrapup : wrote %s' % outfname.split('/')[-1])
     #
     if sim.npy_grids:
-        landing_grid, landing_females_grid, landing_fecundity_grid, landing_males_grid = \
-            create_fill_grids(sim, landing_df)
+        landing_grid = landing_locations.grid('all')
+        landing_females_grid = landing_locations.grid('female')
+        landing_fecundity_grid = landing_locations.grid('fecundity')
+        landing_males_grid = landing_locations.grid('male')
         #
         if sim.experiment_number:
             outfname = '%s_simulation_%s_%s_summary/landing_all_locs_%s_%s.npy' % \
@@ -216,8 +155,8 @@ def grid_landing_locations(sim, landing_locations):
             outfname = '%s_simulation_%s_summary/landing_all_locs_%s.npy' % \
                 (sim.simulation_name, str(sim.simulation_number).zfill(5),
                  str(sim.simulation_number).zfill(5))
-        np.save(outfname, landing_grid)
-        print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+        write_output('npy', outfname, landing_grid,
+                     'simulation wrapup : wrote %s' % outfname.split('/')[-1])
         #
         if sim.experiment_number:
             outfname = '%s_simulation_%s_%s_summary/landing_female_locs_%s_%s.npy' % \
@@ -228,8 +167,8 @@ def grid_landing_locations(sim, landing_locations):
             outfname = '%s_simulation_%s_summary/landing_female_locs_%s.npy' % \
                 (sim.simulation_name, str(sim.simulation_number).zfill(5),
                  str(sim.simulation_number).zfill(5))
-        np.save(outfname, landing_females_grid)
-        print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+        write_output('npy', outfname, landing_females_grid,
+                     'simulation wrapup : wrote %s' % outfname.split('/')[-1])
         #
         if sim.experiment_number:
             outfname = '%s_simulation_%s_%s_summary/landing_fecundity_locs_%s_%s.npy' % \
@@ -240,8 +179,8 @@ def grid_landing_locations(sim, landing_locations):
             outfname = '%s_simulation_%s_summary/landing_fecundity_locs_%s.npy' % \
                 (sim.simulation_name, str(sim.simulation_number).zfill(5),
                  str(sim.simulation_number).zfill(5))
-        np.save(outfname, landing_fecundity_grid)
-        print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+        write_output('npy', outfname, landing_fecundity_grid,
+                     'simulation wrapup : wrote %s' % outfname.split('/')[-1])
         #
         if sim.experiment_number:
             outfname = '%s_simulation_%s_%s_summary/landing_male_locs_%s_%s.npy' % \
@@ -252,14 +191,14 @@ def grid_landing_locations(sim, landing_locations):
             outfname = '%s_simulation_%s_summary/landing_male_locs_%s.npy' % \
                 (sim.simulation_name, str(sim.simulation_number).zfill(5),
                  str(sim.simulation_number).zfill(5))
-        np.save(outfname, landing_males_grid)
-        print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+        write_output('npy', outfname, landing_males_grid,
+                     'simulation wrapup : wrote %s' % outfname.split('/')[-1])
     return
 
 
 def grid_egg_deposition(sim, egg_deposition):
-    """Save Flier egg deposition locations and generate domain-wide grid."""
-    eggs_df = pd.DataFrame.from_dict(egg_deposition, orient='index')
+    """Save Flier egg deposition locations and accumulated domain-wide grid."""
+    eggs_df = egg_deposition.frame()
     eggs_df.columns = ['latitude', 'longitude', 'UTM_zone',
                        'easting', 'northing', 'n_eggs']
     eggs_df.sort_index(inplace=True)
@@ -272,30 +211,11 @@ def grid_egg_deposition(sim, egg_deposition):
         outfname = '%s_simulation_%s_summary/egg_deposition_%s.csv' % \
             (sim.simulation_name, str(sim.simulation_number).zfill(5),
              str(sim.simulation_number).zfill(5))
-    eggs_df.to_csv(outfname)
-    print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+    write_output('csv', outfname, eggs_df,
+                 'simulation wrapup : wrote %s' % outfname.split('/')[-1])
     #
     if sim.npy_grids:
-        proj = Proj(proj="utm", zone=sim.grid_UTM_zone, ellps="WGS84",
-                    south=bool(sim.grid_min_lat < 0.0))
-        grid_sw_east, grid_sw_north = proj(sim.grid_min_lon, sim.grid_min_lat)
-        grid_ne_east, grid_ne_north = proj(sim.grid_max_lon, sim.grid_max_lat)
-        grid_nrows = int((grid_ne_north - grid_sw_north) / sim.grid_dy)
-        grid_ncols = int((grid_ne_east - grid_sw_east) / sim.grid_dx)
-        eggs_grid = np.zeros((grid_nrows, grid_ncols))
-        for location in egg_deposition.values():
-            if location[2] != sim.grid_UTM_zone:
-                proj1 = Proj(proj="utm", zone=location[2], ellps="WGS84",
-                             south=bool(sim.grid_min_lat < 0.0))
-                lon, lat = proj1(location[3], location[4], inverse=True)
-                proj2 = Proj(proj="utm", zone=sim.grid_UTM_zone, ellps="WGS84",
-                             south=bool(sim.grid_min_lat < 0.0))
-                location[3], location[4] = proj2(lon, lat)
-            r = int(round((location[4] - grid_sw_north) / sim.grid_dy))
-            c = int(round((location[3] - grid_sw_east) / sim.grid_dx))
-            if 0 <= r < grid_nrows:
-                if 0 <= c < grid_ncols:
-                    eggs_grid[r, c] += location[5]
+        eggs_grid = egg_deposition.grid('eggs')
         if sim.experiment_number:
             outfname = '%s_simulation_%s_%s_summary/egg_deposition_%s_%s.npy' % \
                 (sim.simulation_name, str(sim.experiment_number).zfill(2),
@@ -305,8 +225,8 @@ def grid_egg_deposition(sim, egg_deposition):
             outfname = '%s_simulation_%s_summary/egg_deposition_%s.npy' % \
                 (sim.simulation_name, str(sim.simulation_number).zfill(5),
                  str(sim.simulation_number).zfill(5))
-        np.save(outfname, eggs_grid)
-        print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+        write_output('npy', outfname, eggs_grid,
+                     'simulation wrapup : wrote %s' % outfname.split('/')[-1])
     return
 
 # end Flier_grids.py
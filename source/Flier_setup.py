@@ -16,14 +16,15 @@ import pandas as pd
 from Interpolation import get_interp_vals_2D
 from Geography import inside_grid, inside_init_box
 from Map_class import lc_category
+from Sim_logging import LOGGER
 
 
 def read_survivor_locations_attributes(sim, clock):
     """Read previous survivor CSV output file with moth locations, attributes."""
-    print('initial setup : reading and processing %s' % sim.sequential_prev_fname)
+    LOGGER.info('initial setup : reading and processing %s', sim.sequential_prev_fname)
     survivors_df = pd.read_csv(sim.sequential_prev_fname)
     n_survivors = len(survivors_df)
-    print('initial setup : %d total survivors are listed' % n_survivors)
+    LOGGER.info('initial setup : %d total survivors are listed', n_survivors)
     #
     # check if survivors inside simulation domain/grid
     lats = np.array(survivors_df['Latitude']).astype(np.float)
@@ -53,18 +54,18 @@ def read_survivor_locations_attributes(sim, clock):
     # select survivors that eclosed within 7 days of the start date
     maxdays = 7
     available_df = survivors_df[survivors_df['timedelta'] <= timedelta(days=maxdays)]
-    print('initial setup : %d survivors have been ready <= %d days' %
-          (len(available_df), maxdays))
+    LOGGER.info('initial setup : %d survivors have been ready <= %d days', len(available_df),
+                maxdays)
     return available_df
 
 
 def read_flier_locations_attributes(sim, clock, survivors_df=None):
     """Read BioSIM CSV output file with moth emergence dates, locations, attributes.
        Filter to desired moth age and location in simulation domain/box."""
-    print('initial setup : reading and processing %s' % sim.biosim_fname)
+    LOGGER.info('initial setup : reading and processing %s', sim.biosim_fname)
     attributes_df = pd.read_csv(sim.biosim_fname, low_memory=False)
     n_attributes = len(attributes_df)
-    print('initial setup : %d total fliers are listed' % n_attributes)
+    LOGGER.info('initial setup : %d total fliers are listed', n_attributes)
     #
     # check if fliers inside simulation domain/grid
     lats = np.array(attributes_df['Latitude']).astype(np.float)
@@ -94,33 +95,29 @@ def read_flier_locations_attributes(sim, clock, survivors_df=None):
     # select moths that emerged within n days of the start date
     maxdays = sim.biosim_ndays_max
     young_df = attributes_df[attributes_df['timedelta'] <= timedelta(days=maxdays)]
-    print('initial setup : %d new fliers have been ready <= %d days' %
-          (len(young_df), maxdays))
+    LOGGER.info('initial setup : %d new fliers have been ready <= %d days', len(young_df), maxdays)
     #
     # select moths that would have been fertilized on or before the start date
     mindays = sim.biosim_ndays_min
     ready_df = young_df[young_df['timedelta'] >= timedelta(days=mindays)]
-    print('initial setup : %d new fliers are ready by the start date' %
-          len(ready_df))
+    LOGGER.info('initial setup : %d new fliers are ready by the start date', len(ready_df))
     #
     # add on survivors from prior days, if given
     if sim.sequential_use_prev_survivors:
         n_survivors = len(survivors_df)
-        print('initial setup : %d surviving fliers are ready by the start date' %
-              n_survivors)
+        LOGGER.info('initial setup : %d surviving fliers are ready by the start date', n_survivors)
         ready_df = pd.concat([ready_df, survivors_df], axis=0)
         n_ready = len(ready_df)
-        print('initial setup : %d total fliers are ready by the start date' %
-              n_ready)
+        LOGGER.info('initial setup : %d total fliers are ready by the start date', n_ready)
     #
     # select moths that are within the specified initialization/simulation area
     available_df = ready_df[ready_df['inside_grid']]
     if sim.use_initial_flier_polygon:
         available_df = available_df[available_df['inside_init_box']]
-        print('initial setup : selecting only ready fliers in the specified area')
+        LOGGER.info('initial setup : selecting only ready fliers in the specified area')
     n_available = len(available_df)
-    print('initial setup : %d ready fliers are available in the simulation domain' %
-          n_available)
+    LOGGER.info('initial setup : %d ready fliers are available in the simulation domain',
+                n_available)
     #
     # lat/lon based on BioSIM assignment and availability
     lats = np.array(available_df['Latitude']).astype(np.float)
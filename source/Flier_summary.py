@@ -10,17 +10,29 @@ Copyright (C) 2021 by Matthew Garcia
 """
 
 
+from collections import Counter
 from datetime import timedelta
-import iso8601
+import io
+import logging
 import numpy as np
 import pandas as pd
-from Flier_grids import grid_flier_locations, grid_flier_dvels
+from Flier_grids import grid_flier_locations
+from OutputWriter_class import write_output
 from Plots_gen import plot_all_flights
+from Sim_logging import LOGGER, log_step_summary
+
+
+# Flier states counted in each activity category of the per-step summary
+ACTIVITY_STATES = {'inactive': ['INITIALIZED'], 'laying_eggs': ['OVIPOSITION'],
+                   'ready': ['READY'], 'lifting_off': ['LIFTOFF'], 'flying': ['FLIGHT'],
+                   'landing': ['LANDING_T', 'LANDING_P', 'LANDING_S'],
+                   'landed': ['CRASH', 'HOST', 'FOREST', 'NONFOREST'],
+                   'lost': ['SPENT', 'SPLASHED', 'EXIT', 'MAXFLIGHTS', 'EXHAUSTED']}
 
 
 def summarize_locations(clock, fliers):  # class, dict
     """Collect location information for all Flier objects."""
-    print('%s : summarizing flier locations' % clock.current_dt_str)
+    LOGGER.debug('%s : summarizing flier locations', clock.current_dt_str)
     locations = dict()
     for flier_id, flier in fliers.items():
         if (flier.state in ['INITIALIZED', 'OVIPOSITION']) or flier.active:
@@ -48,39 +60,39 @@ def summarize_motion(fliers, locations):  # 2 * dict
 
 
 def summarize_activity(clock, fliers):  # object, dict
-    """In-simulation summary of flier activity."""
-    print('%s : flier summary:' % clock.current_dt_str)
-    summary = np.zeros(8)
-    for flier in fliers.values():
-        if flier.state == 'INITIALIZED':
-            summary[0] += 1
-        elif flier.state == 'OVIPOSITION':
-            summary[1] += 1
-        elif flier.state == 'READY':
-            summary[2] += 1
-        elif flier.state == 'LIFTOFF':
-            summary[3] += 1
-        elif flier.state == 'FLIGHT':
-            summary[4] += 1
-        elif flier.state in ['LANDING_T', 'LANDING_P', 'LANDING_S']:
-            summary[5] += 1
-        elif flier.state in ['CRASH', 'HOST', 'FOREST', 'NONFOREST']:
-            summary[6] += 1
-        elif flier.state in ['SPENT', 'SPLASHED', 'EXIT', 'MAXFLIGHTS', 'EXHAUSTED']:
-            summary[7] += 1
-    print('%s :   %d inactive' % (clock.current_dt_str, summary[0]))
-    print('%s :   %d laying eggs' % (clock.current_dt_str, summary[1]))
-    print('%s :   %d ready' % (clock.current_dt_str, summary[2]))
-    print('%s :   %d lifting off' % (clock.current_dt_str, summary[3]))
-    print('%s :   %d flying' % (clock.current_dt_str, summary[4]))
-    print('%s :   %d landing' % (clock.current_dt_str, summary[5]))
-    print('%s :   %d landed' % (clock.current_dt_str, summary[6]))
-    print('%s :   %d lost' % (clock.current_dt_str, summary[7]))
-    print('%s :   %d total' % (clock.current_dt_str, sum(summary)))
+    """In-simulation summary of flier activity, as one per-step summary record."""
+    if not LOGGER.isEnabledFor(logging.INFO):
+        return
+    state_counts = Counter(flier.state for flier in fliers.values())
+    summary = dict()
+    for activity, states in ACTIVITY_STATES.items():
+        summary[activity] = sum(state_counts[state] for state in states)
+    summary['total'] = sum(summary.values())
+    log_step_summary(clock, 'fliers', summary)
     return
 
 
-def report_flier_locations(sim, clock, radar, locations):
+def report_flier_locations(sim, clock, radar, locations, location_store=None,
+                           radar_cube=None, output_schedule=None):
+    """Write location and motion of all Fliers to the run-level location store,
+       if provided, or as CSV; grid radar-relative density and Doppler velocity
+       to the run-level radar cube, if provided, or as per-step .npy files. Each
+       is written only when due in the output schedule, if provided."""
+    if (output_schedule is None) or output_schedule.due('locations'):
+        if location_store is not None:
+            location_store.append(clock, locations)
+        else:
+            write_flier_locations_csv(sim, clock, locations)
+    #
+    if (output_schedule is None) or output_schedule.due('radar_grids'):
+        if radar_cube is not None:
+            radar_cube.append(clock, locations)
+        elif sim.use_radar and sim.npy_grids:
+            grid_flier_locations(sim, clock, radar, locations)
+    return
+
+
+def write_flier_locations_csv(sim, clock, locations):
     """Write location and motion of all Fliers as CSV."""
     location_df = pd.DataFrame.from_dict(locations, orient='index')
     columns = ['lat', 'lon', 'alt_AGL', 'alt_MSL', 'GpH',
@@ -99,12 +111,9 @@ def report_flier_locations(sim, clock, radar, locations):
             (sim.simulation_name, str(sim.simulation_number).zfill(5),
              clock.current_dt_str, str(sim.simulation_number).zfill(5))
     #
-    location_df.to_csv(outfname)
-    print('%s : wrote %s' % (clock.current_dt_str, outfname.split('/')[-1]))
-    #
-    if sim.use_radar and sim.npy_grids:
-        grid_flier_locations(sim, clock, radar, locations)
-        grid_flier_dvels(sim, clock, radar, locations)
+    write_output('csv', outfname, location_df,
+                 '%s : wrote %s' % (clock.current_dt_str, outfname.split('/')[-1]),
+                 logging.DEBUG)
     return
 
 
@@ -288,11 +297,11 @@ def get_alt_histogram(alts):
     return counts, bins
 
 
-def get_time_stats_histogram(outf, sum_str, var, df, ref_datetime):
-    """Calculate stats and histogram of time data."""
-    times = [iso8601.parse_date(d) for d in list(df[var])]
+def get_time_stats_histogram(outf, sum_str, var, df, clock):
+    """Calculate stats and histogram of time data (integer seconds since simulation start)."""
+    times = [clock.to_datetime(s) for s in list(df[var])]
     sum_str = report_time_stats(outf, sum_str, times)
-    time_counts, time_bins = get_time_histogram(times, ref_datetime)
+    time_counts, time_bins = get_time_histogram(times, clock.start_dt)
     return sum_str, [time_counts, time_bins]
 
 
@@ -304,16 +313,16 @@ def get_speed_stats_histogram(outf, sum_str, var, df, label, units):
     return sum_str, [counts, bins]
 
 
-def report_liftoff_stats(outf, sum_str, liftoff_locs, ref_datetime):
+def report_liftoff_stats(outf, sum_str, liftoff_locs, clock):
     """Report liftoff-oriented statistics across all Fliers in simulation."""
     #
-    liftoff_df = pd.DataFrame.from_dict(liftoff_locs, orient='index')
+    liftoff_df = liftoff_locs.frame()
     liftoff_df.columns = ['latitude', 'longitude', 'UTM_zone', 'easting', 'northing',
                           'sfc_elev', 'lc_type', 'defoliation', 'sex', 'M', 'A',
                           'AMratio', 'F', 'nu', 'nu_L', 'liftoff_time', 'sunset_time',
                           'T_ref', 't_0', 't_c', 't_m', 'circadian_p', 'v_h', 'v_z',
                           'T', 'P', 'U', 'V', 'W']
-    sunset_times = [iso8601.parse_date(d) for d in list(liftoff_df['sunset_time'])]
+    sunset_times = [clock.to_datetime(s) for s in list(liftoff_df['sunset_time'])]
     outf.write('sunset: \n')
     sum_str = report_time_stats(outf, sum_str, sunset_times)
     outf.write('\n')
@@ -330,17 +339,17 @@ def report_liftoff_stats(outf, sum_str, liftoff_locs, ref_datetime):
     var = 'liftoff_time'
     outf.write('overall flight start: \n')
     sum_str, liftoff_times_histo = get_time_stats_histogram(outf, sum_str, var,
-                                                            liftoff_df, ref_datetime)
+                                                            liftoff_df, clock)
     histograms.append(liftoff_times_histo)
     outf.write('\n')
     outf.write('female flight start: \n')
     sum_str, liftoff_times_histo = get_time_stats_histogram(outf, sum_str, var,
-                                                            liftoff_df_female, ref_datetime)
+                                                            liftoff_df_female, clock)
     histograms.append(liftoff_times_histo)
     outf.write('\n')
     outf.write('male flight start: \n')
     sum_str, liftoff_times_histo = get_time_stats_histogram(outf, sum_str, var,
-                                                            liftoff_df_male, ref_datetime)
+                                                            liftoff_df_male, clock)
     histograms.append(liftoff_times_histo)
     outf.write('\n')
     #
@@ -384,132 +393,41 @@ def flight_status_columns():
     return columns
 
 
-def report_flier_statistics(sim, clock, all_fliers_flight_status, liftoff_locations):
-    """Calculate and report various statistics across all Fliers in simulation."""
-    n_fliers_male = 0
-    n_fliers_female = 0
-    n_nonfliers_male = 0
-    n_nonfliers_female = 0
-    flight_start = list()
-    flight_start_male = list()
-    flight_start_female = list()
-    flight_duration = list()
-    flight_duration_male = list()
-    flight_duration_female = list()
-    flight_dist = list()
-    flight_dist_male = list()
-    flight_dist_female = list()
-    flight_meanspeed = list()
-    flight_meanspeed_male = list()
-    flight_meanspeed_female = list()
-    flight_meanairspeed = list()
-    flight_stdvairspeed = list()
-    flight_sizeairspeed = list()
-    flight_meanairspeed_male = list()
-    flight_stdvairspeed_male = list()
-    flight_sizeairspeed_male = list()
-    flight_meanairspeed_female = list()
-    flight_stdvairspeed_female = list()
-    flight_sizeairspeed_female = list()
-    flight_meanwind = list()
-    flight_meanAGL = list()
-    flight_meanAGL_male = list()
-    flight_meanAGL_female = list()
-    flight_maxAGL = list()
-    flight_maxAGL_male = list()
-    flight_maxAGL_female = list()
-    flight_maxAMSL = list()
-    flight_maxAMSL_male = list()
-    flight_maxAMSL_female = list()
-    #
-    # put each flier's status data into a DataFrame for ease of processing
-    for flight_status in all_fliers_flight_status.values():
-        status_df = pd.DataFrame.from_dict(flight_status, orient='index')
-        status_df.columns = flight_status_columns()
-        status_df = status_df.sort_values(by=['date_time'])
-        #
-        date_time_all = [iso8601.parse_date(d) for d in list(status_df['date_time'])]
-        sfc_all = np.array(status_df['sfc_elev'])
-        alt_all = np.array(status_df['alt_MSL'])
-        alt_AGL = alt_all - sfc_all
-        female = list(status_df['sex'])[0]
-        if np.sum(alt_AGL) == 0:
-            if female:
-                n_nonfliers_female += 1
-            else:
-                n_nonfliers_male += 1
-        else:
-            if female:
-                n_fliers_female += 1
-            else:
-                n_fliers_male += 1
-            idx1 = 0
-            for idx, alt in enumerate(alt_AGL):
-                if alt > 0.0:
-                    idx1 = idx - 1
-                    break
-            start_datetime = date_time_all[idx1]
-            flight_start.append(start_datetime)
-            if female:
-                flight_start_female.append(start_datetime)
-            else:
-                flight_start_male.append(start_datetime)
-            idx2 = -1
-            if alt_AGL[-1] > 0.0:
-                idx2 = len(alt_AGL) - 1
-            else:
-                for idx in range(len(alt_AGL)-1, -1, -1):
-                    if alt_AGL[idx] > 0.0:
-                        idx2 = idx + 1
-                        break
-            end_datetime = date_time_all[idx2]
-            duration = end_datetime - start_datetime
-            flight_duration.append(duration.seconds / 60.0)
-            if female:
-                flight_duration_female.append(duration.seconds / 60.0)
-            else:
-                flight_duration_male.append(duration.seconds / 60.0)
-            dist = np.array(status_df['range'])[idx2]
-            flight_dist.append(dist / 1000.0)
-            if female:
-                flight_dist_female.append(dist / 1000.0)
-            else:
-                flight_dist_male.append(dist / 1000.0)
-            flight_meanspeed.append(dist / duration.seconds)
-            if female:
-                flight_meanspeed_female.append(dist / duration.seconds)
-            else:
-                flight_meanspeed_male.append(dist / duration.seconds)
-            v_h = np.array(status_df['v_h'])[idx1:idx2]
-            flight_meanairspeed.append(np.mean(v_h))
-            flight_stdvairspeed.append(np.std(v_h))
-            flight_sizeairspeed.append(len(v_h))
-            if female:
-                flight_meanairspeed_female.append(np.mean(v_h))
-                flight_stdvairspeed_female.append(np.std(v_h))
-                flight_sizeairspeed_female.append(len(v_h))
-            else:
-                flight_meanairspeed_male.append(np.mean(v_h))
-                flight_stdvairspeed_male.append(np.std(v_h))
-                flight_sizeairspeed_male.append(len(v_h))
-            U = np.array(status_df['U'])[idx1:idx2]
-            V = np.array(status_df['V'])[idx1:idx2]
-            flight_meanwind.append(np.mean(np.sqrt(U**2 + V**2)))
-            flight_meanAGL.append(np.mean(alt_AGL[idx1:idx2]))
-            if female:
-                flight_meanAGL_female.append(np.mean(alt_AGL[idx1:idx2]))
-            else:
-                flight_meanAGL_male.append(np.mean(alt_AGL[idx1:idx2]))
-            flight_maxAGL.append(np.max(alt_AGL[idx1:idx2]))
-            if female:
-                flight_maxAGL_female.append(np.max(alt_AGL[idx1:idx2]))
-            else:
-                flight_maxAGL_male.append(np.max(alt_AGL[idx1:idx2]))
-            flight_maxAMSL.append(np.max(alt_all[idx1:idx2]))
-            if female:
-                flight_maxAMSL_female.append(np.max(alt_all[idx1:idx2]))
-            else:
-                flight_maxAMSL_male.append(np.max(alt_all[idx1:idx2]))
+def report_flier_statistics(sim, clock, flight_stats, liftoff_locations):
+    """Calculate and report various statistics across all Fliers in simulation,
+       from the FlightStatistics accumulated as each Flier was removed."""
+    n_fliers_male = flight_stats.n_fliers[0]
+    n_fliers_female = flight_stats.n_fliers[1]
+    n_nonfliers_male = flight_stats.n_nonfliers[0]
+    n_nonfliers_female = flight_stats.n_nonfliers[1]
+    flight_duration = flight_stats.flight_values('duration')
+    flight_duration_male = flight_stats.flight_values('duration', 0)
+    flight_duration_female = flight_stats.flight_values('duration', 1)
+    flight_dist = flight_stats.flight_values('dist')
+    flight_dist_male = flight_stats.flight_values('dist', 0)
+    flight_dist_female = flight_stats.flight_values('dist', 1)
+    flight_meanspeed = flight_stats.flight_values('meanspeed')
+    flight_meanspeed_male = flight_stats.flight_values('meanspeed', 0)
+    flight_meanspeed_female = flight_stats.flight_values('meanspeed', 1)
+    flight_meanairspeed = flight_stats.flight_values('meanairspeed')
+    flight_stdvairspeed = flight_stats.flight_values('stdvairspeed')
+    flight_sizeairspeed = flight_stats.flight_values('sizeairspeed')
+    flight_meanairspeed_male = flight_stats.flight_values('meanairspeed', 0)
+    flight_stdvairspeed_male = flight_stats.flight_values('stdvairspeed', 0)
+    flight_sizeairspeed_male = flight_stats.flight_values('sizeairspeed', 0)
+    flight_meanairspeed_female = flight_stats.flight_values('meanairspeed', 1)
+    flight_stdvairspeed_female = flight_stats.flight_values('stdvairspeed', 1)
+    flight_sizeairspeed_female = flight_stats.flight_values('sizeairspeed', 1)
+    flight_meanwind = flight_stats.flight_values('meanwind')
+    flight_meanAGL = flight_stats.flight_values('meanAGL')
+    flight_meanAGL_male = flight_stats.flight_values('meanAGL', 0)
+    flight_meanAGL_female = flight_stats.flight_values('meanAGL', 1)
+    flight_maxAGL = flight_stats.flight_values('maxAGL')
+    flight_maxAGL_male = flight_stats.flight_values('maxAGL', 0)
+    flight_maxAGL_female = flight_stats.flight_values('maxAGL', 1)
+    flight_maxAMSL = flight_stats.flight_values('maxAMSL')
+    flight_maxAMSL_male = flight_stats.flight_values('maxAMSL', 0)
+    flight_maxAMSL_female = flight_stats.flight_values('maxAMSL', 1)
     #
     if sim.experiment_number:
         outfname = '%s_simulation_%s_%s_summary/%s_%s_%s_flights_summary.txt' % \
@@ -521,7 +439,7 @@ def report_flier_statistics(sim, clock, all_fliers_flight_status, liftoff_locati
             (sim.simulation_name, str(sim.simulation_number).zfill(5), sim.simulation_name,
              str(sim.simulation_number).zfill(5))
     #
-    with open(outfname, 'w') as outfile:
+    with io.StringIO() as outfile:
         if sim.experiment_number == 0:
             outfile.write('simulation %s output\n' % str(sim.simulation_number).zfill(5))
             summary_string = 'simulation_%s,' % str(sim.simulation_number).zfill(5)
@@ -558,7 +476,7 @@ def report_flier_statistics(sim, clock, all_fliers_flight_status, liftoff_locati
         outfile.write('\n')
         #
         summary_string, histograms = \
-            report_liftoff_stats(outfile, summary_string, liftoff_locations, clock.start_dt)
+            report_liftoff_stats(outfile, summary_string, liftoff_locations, clock)
         liftoff_time_counts, liftoff_time_bins = histograms[0]
         liftoff_time_counts_female, liftoff_time_bins_female = histograms[1]
         liftoff_time_counts_male, liftoff_time_bins_male = histograms[2]
@@ -711,7 +629,8 @@ def report_flier_statistics(sim, clock, all_fliers_flight_status, liftoff_locati
         outfile.write(','.join([str(x) for x in flight_alt_counts_female]) + '\n')
         outfile.write(','.join([str(x) for x in flight_alt_bins_male]) + '\n')
         outfile.write(','.join([str(x) for x in flight_alt_counts_male]) + '\n')
-    print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
+        write_output('text', outfname, outfile.getvalue(),
+                     'simulation wrapup : wrote %s' % outfname.split('/')[-1])
     return
 
 
@@ -730,8 +649,7 @@ def report_survivor_attributes(sim, survivors):
         outfname = '%s_%s_survivor_attributes.csv' % \
             (sim.simulation_name, str(sim.simulation_number).zfill(5))
     #
-    survivors_df.to_csv(outfname)
-    print('simulation wrapup : wrote %s' % outfname)
+    write_output('csv', outfname, survivors_df, 'simulation wrapup : wrote %s' % outfname)
     return
 
 
@@ -747,7 +665,6 @@ def plot_trajectories(sim, next_wrf_grids, trajectories):
                 (sim.simulation_name, str(sim.simulation_number).zfill(5),
                  sim.simulation_name, str(sim.simulation_number).zfill(5))
     plot_all_flights(sim, next_wrf_grids, trajectories, outfname)
-    print('simulation wrapup : wrote %s' % outfname.split('/')[-1])
     return
 
 # end Flier_summary.py
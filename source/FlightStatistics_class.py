@@ -0,0 +1,77 @@
+# pylint: disable=C0103,R0205,R0902,R0914,R1711
+"""
+Python script "FlightStatistics_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import numpy as np
+
+
+# per-flight values kept for the end-of-simulation flights summary
+FLIGHT_VALUES = ['start_s', 'duration', 'dist', 'meanspeed', 'meanairspeed',
+                 'stdvairspeed', 'sizeairspeed', 'meanwind', 'meanAGL', 'maxAGL', 'maxAMSL']
+
+
+class FlightStatistics(object):
+    """Flight statistics accumulated as each Flier is removed from the simulation:
+       flier/non-flier counts by sex and a few scalar values per Flier (flight
+       start, duration, distance, speeds, altitudes), so that the Flier's status
+       history need not be retained for the end-of-simulation flights summary."""
+
+    def __init__(self):
+        self.n_fliers = {0: 0, 1: 0}  # by sex (1 = female)
+        self.n_nonfliers = {0: 0, 1: 0}
+        self.sex = list()
+        self.values = {key: list() for key in FLIGHT_VALUES}
+        return
+
+    def add_flier(self, recorder, flier_idx):
+        """Accumulate flight statistics from one Flier's status history."""
+        data = recorder.flier_columns(flier_idx, ['sex', 'sfc_elev', 'alt_MSL', 'range',
+                                                  'v_h', 'U', 'V'])
+        alt_all = data['alt_MSL']
+        alt_AGL = alt_all - data['sfc_elev']
+        female = int(data['sex'][0] != 0)
+        if np.sum(alt_AGL) == 0:
+            self.n_nonfliers[female] += 1
+            return
+        self.n_fliers[female] += 1
+        aloft = np.flatnonzero(alt_AGL > 0.0)
+        idx1 = aloft[0] - 1 if len(aloft) else 0
+        if alt_AGL[-1] > 0.0:
+            idx2 = len(alt_AGL) - 1
+        else:
+            idx2 = aloft[-1] + 1 if len(aloft) else -1
+        start_s = int(data['date_time'][idx1])
+        duration_s = (int(data['date_time'][idx2]) - start_s) % 86400  # as timedelta.seconds
+        dist = data['range'][idx2]
+        v_h = data['v_h'][idx1:idx2]
+        U = data['U'][idx1:idx2]
+        V = data['V'][idx1:idx2]
+        self.sex.append(female)
+        self.values['start_s'].append(start_s)
+        self.values['duration'].append(duration_s / 60.0)
+        self.values['dist'].append(dist / 1000.0)
+        self.values['meanspeed'].append(dist / duration_s)
+        self.values['meanairspeed'].append(np.mean(v_h))
+        self.values['stdvairspeed'].append(np.std(v_h))
+        self.values['sizeairspeed'].append(len(v_h))
+        self.values['meanwind'].append(np.mean(np.sqrt(U**2 + V**2)))
+        self.values['meanAGL'].append(np.mean(alt_AGL[idx1:idx2]))
+        self.values['maxAGL'].append(np.max(alt_AGL[idx1:idx2]))
+        self.values['maxAMSL'].append(np.max(alt_all[idx1:idx2]))
+        return
+
+    def flight_values(self, key, sex=None):
+        """Per-flight values for all Fliers, or for females (1) or males (0) only."""
+        if sex is None:
+            return list(self.values[key])
+        return [val for val, female in zip(self.values[key], self.sex) if female == sex]
+
+# end FlightStatistics_class.py
@@ -10,15 +10,20 @@ Copyright (C) 2019, 2020 by Matthew Garcia
 """
 
 
+from datetime import timedelta
 import numpy as np
 from scipy.interpolate import interp1d, griddata
 
 
 def interpolate_time(value1, date_time1, value2, date_time2, date_time):
-    """Linear interpolation of meteorological values in time."""
-    t1 = date_time - date_time1  # datetime objects
-    t_interval = date_time2 - date_time1  # datetime objects
-    t_frac = float(t1.seconds) / float(t_interval.seconds)
+    """Linear interpolation of meteorological values in time; times are either
+       datetime objects or integer seconds since simulation start."""
+    t1 = date_time - date_time1
+    t_interval = date_time2 - date_time1
+    if isinstance(t1, timedelta):
+        t1 = t1.seconds
+        t_interval = t_interval.seconds
+    t_frac = float(t1) / float(t_interval)
     value = value1 + (value2 - value1) * t_frac
     return value  # float
 
@@ -0,0 +1,152 @@
+# pylint: disable=C0103,R0205,R0902,R0913,R0914,R1711
+"""
+Python script "LocationStore_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import json
+from datetime import timedelta
+import iso8601
+import numpy as np
+import pandas as pd
+from OutputWriter_class import write_output
+from Sim_logging import LOGGER
+
+
+# Flier location and motion fields, as in the per-time-step locs_*.csv files
+LOCATION_COLUMNS = ['lat', 'lon', 'alt_AGL', 'alt_MSL', 'GpH', 'UTM_zone', 'easting',
+                    'northing', 'v_x', 'v_y', 'v_z', 'v_r', 'v_a']
+
+# fixed-width record layout: time (integer seconds since simulation start), flier index,
+#   and the location and motion fields at full precision
+LOCATION_DTYPE = np.dtype([('date_time', np.int64), ('flier', np.int32),
+                           ('lat', np.float64), ('lon', np.float64),
+                           ('alt_AGL', np.float64), ('alt_MSL', np.float64),
+                           ('GpH', np.float64), ('UTM_zone', np.int16),
+                           ('easting', np.float64), ('northing', np.float64),
+                           ('v_x', np.float64), ('v_y', np.float64), ('v_z', np.float64),
+                           ('v_r', np.float64), ('v_a', np.float64)])
+
+
+class LocationStore(object):
+    """Run-level append-only store of Flier locations and motion at each time step.
+       Each time step is appended as one block of fixed-width binary records
+       (<prefix>.bin); the time step, block offset and length are appended to a
+       time index (<prefix>_index.csv), and Flier ids are appended to a Flier
+       index (<prefix>_fliers.csv) as they first appear. All store files are
+       written through the output writer."""
+
+    def __init__(self, sim, clock):
+        if sim.experiment_number:
+            self.prefix = '%s_simulation_%s_%s_summary/locs_%s_%s' % \
+                (sim.simulation_name, str(sim.experiment_number).zfill(2),
+                 str(sim.simulation_number).zfill(5), str(sim.experiment_number).zfill(2),
+                 str(sim.simulation_number).zfill(5))
+        else:
+            self.prefix = '%s_simulation_%s_summary/locs_%s' % \
+                (sim.simulation_name, str(sim.simulation_number).zfill(5),
+                 str(sim.simulation_number).zfill(5))
+        self.flier_index = dict()
+        self.n_records = 0
+        self.n_steps = 0
+        #
+        meta = {'columns': LOCATION_COLUMNS, 'start_dt': clock.start_dt_str,
+                'dt_interval': clock.dt_interval}
+        write_output('text', '%s_meta.json' % self.prefix, json.dumps(meta, indent=1))
+        write_output('append', '%s_index.csv' % self.prefix,
+                     b'date_time,seconds,offset,n_records\n')
+        write_output('append', '%s_fliers.csv' % self.prefix, b'flier,flier_id\n')
+        write_output('append', '%s.bin' % self.prefix, b'')
+        return
+
+    def append(self, clock, locations):
+        """Append locations and motion of all Fliers at the current time step."""
+        records = np.zeros(len(locations), dtype=LOCATION_DTYPE)
+        if locations:
+            values = np.array(list(locations.values()), dtype=np.float64)
+            for i, col in enumerate(LOCATION_COLUMNS):
+                records[col] = values[:, i]
+            new_fliers = list()
+            for flier_id in locations:
+                if flier_id not in self.flier_index:
+                    self.flier_index[flier_id] = len(self.flier_index)
+                    new_fliers.append('%d,%s\n' % (self.flier_index[flier_id], flier_id))
+            if new_fliers:
+                write_output('append', '%s_fliers.csv' % self.prefix,
+                             ''.join(new_fliers).encode('utf-8'))
+            records['flier'] = [self.flier_index[flier_id] for flier_id in locations]
+        records['date_time'] = clock.current_s
+        write_output('append', '%s.bin' % self.prefix, records.tobytes())
+        line = '%s,%d,%d,%d\n' % (clock.current_dt_str, clock.current_s, self.n_records,
+                                  len(records))
+        write_output('append', '%s_index.csv' % self.prefix, line.encode('utf-8'))
+        self.n_records += len(records)
+        self.n_steps += 1
+        return
+
+    def close(self):
+        """Report the store contents at end of simulation."""
+        LOGGER.info('simulation wrapup : wrote %d time steps (%d location records) to %s.bin',
+                    self.n_steps, self.n_records, self.prefix.split('/')[-1])
+        return
+
+
+def read_location_index(prefix):
+    """Time index (offset and number of records per time step) of a location store."""
+    index_df = pd.read_csv('%s_index.csv' % prefix)
+    return index_df  # DataFrame
+
+
+def read_location_fliers(prefix):
+    """Flier ids by Flier index of a location store."""
+    fliers_df = pd.read_csv('%s_fliers.csv' % prefix, index_col='flier',
+                            dtype={'flier_id': str})
+    return fliers_df['flier_id']  # Series
+
+
+def records_to_frame(records, flier_ids):
+    """Location records as DataFrame indexed by Flier id, as in locs_*.csv."""
+    data = {col: records[col] for col in LOCATION_COLUMNS}
+    index = list(flier_ids[records['flier']])
+    return pd.DataFrame(data, index=index, columns=LOCATION_COLUMNS)  # DataFrame
+
+
+def read_locations_at(prefix, date_time):
+    """Read locations of all Fliers at one time step, given as ISO string or
+       integer seconds since simulation start."""
+    index_df = read_location_index(prefix)
+    if isinstance(date_time, str):
+        step = index_df[index_df['date_time'] == iso8601.parse_date(date_time).isoformat()]
+    else:
+        step = index_df[index_df['seconds'] == date_time]
+    if step.empty:
+        return None
+    offset, n_records = step.iloc[0][['offset', 'n_records']]
+    records = np.fromfile('%s.bin' % prefix, dtype=LOCATION_DTYPE, count=int(n_records),
+                          offset=int(offset) * LOCATION_DTYPE.itemsize)
+    return records_to_frame(records, read_location_fliers(prefix))  # DataFrame
+
+
+def read_flier_locations(prefix, flier_id):
+    """Read location history of one Flier, indexed by ISO time."""
+    with open('%s_meta.json' % prefix, 'r') as metafile:
+        meta = json.load(metafile)
+    fliers = read_location_fliers(prefix)
+    flier_idx = fliers.index[fliers == flier_id]
+    if len(flier_idx):  # Flier has records, so the store is not empty
+        records = np.memmap('%s.bin' % prefix, dtype=LOCATION_DTYPE, mode='r')
+        records = np.array(records[records['flier'] == flier_idx[0]])
+    else:
+        records = np.zeros(0, dtype=LOCATION_DTYPE)
+    start_dt = iso8601.parse_date(meta['start_dt'])
+    data = {col: records[col] for col in LOCATION_COLUMNS}
+    index = [(start_dt + timedelta(seconds=int(s))).isoformat() for s in records['date_time']]
+    return pd.DataFrame(data, index=index, columns=LOCATION_COLUMNS)  # DataFrame
+
+# end LocationStore_class.py
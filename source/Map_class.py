@@ -13,6 +13,7 @@ Copyright (C) 2021 by Matthew Garcia
 import sys
 import numpy as np
 from osgeo import gdal
+from Sim_logging import LOGGER
 
 
 class Map(object):
@@ -20,10 +21,10 @@ class Map(object):
 
     def __init__(self, sim, fname):
         if '.tif' in fname:
-            print('initial setup : reading map file %s' % fname)
+            LOGGER.info('initial setup : reading map file %s', fname)
             ds = gdal.Open(fname)
             if ds.RasterCount > 1:
-                print('initial setup : found >1 raster in this GeoTIFF file')
+                LOGGER.info('initial setup : found >1 raster in this GeoTIFF file')
             # flip to proper viewing orientation
             self.map_grid = np.flipud(ds.ReadAsArray())
             self.nrows = ds.RasterYSize
@@ -36,33 +37,31 @@ class Map(object):
             self.SW_lat = self.NE_lat + self.ncols * gt[4] - self.nrows * self.dy
             self.NE_lon = self.SW_lon + self.ncols * self.dx + self.nrows * gt[2]
         else:
-            print('ERROR: map type %s is not yet supported' % fname)
-            print('       --> exiting simulation set-up')
+            LOGGER.error('ERROR: map type %s is not yet supported', fname)
+            LOGGER.error('       --> exiting simulation set-up')
             sys.exit(1)
         self.map_bounds = [self.SW_lat, self.SW_lon, self.NE_lat, self.NE_lon]
         self.subset = self.check_map_boundaries(sim)
         if self.subset == -1:
-            print('ERROR: the provided map %s is not' % fname)
-            print('       large enough to cover the simulation area')
-            print('       map SW_lat = %.16f must be <=' % self.SW_lat)
-            print('       sim SW_lat = %.16f' % sim.grid_min_lat)
-            print('       map SW_lon = %.16f must be <=' % self.SW_lon)
-            print('       sim SW_lon = %.16f' % sim.grid_min_lon)
-            print('       map NE_lat = %.16f must be >=' % self.NE_lat)
-            print('       sim NE_lat = %.16f' % sim.grid_max_lat)
-            print('       map NE_lat = %.16f must be >=' % self.NE_lon)
-            print('       sim NE_lat = %.16f' % sim.grid_max_lon)
-            print('       --> exiting simulation set-up')
+            LOGGER.error('ERROR: the provided map %s is not', fname)
+            LOGGER.error('       large enough to cover the simulation area')
+            LOGGER.error('       map SW_lat = %.16f must be <=', self.SW_lat)
+            LOGGER.error('       sim SW_lat = %.16f', sim.grid_min_lat)
+            LOGGER.error('       map SW_lon = %.16f must be <=', self.SW_lon)
+            LOGGER.error('       sim SW_lon = %.16f', sim.grid_min_lon)
+            LOGGER.error('       map NE_lat = %.16f must be >=', self.NE_lat)
+            LOGGER.error('       sim NE_lat = %.16f', sim.grid_max_lat)
+            LOGGER.error('       map NE_lat = %.16f must be >=', self.NE_lon)
+            LOGGER.error('       sim NE_lat = %.16f', sim.grid_max_lon)
+            LOGGER.error('       --> exiting simulation set-up')
             sys.exit(1)
         elif self.subset == 0:
             self.map = self.map_grid
-            print('initial setup : resulting map dimensions: %s' %
-                  str(np.shape(self.map)))
+            LOGGER.info('initial setup : resulting map dimensions: %s', str(np.shape(self.map)))
         elif self.subset == 1:
-            print('initial setup : subsetting map to specified simulation boundaries')
+            LOGGER.info('initial setup : subsetting map to specified simulation boundaries')
             self.map = self.subset_grid(sim.grid_bounds)
-            print('initial setup : resulting map dimensions: %s' %
-                  str(np.shape(self.map)))
+            LOGGER.info('initial setup : resulting map dimensions: %s', str(np.shape(self.map)))
             self.SW_lat = sim.grid_bounds[0]
             self.SW_lon = sim.grid_bounds[1]
             self.NE_lat = sim.grid_bounds[2]
@@ -150,10 +149,10 @@ def setup_topo_map(sim):
     """Initialize topography map object as indicated."""
     if sim.topography_fname == 'WRF':
         topo_map = 'WRF'
-        print('initial setup : using WRF topography')
+        LOGGER.info('initial setup : using WRF topography')
     else:
         topo_map = Map(sim, sim.topography_fname)
-        print('initial setup : topography Map object initialized')
+        LOGGER.info('initial setup : topography Map object initialized')
     return topo_map  # Map object or string
 
 
@@ -161,10 +160,10 @@ def setup_lc_map(sim):
     """Initialize landcover map object as indicated."""
     if sim.landcover_fname == 'WRF':
         lc_map = 'WRF'
-        print('initial setup : using WRF landcover')
+        LOGGER.info('initial setup : using WRF landcover')
     else:
         lc_map = Map(sim, sim.landcover_fname)
-        print('initial setup : landcover Map object initialized')
+        LOGGER.info('initial setup : landcover Map object initialized')
     return lc_map  # Map object or string
 
 
@@ -172,7 +171,7 @@ def setup_defoliation_map(sim):
     """Initialize defoliation map object if provided."""
     if sim.use_defoliation:
         defol_map = Map(sim, sim.defoliation_fname)
-        print('initial setup : defoliation Map object initialized')
+        LOGGER.info('initial setup : defoliation Map object initialized')
     else:
         defol_map = None
     return defol_map  # Map object or None
@@ -0,0 +1,117 @@
+# pylint: disable=C0103,R0205,R0902,R1711
+"""
+Python script "MemoryDiagnostics_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import json
+import resource
+import sys
+import tracemalloc
+from OutputWriter_class import write_output
+from Sim_logging import LOGGER
+
+
+# allocations by the import machinery and by tracemalloc itself are not reported
+SNAPSHOT_FILTERS = [tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+                    tracemalloc.Filter(False, tracemalloc.__file__)]
+
+
+def resident_set_size():
+    """Current resident set size of this process in bytes (peak RSS where
+       the current value is not available)."""
+    try:
+        with open('/proc/self/statm', 'r') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()  # int
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else 1024 * peak  # int
+
+
+class MemoryDiagnostics(object):
+    """Memory diagnostics mode (sim.memory_diagnostics): traces Python memory
+       allocations and takes a snapshot every sim.memory_snapshot_steps time
+       steps (if > 0), at each WRF grids swap and at the end of simulation,
+       reporting the top allocation sites, the largest growth since the previous
+       snapshot, and traced and resident memory; written at wrap-up as
+       memory_<sim>.txt (allocation sites) and memory_<sim>.json (memory use at
+       each snapshot)."""
+
+    def __init__(self, sim):
+        self.enabled = sim.memory_diagnostics
+        if sim.experiment_number:
+            self.prefix = '%s_simulation_%s_%s_summary/memory_%s_%s' % \
+                (sim.simulation_name, str(sim.experiment_number).zfill(2),
+                 str(sim.simulation_number).zfill(5), str(sim.experiment_number).zfill(2),
+                 str(sim.simulation_number).zfill(5))
+        else:
+            self.prefix = '%s_simulation_%s_summary/memory_%s' % \
+                (sim.simulation_name, str(sim.simulation_number).zfill(5),
+                 str(sim.simulation_number).zfill(5))
+        self.snapshot_steps = sim.memory_snapshot_steps
+        self.n_top = sim.memory_top_sites
+        self.n_steps = 0
+        self.last_snapshot = None
+        self.records = list()
+        self.report = list()
+        if self.enabled:
+            tracemalloc.start(sim.memory_trace_frames)
+        return
+
+    def update(self, clock, wrf_grids_updated=False):
+        """Take a snapshot if due at this time step."""
+        if not self.enabled:
+            return
+        if wrf_grids_updated:
+            self.snapshot(clock, 'WRF grids swap')
+        elif (self.snapshot_steps > 0) and (self.n_steps % self.snapshot_steps == 0):
+            self.snapshot(clock, 'step %d' % self.n_steps)
+        self.n_steps += 1
+        return
+
+    def snapshot(self, clock, reason):
+        """Snapshot traced allocations; report top sites and growth."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        traced, peak = tracemalloc.get_traced_memory()
+        rss = resident_set_size()
+        self.records.append({'time': clock.current_dt_str, 'reason': reason,
+                             'traced_bytes': traced, 'traced_peak_bytes': peak,
+                             'rss_bytes': rss})
+        LOGGER.info('%s : memory snapshot (%s): traced %.1f MB (peak %.1f MB), RSS %.1f MB',
+                    clock.current_dt_str, reason, traced / 1.0e6, peak / 1.0e6, rss / 1.0e6)
+        self.report.append('%s (%s): traced %.1f MB (peak %.1f MB), RSS %.1f MB' %
+                           (clock.current_dt_str, reason, traced / 1.0e6, peak / 1.0e6,
+                            rss / 1.0e6))
+        self.report.append('  top allocation sites:')
+        for stat in snapshot.statistics('lineno')[:self.n_top]:
+            self.report.append('    %s' % str(stat))
+        if self.last_snapshot is not None:
+            self.report.append('  largest growth since previous snapshot:')
+            for stat in snapshot.compare_to(self.last_snapshot, 'lineno')[:self.n_top]:
+                if stat.size_diff > 0:
+                    self.report.append('    %s' % str(stat))
+        self.report.append('')
+        self.last_snapshot = snapshot
+        return
+
+    def close(self, clock):
+        """Take a final snapshot, stop tracing and write the memory reports."""
+        if not self.enabled:
+            return
+        self.snapshot(clock, 'end of time loop')
+        tracemalloc.stop()
+        self.last_snapshot = None
+        write_output('text', '%s.txt' % self.prefix, '\n'.join(self.report),
+                     'simulation wrapup : wrote %s.txt' % self.prefix.split('/')[-1])
+        write_output('text', '%s.json' % self.prefix, json.dumps(self.records, indent=1),
+                     'simulation wrapup : wrote %s.json' % self.prefix.split('/')[-1])
+        return
+
+# end MemoryDiagnostics_class.py
@@ -11,53 +11,70 @@ Copyright (C) 2021 by Matthew Garcia
 
 
 import sys
+import time
 from Simulation_specifications import Simulation
 from Clock import Clock
+from FlightStatistics_class import FlightStatistics
 from SBW_empirical import SBW
-from Model_initialization import command_line_args, setup_fliers
+from Model_initialization import command_line_args, setup_logging, setup_fliers
+from Model_initialization import setup_memory_diagnostics
 from Model_initialization import load_initial_WRF_grids, setup_maps, setup_radar
+from Model_initialization import setup_wake_queue, setup_status_recorder
+from Model_initialization import setup_status_store, setup_plot_service
+from Model_initialization import setup_output_writer, setup_output_schedule
+from Model_initialization import setup_location_store
+from Model_initialization import setup_radar_cube, setup_event_tables
+from Model_initialization import setup_phase_timers, setup_profiler, setup_run_metrics
 from Oviposition_calculations import oviposition
 from Temporal_operations import count_active_fliers, remove_fliers
-from Temporal_operations import end_sim_no_flights
+from Temporal_operations import end_sim_no_flights, end_sim_no_future_flights
 from Temporal_operations import update_flier_states, update_flier_status
 from Temporal_operations import query_flier_environments, interpolate_flier_environments
 from Temporal_operations import update_flier_locations, update_flier_environments
 from Temporal_operations import load_next_WRF_grids, shuffle_WRF_grids
+from Temporal_operations import wake_fliers, schedule_grounded_fliers
+from Temporal_operations import next_event_time, integrate_flier_locations
 from Flier_summary import summarize_locations, report_flier_locations
 from Flier_summary import summarize_motion, summarize_activity
 from Model_wrapup import report_remaining_fliers, report_statistics
 from Model_wrapup import report_trajectories, report_summary_grids, report_survivors
+from Sim_logging import LOGGER, end_log_step
 
 
 def ATM_main():
     """Simulation initialization and loop control."""
-    print()
-    print('initial setup : all imports loaded successfully')
+    LOGGER.info('initial setup : all imports loaded successfully')
     #
     sim = Simulation()
-    print('initial setup : Simulation object initialized')
-    print('initial setup : simulation name is %s' % sim.simulation_name)
+    setup_logging(sim)
+    LOGGER.info('initial setup : Simulation object initialized')
+    LOGGER.info('initial setup : simulation name is %s', sim.simulation_name)
     #
     clock = Clock(sim)
-    print('initial setup : simulation clock initialized')
-    print('initial setup : simulation start datetime is %s' % clock.start_dt_str)
-    print('initial setup : simulation end datetime is %s' % clock.end_dt_str)
-    print('initial setup : simulation time step is %s seconds' % clock.dt_interval)
+    LOGGER.info('initial setup : simulation clock initialized')
+    LOGGER.info('initial setup : simulation start datetime is %s', clock.start_dt_str)
+    LOGGER.info('initial setup : simulation end datetime is %s', clock.end_dt_str)
+    LOGGER.info('initial setup : simulation time step is %s seconds', clock.dt_interval)
     #
     # process any command-line arguments (e.g. changed parameter values)
     command_line_args(sim, sys.argv)
     #
+    # start memory diagnostics as indicated
+    memory = setup_memory_diagnostics(sim)
+    #
     # get SBW empirical data and calculations
     sbw = SBW()
-    print('initial setup : SBW empirical object initialized')
+    LOGGER.info('initial setup : SBW empirical object initialized')
     #
     # simulation use of WRF output
-    print('initial setup : using WRF file path %s' % sim.WRF_input_path)
-    print('initial setup : specified WRF grid %s' % sim.WRF_grid)
-    print('initial setup : specified WRF input interval %d min' % sim.WRF_input_interval)
+    LOGGER.info('initial setup : using WRF file path %s', sim.WRF_input_path)
+    LOGGER.info('initial setup : specified WRF grid %s', sim.WRF_grid)
+    LOGGER.info('initial setup : specified WRF input interval %d min', sim.WRF_input_interval)
     #
     # load initial WRF grids
+    wrf_load_start = time.perf_counter()
     last_wrf_time, last_wrf_grids = load_initial_WRF_grids(sim, clock)
+    initial_wrf_load_s = time.perf_counter() - wrf_load_start
     #
     # initialize map objects as provided
     topography, landcover, defoliation = setup_maps(sim)
@@ -65,18 +82,36 @@ def ATM_main():
     # initialize radar object as provided
     radar = setup_radar(sim)
     #
+    # initialize run-level output writer
+    output_writer = setup_output_writer(sim)
+    #
+    # initialize flight status recorder
+    recorder = setup_status_recorder(sim)
+    status_store = setup_status_store(sim, clock, recorder)
+    plot_service = setup_plot_service(sim)
+    location_store = setup_location_store(sim, clock)
+    radar_cube = setup_radar_cube(sim, clock, radar)
+    output_schedule = setup_output_schedule(sim, clock)
+    #
     # initialize and define collection of fliers
-    all_fliers, flier_locations = setup_fliers(sim, clock, sbw, last_wrf_grids,
+    all_fliers, flier_locations = setup_fliers(sim, clock, sbw, recorder, last_wrf_grids,
                                                topography, landcover, defoliation)
     #
+    # initialize wake queue for grounded fliers as indicated
+    wake_queue = setup_wake_queue(sim)
+    #
     # set up various data structures
-    all_fliers_flight_status = dict()
+    flight_stats = FlightStatistics()
     trajectories = dict()
-    liftoff_locations = dict()
-    landing_locations = dict()
-    egg_deposition = dict()
+    liftoff_locations, landing_locations, egg_deposition = setup_event_tables(sim)
     survivors = dict()
     #
+    # initialize time loop phase timers and counters
+    timers = setup_phase_timers(sim, output_writer)
+    profiler = setup_profiler(sim, clock)
+    metrics = setup_run_metrics(sim, clock)
+    metrics.add_wrf_load(initial_wrf_load_s)
+    #
     # get flier initial environment variables
     flier_environments_last = \
         query_flier_environments(sim, clock, last_wrf_time, last_wrf_grids,
@@ -85,11 +120,14 @@ def ATM_main():
     update_flier_status(clock, all_fliers)
     #
     # write out flier location and motion summary
+    output_schedule.update(clock)
     flier_locations = summarize_motion(all_fliers, flier_locations)
-    report_flier_locations(sim, clock, radar, flier_locations)
+    report_flier_locations(sim, clock, radar, flier_locations, location_store,
+                           radar_cube, output_schedule)
     #
     # pre-load next WRF grids
-    next_wrf_time, next_wrf_grids = load_next_WRF_grids(sim, clock)
+    with metrics.wrf_load():
+        next_wrf_time, next_wrf_grids = load_next_WRF_grids(sim, clock)
     flier_environments_next = \
         query_flier_environments(sim, clock, next_wrf_time, next_wrf_grids,
                                  flier_locations, topography, landcover)
@@ -98,94 +136,166 @@ def ATM_main():
     oviposition(sim, sbw, all_fliers)
     #
     # simulation time steps
-    print('%s : starting model time steps' % clock.start_dt_str)
+    LOGGER.info('%s : starting model time steps', clock.start_dt_str)
     clock.advance_clock()
-    print()
     #
     # *** temporal loop begins here ***
     #
-    while clock.current_dt <= clock.end_dt:  # datetime objects in UTC
+    while clock.current_s <= clock.end_s:  # int seconds since simulation start
+        #
+        # start/stop profiling as indicated
+        profiler.update(clock)
         #
         # if 5h elapsed and no active fliers left, break simulation
         if end_sim_no_flights(sim, clock, all_fliers):
+            timers.end_step(clock)
             break
         #
         # shuffle and update WRF grids if needed
         wrf_grids_updated = False
-        if clock.current_dt == next_wrf_time:  # datetime objects in UTC
-            last_wrf_time, last_wrf_grids, next_wrf_time, next_wrf_grids = \
-                shuffle_WRF_grids(sim, clock, next_wrf_time, next_wrf_grids)
+        if clock.current_s == clock.seconds(next_wrf_time):  # int seconds
+            with timers.phase('wrf_shuffle'), metrics.wrf_load():
+                last_wrf_time, last_wrf_grids, next_wrf_time, next_wrf_grids = \
+                    shuffle_WRF_grids(sim, clock, next_wrf_time, next_wrf_grids)
             wrf_grids_updated = True
         #
+        # wake grounded fliers that are due for re-evaluation
+        if wake_queue is not None:
+            with timers.phase('wake_fliers'):
+                wake_fliers(clock, wake_queue)
+        #
         # update and summarize all active flier locations
-        n_moving_fliers = update_flier_locations(clock, all_fliers)
-        flier_locations = summarize_locations(clock, all_fliers)
+        with timers.phase('update_locations'):
+            if sim.flight_integrator == 'euler':
+                n_moving_fliers = update_flier_locations(clock, all_fliers, wake_queue)
+            else:
+                wrf_brackets = (last_wrf_time, last_wrf_grids, next_wrf_time, next_wrf_grids)
+                n_moving_fliers = integrate_flier_locations(sim, clock, all_fliers,
+                                                            wrf_brackets, wake_queue)
+        timers.count('fliers_moving', n_moving_fliers)
+        with timers.phase('summarize_locations'):
+            flier_locations = summarize_locations(clock, all_fliers)
         #
         # update flier environments
-        if clock.current_dt == next_wrf_time:  # datetime objects in UTC
+        if clock.current_s == clock.seconds(next_wrf_time):  # int seconds
             if n_moving_fliers or wrf_grids_updated:
-                flier_environments_next = \
-                    query_flier_environments(sim, clock, next_wrf_time, next_wrf_grids,
-                                             flier_locations, topography, landcover)
-            update_flier_environments(clock, all_fliers, flier_environments_next)
+                with timers.phase('query_environments'):
+                    flier_environments_next = \
+                        query_flier_environments(sim, clock, next_wrf_time, next_wrf_grids,
+                                                 flier_locations, topography, landcover)
+                timers.count('fliers_queried', len(flier_locations))
+            with timers.phase('update_environments'):
+                update_flier_environments(clock, all_fliers, flier_environments_next,
+                                          wake_queue)
         else:
             if n_moving_fliers or wrf_grids_updated:
-                flier_environments_last = \
-                    query_flier_environments(sim, clock, last_wrf_time, last_wrf_grids,
-                                             flier_locations, topography, landcover)
-                flier_environments_next = \
-                    query_flier_environments(sim, clock, next_wrf_time, next_wrf_grids,
-                                             flier_locations, topography, landcover)
-            interpolate_flier_environments(clock, all_fliers, flier_environments_last,
-                                           flier_environments_next, last_wrf_time,
-                                           next_wrf_time)
+                with timers.phase('query_environments'):
+                    flier_environments_last = \
+                        query_flier_environments(sim, clock, last_wrf_time, last_wrf_grids,
+                                                 flier_locations, topography, landcover)
+                    flier_environments_next = \
+                        query_flier_environments(sim, clock, next_wrf_time, next_wrf_grids,
+                                                 flier_locations, topography, landcover)
+                timers.count('fliers_queried', 2 * len(flier_locations))
+            with timers.phase('interpolate_environments'):
+                interpolate_flier_environments(clock, all_fliers, flier_environments_last,
+                                               flier_environments_next, last_wrf_time,
+                                               next_wrf_time, wake_queue)
         #
-        # write out flier location and motion summary
-        flier_locations = summarize_motion(all_fliers, flier_locations)
-        report_flier_locations(sim, clock, radar, flier_locations)
+        # write out flier location and motion summary, if due
+        output_schedule.update(clock)
+        if output_schedule.any_due():
+            with timers.phase('report_locations'):
+                flier_locations = summarize_motion(all_fliers, flier_locations)
+                report_flier_locations(sim, clock, radar, flier_locations, location_store,
+                                       radar_cube, output_schedule)
+            if output_schedule.due('locations'):
+                timers.count('location_rows', len(flier_locations))
         #
         # loop through all_fliers, update state as needed and append to status record
-        liftoff_locations, landing_locations, survivors, to_remove = \
-            update_flier_states(sim, clock, sbw, defoliation, radar, all_fliers,
-                                liftoff_locations, landing_locations, survivors)
+        with timers.phase('update_states'):
+            liftoff_locations, landing_locations, survivors, to_remove = \
+                update_flier_states(sim, clock, sbw, defoliation, radar, all_fliers,
+                                    liftoff_locations, landing_locations, survivors,
+                                    wake_queue)
         #
         # diagnostic summary of flier activity
-        summarize_activity(clock, all_fliers)
+        with timers.phase('summarize_activity'):
+            summarize_activity(clock, all_fliers)
         #
         # remove lost/dead fliers
         if to_remove:
-            all_fliers, all_fliers_flight_status, trajectories, egg_deposition = \
-                remove_fliers(sim, clock, all_fliers, all_fliers_flight_status,
-                              trajectories, egg_deposition, to_remove)
+            with timers.phase('remove_fliers'):
+                all_fliers, flight_stats, trajectories, egg_deposition = \
+                    remove_fliers(sim, clock, all_fliers, flight_stats,
+                                  trajectories, egg_deposition, to_remove, status_store,
+                                  plot_service)
+            timers.count('fliers_removed', len(to_remove))
         #
-        # advance simulation clock
-        if clock.current_dt < clock.end_dt:  # datetime objects in UTC
-            clock.advance_clock()
+        # end simulation if no remaining flier can change state, as indicated
+        if end_sim_no_future_flights(sim, clock, all_fliers):
+            timers.end_step(clock)
+            break
+        #
+        # put grounded fliers to sleep until their next possible state change
+        if wake_queue is not None:
+            with timers.phase('schedule_grounded'):
+                schedule_grounded_fliers(sim, clock, sbw, all_fliers, wake_queue,
+                                         flier_environments_last, flier_environments_next,
+                                         last_wrf_time, next_wrf_time)
+        #
+        # memory snapshot as indicated, close step timing, report suppressed per-flier
+        #   messages, advance simulation clock
+        memory.update(clock, wrf_grids_updated)
+        timers.end_step(clock)
+        metrics.update(clock, all_fliers, output_writer)
+        end_log_step(clock)
+        if clock.current_s < clock.end_s:  # int seconds since simulation start
+            if sim.adaptive_dt and (wake_queue is not None):
+                clock.advance_clock_to(next_event_time(sim, clock, all_fliers,
+                                                       wake_queue, next_wrf_time,
+                                                       output_schedule))
+            else:
+                clock.advance_clock()
         else:
-            print('%s : end of simulation, wrapping up' % clock.current_dt_str)
+            LOGGER.info('%s : end of simulation, wrapping up', clock.current_dt_str)
             break
-        print()
     #
     # *** temporal loop ends here ***
     #
+    profiler.close(clock)
+    memory.close(clock)
+    metrics.close(clock, all_fliers, output_writer)
+    #
     # end-of-simulation report on remaining activity
     n_active_fliers = count_active_fliers(sim, clock, all_fliers, output=False)
-    print('%s : simulation ended with %d active fliers (of %d specified)' %
-          (clock.current_dt_str, n_active_fliers, sim.n_fliers))
-    print()
-    if n_active_fliers:
-        trajectories, egg_deposition = \
-            report_remaining_fliers(sim, clock, all_fliers, trajectories, egg_deposition)
-    #
-    # end-of-simulation flight statistics, trajectories, survivors, location reports, grids
-    report_statistics(sim, clock, all_fliers_flight_status, liftoff_locations)
-    if sim.sequential:
-        report_survivors(sim, survivors)
-    report_trajectories(sim, next_wrf_grids, trajectories)
-    report_summary_grids(sim, liftoff_locations, landing_locations, egg_deposition)
-    #
-    print()
-    print('simulation %s completed' % sim.simulation_name)
+    LOGGER.info('%s : simulation ended with %d active fliers (of %d specified)',
+                clock.current_dt_str, n_active_fliers, sim.n_fliers)
+    with timers.phase('wrapup'):
+        if n_active_fliers:
+            trajectories, egg_deposition = \
+                report_remaining_fliers(sim, clock, all_fliers, trajectories, egg_deposition,
+                                        status_store, plot_service)
+        end_log_step(clock)
+        if status_store is not None:
+            status_store.close()
+        plot_service.close()
+        if location_store is not None:
+            location_store.close()
+        if radar_cube is not None:
+            radar_cube.close()
+        #
+        # end-of-simulation flight statistics, trajectories, survivors, location reports, grids
+        report_statistics(sim, clock, flight_stats, liftoff_locations)
+        if sim.sequential:
+            report_survivors(sim, survivors)
+        report_trajectories(sim, next_wrf_grids, trajectories)
+        report_summary_grids(sim, clock, liftoff_locations, landing_locations, egg_deposition)
+        output_writer.flush()
+    timers.report()
+    output_writer.close()
+    #
+    LOGGER.info('simulation %s completed', sim.simulation_name)
     return
 
 
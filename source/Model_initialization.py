@@ -13,7 +13,21 @@ Copyright (C) 2021 by Matthew Garcia
 import numpy as np
 from WRFgrids_class import WRFgrids
 from Map_class import setup_topo_map, setup_lc_map, setup_defoliation_map
-from Radar_class import Radar
+from RadarNetwork_class import RadarNetwork
+from WakeQueue_class import WakeQueue
+from StatusRecorder_class import StatusRecorder
+from StatusStore_class import StatusStore
+from PlotService_class import PlotService
+from OutputWriter_class import OutputWriter, set_output_writer
+from OutputSchedule_class import OutputSchedule
+from PhaseTimers_class import PhaseTimers
+from Profiler_class import SimProfiler, profile_args
+from MemoryDiagnostics_class import MemoryDiagnostics
+from RunMetrics_class import RunMetrics
+from LocationStore_class import LocationStore
+from RadarCube_class import RadarCube
+from EventTable_class import EventTable, LIFTOFF_COLUMNS, LANDING_COLUMNS, EGGS_COLUMNS
+from EventTable_class import FLIER_GRIDS, EGGS_GRIDS
 from Flier_class import Flier
 from Flier_setup import read_survivor_locations_attributes
 from Flier_setup import read_flier_locations_attributes
@@ -21,74 +35,97 @@ from Flier_setup import generate_flier_locations, generate_flier_attributes
 from Circadian_calculations import calc_circadian_from_WRF_T, assign_circadian
 from Flier_summary import summarize_locations
 from Solar_calculations import update_suntimes
+from Sim_logging import LOGGER, configure_logging
 
 
 def command_line_args(sim, args):
-    """Process command line arguments.
+    """Process command line arguments (with optional --profile=MODE[,START,END]).
        TO DO: convert to argparse usage."""
+    args = profile_args(sim, args)
     sim.sequential = False
     sim.sequential_prev_fname = None
     sim.sequential_use_prev_survivors = False
     if len(args) > 2:
         if args[2] == 'seq':
-            print('initial setup : simulation number %s in experiment collection' %
-                  args[1].zfill(5))
+            LOGGER.info('initial setup : simulation number %s in experiment collection',
+                        args[1].zfill(5))
             sim.simulation_number = int(args[1])
             sim.sequential = True
-            print('initial setup : simulations in sequential date mode')
-            print('initial setup : list of simulation surviving moths will be generated')
+            LOGGER.info('initial setup : simulations in sequential date mode')
+            LOGGER.info('initial setup : list of simulation surviving moths will be generated')
             if len(args) == 4:
                 sim.sequential_use_prev_survivors = True
                 sim.sequential_prev_fname = '%s_survivor_attributes.csv' % args[3]
-                print('initial setup : using previous survivor moths from %s' %
-                      sim.sequential_prev_fname)
+                LOGGER.info('initial setup : using previous survivor moths from %s',
+                            sim.sequential_prev_fname)
         else:
-            print('initial setup : experiment number %s' % args[1])
+            LOGGER.info('initial setup : experiment number %s', args[1])
             sim.experiment_number = int(args[1])
             var_name = args[2]
             var_value = float(args[3])
             if var_name == 'max_precip':
                 sim.max_precip = var_value
-                print('initial setup : using %s = %.2f' % (var_name, var_value))
+                LOGGER.info('initial setup : using %s = %.2f', var_name, var_value)
             if var_name == 'min_windspeed':
                 sim.min_windspeed = var_value
-                print('initial setup : using %s = %.2f' % (var_name, var_value))
+                LOGGER.info('initial setup : using %s = %.2f', var_name, var_value)
             if sim.flight_speed == 'const':
                 if var_name == 'w_horizontal':
                     sim.w_horizontal = var_value
-                    print('initial setup : using %s = %.2f' % (var_name, var_value))
+                    LOGGER.info('initial setup : using %s = %.2f', var_name, var_value)
                 if var_name == 'w_alpha':
                     sim.w_alpha = var_value
-                    print('initial setup : using %s = %.2f' % (var_name, var_value))
+                    LOGGER.info('initial setup : using %s = %.2f', var_name, var_value)
                 if var_name == 'wingbeat_coeff':
-                    print('initial setup : ignoring %s value' % var_name)
-                    print('initial setup : (change sim.flight_speed if you want to use it)')
+                    LOGGER.info('initial setup : ignoring %s value', var_name)
+                    LOGGER.info('initial setup : (change sim.flight_speed if you want to use it)')
             if sim.flight_speed == 'param':
                 if var_name in ['w_horizontal', 'w_alpha']:
-                    print('initial setup : ignoring %s value' % var_name)
-                    print('initial setup : (change sim.flight_speed if you want to use it)')
+                    LOGGER.info('initial setup : ignoring %s value', var_name)
+                    LOGGER.info('initial setup : (change sim.flight_speed if you want to use it)')
                 if var_name == 'wingbeat_coeff':
                     sim.wingbeat_coeff = var_value
-                    print('initial setup : using %s = %.2f' % (var_name, var_value))
+                    LOGGER.info('initial setup : using %s = %.2f', var_name, var_value)
             if var_name == 'delta_nu':
                 sim.delta_nu = var_value
-                print('initial setup : using %s = %.2f' % (var_name, var_value))
-            print('initial setup : simulation number %s in experiment collection' %
-                  args[4].zfill(5))
+                LOGGER.info('initial setup : using %s = %.2f', var_name, var_value)
+            LOGGER.info('initial setup : simulation number %s in experiment collection',
+                        args[4].zfill(5))
             sim.simulation_number = int(args[4])
     else:
-        print('initial setup : using default values for all parameters')
-        print('initial setup : simulation number %s in experiment collection' %
-              args[1].zfill(5))
+        LOGGER.info('initial setup : using default values for all parameters')
+        LOGGER.info('initial setup : simulation number %s in experiment collection',
+                    args[1].zfill(5))
         sim.simulation_number = int(args[1])
     return
 
 
+def setup_logging(sim):
+    """Configure simulation log level (or quiet mode), destination and
+       per-step summary format."""
+    level = 'WARNING' if sim.log_quiet else sim.log_level
+    configure_logging(level, sim.log_file, sim.log_step_format, sim.log_flier_messages)
+    LOGGER.info('initial setup : logging at %s level to %s', level,
+                sim.log_file if sim.log_file else 'stdout')
+    return
+
+
+def setup_memory_diagnostics(sim):
+    """Initialize memory diagnostics mode, tracing allocations from here on."""
+    memory = MemoryDiagnostics(sim)
+    if sim.memory_diagnostics and (sim.memory_snapshot_steps > 0):
+        LOGGER.info('initial setup : memory diagnostics on (snapshots every %d steps)',
+                    sim.memory_snapshot_steps)
+    elif sim.memory_diagnostics:
+        LOGGER.info('initial setup : memory diagnostics on (snapshots at WRF swaps and end)')
+    return memory  # MemoryDiagnostics object
+
+
 def load_initial_WRF_grids(sim, clock):
     """Load initial WRF grids."""
     last_time = clock.start_dt
     last_grids = WRFgrids(last_time, sim.WRF_input_path, sim.WRF_grid, 'initial setup')
-    print('initial setup : WRF %s grids object initialized' % str(last_time.isoformat()))
+    LOGGER.info('initial setup : WRF %s grids object initialized', str(last_time.isoformat()))
     return last_time, last_grids  # datetime + WRFgrids objects
 
 
@@ -101,32 +138,149 @@ def setup_maps(sim):
 
 
 def setup_radar(sim):
-    """Initialize radar object as indicated.
-       TO-DO: expand to allow multiple radars."""
+    """Initialize radar network (primary and any additional radars) as indicated."""
     if sim.use_radar:
-        radar = Radar(sim)
-        print('initial setup : radar location %s initialized' % sim.radar_name)
+        radar = RadarNetwork(sim)
+        LOGGER.info('initial setup : radar locations %s initialized', ', '.join(radar.radar_ids))
     else:
         radar = None
-    return radar  # Map object
+    return radar  # RadarNetwork object or None
+
+
+def setup_wake_queue(sim):
+    """Initialize wake queue for grounded fliers as indicated."""
+    if sim.use_wake_queue:
+        wake_queue = WakeQueue()
+        LOGGER.info('initial setup : grounded flier wake queue initialized')
+    else:
+        wake_queue = None
+    return wake_queue  # WakeQueue object or None
+
+
+def setup_status_recorder(sim):
+    """Initialize population-wide flight status recorder."""
+    recorder = StatusRecorder(sim)
+    LOGGER.info('initial setup : flight status recorder initialized')
+    return recorder  # StatusRecorder object
+
+
+def setup_status_store(sim, clock, recorder):
+    """Initialize run-level flier status store as indicated."""
+    if sim.status_output == 'store':
+        status_store = StatusStore(sim, clock, recorder)
+        LOGGER.info('initial setup : flier status store %s initialized',
+                    status_store.prefix.split('/')[-1])
+    else:
+        status_store = None
+    return status_store  # StatusStore object or None
+
+
+def setup_location_store(sim, clock):
+    """Initialize run-level flier location store as indicated."""
+    if sim.location_output == 'store':
+        location_store = LocationStore(sim, clock)
+        LOGGER.info('initial setup : flier location store %s initialized',
+                    location_store.prefix.split('/')[-1])
+    else:
+        location_store = None
+    return location_store  # LocationStore object or None
+
+
+def setup_radar_cube(sim, clock, radar):
+    """Initialize run-level sparse radar grid cube as indicated."""
+    if sim.use_radar and sim.npy_grids and (sim.radar_grid_output == 'cube'):
+        radar_cube = RadarCube(sim, clock, radar)
+        LOGGER.info('initial setup : radar grid cubes initialized for %s',
+                    ', '.join(radar.radar_ids))
+    else:
+        radar_cube = None
+    return radar_cube  # RadarCube object or None
+
+
+def setup_event_tables(sim):
+    """Initialize liftoff, landing and egg deposition event tables."""
+    liftoff_events = EventTable(sim, LIFTOFF_COLUMNS, FLIER_GRIDS)
+    landing_events = EventTable(sim, LANDING_COLUMNS, FLIER_GRIDS)
+    egg_events = EventTable(sim, EGGS_COLUMNS, EGGS_GRIDS)
+    LOGGER.info('initial setup : liftoff, landing and egg deposition event tables initialized')
+    return liftoff_events, landing_events, egg_events  # 3 * EventTable object
+
+
+def setup_plot_service(sim):
+    """Initialize single-flight trajectory plot service."""
+    plot_service = PlotService(sim)
+    LOGGER.info('initial setup : trajectory plot service initialized (%s, %.0f%% of flights)',
+                sim.flight_plots, 100.0 * sim.flight_plot_sample)
+    return plot_service  # PlotService object
+
+
+def setup_output_writer(sim):
+    """Initialize run-level asynchronous output writer."""
+    output_writer = OutputWriter(sim)
+    set_output_writer(output_writer)
+    LOGGER.info('initial setup : output writer initialized (%s sink, %d worker(s), queue size %d)',
+                sim.output_sink, sim.output_workers, sim.output_queue_size)
+    return output_writer  # OutputWriter object
+
+
+def setup_output_schedule(sim, clock):
+    """Initialize per-product output cadences for per-time-step outputs."""
+    output_schedule = OutputSchedule(sim, clock)
+    for product, cadence in output_schedule.step_cadence.items():
+        LOGGER.info('initial setup : %s output every %d time step(s)', product, cadence)
+    for product, times_s in output_schedule.times_s.items():
+        LOGGER.info('initial setup : %s output at %d scheduled times', product, len(times_s))
+    return output_schedule  # OutputSchedule object
+
+
+def setup_phase_timers(sim, output_writer):
+    """Initialize time loop phase timers and counters (bytes written by the
+       output writer)."""
+    timers = PhaseTimers(sim, [output_writer])
+    if sim.phase_timing:
+        LOGGER.info('initial setup : phase timers initialized (%s)',
+                    'per step and per run' if sim.timing_per_step else 'per run')
+    return timers  # PhaseTimers object
+
+
+def setup_profiler(sim, clock):
+    """Initialize opt-in time loop profiler."""
+    profiler = SimProfiler(sim, clock)
+    if sim.profile_mode is not None:
+        LOGGER.info('initial setup : %s profiler set for %s to %s', sim.profile_mode,
+                    clock.isoformat(profiler.start_s),
+                    clock.isoformat(min(profiler.end_s, clock.end_s)))
+    return profiler  # SimProfiler object
+
+
+def setup_run_metrics(sim, clock):
+    """Initialize live run metrics export as indicated."""
+    metrics = RunMetrics(sim, clock)
+    if sim.metrics_export == 'file':
+        LOGGER.info('initial setup : run metrics exported to %s', metrics.fname.split('/')[-1])
+    elif sim.metrics_export == 'http':
+        LOGGER.info('initial setup : run metrics served at http://127.0.0.1:%d/metrics',
+                    sim.metrics_port)
+    return metrics  # RunMetrics object
 
 
-def setup_fliers(sim, clock, sbw, last_wrf_grids, topography, landcover, defoliation):
+def setup_fliers(sim, clock, sbw, recorder, last_wrf_grids, topography, landcover,
+                 defoliation):
     """Initialize and define collection of fliers."""
     if sim.use_defoliation:
         # assign flier locations and attributes using defoliation map and empirical eqns
-        print('initial setup : assigning defoliation-based flier locations and attributes')
+        LOGGER.info('initial setup : assigning defoliation-based flier locations and attributes')
         flier_locations = generate_flier_locations(last_wrf_grids, landcover, defoliation)
         flier_attributes = generate_flier_attributes(sbw, flier_locations)
     else:
         if sim.sequential_use_prev_survivors:
             # read survivor locations and attributes from specified previous output CSV file
-            print('initial setup : obtaining surviving flier locations and attributes')
+            LOGGER.info('initial setup : obtaining surviving flier locations and attributes')
             survivors_df = read_survivor_locations_attributes(sim, clock)
         else:
             survivors_df = None
         # read flier locations and attributes from BioSIM output CSV file
-        print('initial setup : obtaining BioSIM output flier locations and attributes')
+        LOGGER.info('initial setup : obtaining BioSIM output flier locations and attributes')
         flier_locations, flier_attributes = \
             read_flier_locations_attributes(sim, clock, survivors_df)
     #
@@ -139,7 +293,7 @@ def setup_fliers(sim, clock, sbw, last_wrf_grids, topography, landcover, defolia
     sim.n_fliers = len(selected_fliers)
     #
     # initialize individual Flier objects
-    print('initial setup : initializing %d Fliers' % sim.n_fliers)
+    LOGGER.info('initial setup : initializing %d Fliers', sim.n_fliers)
     fliers = dict()
     for f, f_available_idx in enumerate(selected_fliers):
         flier_idx = sim.simulation_number * sim.n_fliers * 10 + f
@@ -147,21 +301,22 @@ def setup_fliers(sim, clock, sbw, last_wrf_grids, topography, landcover, defolia
                                   str(sim.start_day).zfill(2), str(flier_idx).zfill(9))
         fliers[flier_id] = Flier(sim, sbw, flier_id, flier_locations[f_available_idx],
                                  flier_attributes[f_available_idx])
+        recorder.register(fliers[flier_id])
         update_suntimes(clock, fliers[flier_id])
     n_female = sum(flier.sex for flier in fliers.values())
     n_male = sim.n_fliers - n_female
-    print('initial setup : %d Flier objects initialized (%d F, %d M)' %
-          (sim.n_fliers, n_female, n_male))
+    LOGGER.info('initial setup : %d Flier objects initialized (%d F, %d M)', sim.n_fliers, n_female,
+                n_male)
     #
     # summarize flier locations
     flier_locations = summarize_locations(clock, fliers)
     #
     # calculate/assign flier circadian attributes
     if sim.calculate_circadian_from_WRF:
-        calc_circadian_from_WRF_T(sim, sbw, fliers, flier_locations,
+        calc_circadian_from_WRF_T(sim, clock, sbw, fliers, flier_locations,
                                   topography, landcover)
     else:
-        assign_circadian(sim, sbw, fliers)
+        assign_circadian(sim, clock, sbw, fliers)
     return fliers, flier_locations  # 2 * dict
 
 # end Model_initialization.py
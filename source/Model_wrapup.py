@@ -14,24 +14,28 @@ from Flier_summary import plot_trajectories, report_flier_statistics
 from Flier_summary import report_survivor_attributes
 from Flier_grids import grid_liftoff_locations, grid_landing_locations
 from Flier_grids import grid_egg_deposition
+from Sim_logging import LOGGER
 
 
-def report_remaining_fliers(sim, clock, fliers, trajectories, egg_deposition):
+def report_remaining_fliers(sim, clock, fliers, trajectories, egg_deposition,
+                            status_store=None, plot_service=None):
     """Report status of any remaining fliers at end of simulation."""
-    print('simulation wrapup : reporting status of remaining active fliers')
+    LOGGER.info('simulation wrapup : reporting status of remaining active fliers')
     for flier in fliers.values():
         if flier.active:
-            trajectories = flier.report_status(sim, clock, trajectories)
+            trajectories = flier.report_status(sim, clock, trajectories, status_store,
+                                               plot_service)
         if flier.sex and flier.eggs_laid:
             for eggs_id, egg_location in flier.eggs_laid.items():
                 egg_deposition[eggs_id] = egg_location
+    egg_deposition.commit()
     return trajectories, egg_deposition
 
 
-def report_statistics(sim, clock, flight_status, liftoff_locs):
+def report_statistics(sim, clock, flight_stats, liftoff_locs):
     """Report flight statistics for all flights."""
-    print('simulation wrapup : processing flight statistics')
-    report_flier_statistics(sim, clock, flight_status, liftoff_locs)
+    LOGGER.info('simulation wrapup : processing flight statistics')
+    report_flier_statistics(sim, clock, flight_stats, liftoff_locs)
     return
 
 
@@ -42,10 +46,10 @@ def report_trajectories(sim, next_grids, trajectories):
     return
 
 
-def report_summary_grids(sim, liftoff_locs, landing_locs, egg_dep):
+def report_summary_grids(sim, clock, liftoff_locs, landing_locs, egg_dep):
     """Plot summary grids for all flights."""
     if liftoff_locs:
-        grid_liftoff_locations(sim, liftoff_locs)
+        grid_liftoff_locations(sim, clock, liftoff_locs)
     if landing_locs:
         grid_landing_locations(sim, landing_locs)
     if egg_dep:
@@ -55,7 +59,7 @@ def report_summary_grids(sim, liftoff_locs, landing_locs, egg_dep):
 
 def report_survivors(sim, survivors):
     """Report attributes for all surviving fliers."""
-    print('simulation wrapup : processing fliers to record survivors')
+    LOGGER.info('simulation wrapup : processing fliers to record survivors')
     report_survivor_attributes(sim, survivors)
     return
 
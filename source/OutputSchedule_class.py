@@ -0,0 +1,117 @@
+# pylint: disable=C0103,R0205,R0902,R1711
+"""
+Python script "OutputSchedule_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+from datetime import datetime, time, timedelta, timezone
+import numpy as np
+
+
+# per-time-step output products and their sim.output_cadence keys
+OUTPUT_PRODUCTS = ['locations', 'radar_grids']
+
+
+def parse_schedule_time(timestr):
+    """Parse one scheduled output time: ISO date/time (UTC unless given) or
+       daily 'HH:MM[:SS]' UTC time."""
+    if 'T' in timestr:
+        date_time = datetime.fromisoformat(timestr)
+        if date_time.tzinfo is None:
+            date_time = date_time.replace(tzinfo=timezone.utc)
+        return date_time  # datetime object
+    return time.fromisoformat(timestr)  # time object
+
+
+def read_scan_schedule(fname):
+    """Read a radar scan schedule file: one scan time per line (as for
+       parse_schedule_time), with '#' comments and blank lines ignored."""
+    timestrs = list()
+    with open(fname, 'r') as schedfile:
+        for line in schedfile:
+            line = line.split('#')[0].strip()
+            if line:
+                timestrs.append(line)
+    return timestrs  # list of str
+
+
+def schedule_seconds(clock, timestrs):
+    """Scheduled output times within the simulation, as integer seconds since
+       simulation start; daily times repeat on each simulation day."""
+    seconds = set()
+    for timestr in timestrs:
+        sched_time = parse_schedule_time(timestr)
+        if isinstance(sched_time, datetime):
+            seconds.add(clock.seconds(sched_time))
+            continue
+        day = clock.start_dt.date()
+        while day <= clock.end_dt.date():
+            seconds.add(clock.seconds(datetime.combine(day, sched_time, tzinfo=timezone.utc)))
+            day += timedelta(days=1)
+    seconds = np.array(sorted(seconds), dtype=np.int64)
+    return seconds[(seconds >= 0) & (seconds <= clock.end_s)]  # numpy 1D array
+
+
+class OutputSchedule(object):
+    """Per-product output cadence (sim.output_cadence) for the per-time-step
+       outputs: an integer N writes the product every N-th simulated time step;
+       a list of times, or the name of a radar scan schedule file, writes it at
+       the first time step at or after each scheduled time. With adaptive
+       stepping, the clock stops at every scheduled time."""
+
+    def __init__(self, sim, clock):
+        self.step_cadence = dict()
+        self.times_s = dict()
+        for product in OUTPUT_PRODUCTS:
+            cadence = sim.output_cadence.get(product, 1)
+            if isinstance(cadence, int):
+                self.step_cadence[product] = cadence
+            elif isinstance(cadence, str):
+                self.times_s[product] = schedule_seconds(clock, read_scan_schedule(cadence))
+            else:
+                self.times_s[product] = schedule_seconds(clock, cadence)
+        if self.times_s:
+            self.all_times_s = np.unique(np.concatenate(list(self.times_s.values())))
+        else:
+            self.all_times_s = np.zeros(0, dtype=np.int64)
+        self.n_steps = 0
+        self.last_s = -1
+        self.due_products = set()
+        return
+
+    def update(self, clock):
+        """Determine the products due at the current time step (once per step)."""
+        self.due_products = set()
+        for product, cadence in self.step_cadence.items():
+            if cadence > 0 and self.n_steps % cadence == 0:
+                self.due_products.add(product)
+        for product, times_s in self.times_s.items():
+            idx = np.searchsorted(times_s, self.last_s, side='right')
+            if idx < len(times_s) and times_s[idx] <= clock.current_s:
+                self.due_products.add(product)
+        self.n_steps += 1
+        self.last_s = clock.current_s
+        return
+
+    def due(self, product):
+        """Whether the product is to be written at the current time step."""
+        return product in self.due_products
+
+    def any_due(self):
+        """Whether any product is to be written at the current time step."""
+        return bool(self.due_products)
+
+    def next_output_s(self, current_s):
+        """Next scheduled output time after the current time, if any."""
+        idx = np.searchsorted(self.all_times_s, current_s, side='right')
+        if idx < len(self.all_times_s):
+            return int(self.all_times_s[idx])  # int seconds since simulation start
+        return None
+
+# end OutputSchedule_class.py
@@ -0,0 +1,268 @@
+# pylint: disable=C0103,R0205,R0902,R0913,R1711,W0603,W0703
+"""
+Python script "OutputWriter_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import io
+import logging
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import zipfile
+import zlib
+import numpy as np
+from Sim_logging import LOGGER
+
+
+class FileSink(object):
+    """Write each output to its own file."""
+
+    def __init__(self):
+        self.appended = set()  # files appended to so far
+        return
+
+    def write(self, kind, fname, payload):
+        """Write one output: 'csv' (DataFrame), 'npy' (array), 'npz' (dict of
+           arrays, compressed), 'text' (str), 'binary' (bytes, e.g. a rendered
+           figure) or 'append' (bytes added to the end of a file, which starts
+           empty in each run); number of bytes written."""
+        if kind == 'csv':
+            payload.to_csv(fname)
+        elif kind == 'npy':
+            np.save(fname, payload)
+        elif kind == 'npz':
+            np.savez_compressed(fname, **payload)
+        elif kind == 'binary':
+            with open(fname, 'wb') as outfile:
+                outfile.write(payload)
+        elif kind == 'append':
+            mode = 'ab' if fname in self.appended else 'wb'
+            self.appended.add(fname)
+            with open(fname, mode) as outfile:
+                outfile.write(payload)
+            return len(payload)  # int
+        else:
+            with open(fname, 'w') as outfile:
+                outfile.write(payload)
+        return os.path.getsize(fname)  # int
+
+    def close(self):
+        """Nothing to close."""
+        return
+
+
+class ArchiveSink(FileSink):
+    """Write all outputs as members of one run-level zip archive, named by
+       their usual output paths. Appended outputs are collected in temporary
+       files and added to the archive when it is finalized."""
+
+    def __init__(self, sim):
+        FileSink.__init__(self)
+        if sim.experiment_number:
+            self.fname = '%s_simulation_%s_%s_outputs.zip' % \
+                (sim.simulation_name, str(sim.experiment_number).zfill(2),
+                 str(sim.simulation_number).zfill(5))
+        else:
+            self.fname = '%s_simulation_%s_outputs.zip' % \
+                (sim.simulation_name, str(sim.simulation_number).zfill(5))
+        self.archive = zipfile.ZipFile(self.fname, 'w', compression=zipfile.ZIP_DEFLATED)
+        self.spools = dict()
+        self.lock = threading.Lock()
+        return
+
+    def write(self, kind, fname, payload):
+        """Serialize one output in memory and add it to the archive."""
+        if kind == 'append':
+            with self.lock:
+                if fname not in self.spools:
+                    self.spools[fname] = tempfile.TemporaryFile()
+                spool = self.spools[fname]
+            spool.write(payload)
+            return len(payload)  # int
+        if kind == 'csv':
+            data = payload.to_csv().encode('utf-8')
+        elif kind in ['npy', 'npz']:
+            buffer = io.BytesIO()
+            if kind == 'npy':
+                np.save(buffer, payload)
+            else:
+                np.savez_compressed(buffer, **payload)
+            data = buffer.getvalue()
+        elif kind == 'binary':
+            data = payload
+        else:
+            data = payload.encode('utf-8')
+        with self.lock:
+            self.archive.writestr(fname, data)
+        return len(data)  # int
+
+    def close(self):
+        """Add appended outputs and finalize the archive."""
+        for fname, spool in self.spools.items():
+            spool.seek(0)
+            with self.archive.open(fname, 'w', force_zip64=True) as member:
+                shutil.copyfileobj(spool, member)
+            spool.close()
+        self.archive.close()
+        LOGGER.info('simulation wrapup : wrote output archive %s', self.fname)
+        return
+
+
+class MemorySink(FileSink):
+    """Keep all outputs in memory, by output path (e.g. for testing)."""
+
+    def __init__(self):
+        FileSink.__init__(self)
+        self.outputs = dict()
+        self.lock = threading.Lock()
+        return
+
+    def write(self, kind, fname, payload):
+        """Keep one output (appended outputs are joined)."""
+        with self.lock:
+            if (kind == 'append') and (fname in self.outputs):
+                payload = self.outputs[fname][1] + payload
+            self.outputs[fname] = (kind, payload)
+        return 0  # int
+
+
+class NullSink(FileSink):
+    """Discard all outputs (e.g. for benchmarking simulation compute)."""
+
+    def write(self, kind, fname, payload):
+        """Discard one output."""
+        return 0  # int
+
+
+class OutputWriter(object):
+    """Central output writer: outputs are queued (bounded queues, so that the
+       simulation waits if output falls behind) and written to the sink by
+       background worker threads while the simulation continues. Outputs to the
+       same file are always handled by the same worker, so they are written in
+       the order submitted (e.g. appended store records). flush() waits until
+       everything queued so far has been written. Outputs must not be modified
+       by the simulation after they are submitted. With no worker threads,
+       outputs are written immediately."""
+
+    def __init__(self, sim):
+        if sim.output_sink == 'archive':
+            self.sink = ArchiveSink(sim)
+        elif sim.output_sink == 'memory':
+            self.sink = MemorySink()
+        elif sim.output_sink == 'null':
+            self.sink = NullSink()
+        else:  # 'files'
+            self.sink = FileSink()
+        self.n_written = 0
+        self.n_failed = 0
+        self.n_bytes = 0
+        self.count_lock = threading.Lock()
+        self.queues = list()
+        self.workers = list()
+        for _ in range(max(sim.output_workers, 0)):
+            worker_queue = queue.Queue(maxsize=sim.output_queue_size)
+            worker = threading.Thread(target=self.run_worker, args=(worker_queue,),
+                                      daemon=True)
+            worker.start()
+            self.queues.append(worker_queue)
+            self.workers.append(worker)
+        return
+
+    def write(self, kind, fname, payload, message, level):
+        """Write one output to the sink and count it."""
+        try:
+            n_bytes = self.sink.write(kind, fname, payload)
+            with self.count_lock:
+                self.n_written += 1
+                self.n_bytes += n_bytes
+            if message:
+                LOGGER.log(level, message)
+        except Exception as error:
+            with self.count_lock:
+                self.n_failed += 1
+            LOGGER.warning('output writer : failed to write %s (%s)', fname, str(error))
+        return
+
+    def run_worker(self, worker_queue):
+        """Write queued outputs until stopped."""
+        while True:
+            item = worker_queue.get()
+            if item is None:
+                worker_queue.task_done()
+                break
+            self.write(*item)
+            worker_queue.task_done()
+        return
+
+    def submit(self, kind, fname, payload, message=None, level=logging.INFO):
+        """Queue one output for writing (waits while the queue is full), or write
+           it immediately if there are no worker threads."""
+        if not self.queues:
+            self.write(kind, fname, payload, message, level)
+            return
+        worker_queue = self.queues[zlib.crc32(fname.encode('utf-8')) % len(self.queues)]
+        worker_queue.put((kind, fname, payload, message, level))
+        return
+
+    def queue_depth(self):
+        """Number of outputs queued and not yet written."""
+        return sum(worker_queue.qsize() for worker_queue in self.queues)  # int
+
+    def flush(self):
+        """Wait until all outputs queued so far have been written."""
+        for worker_queue in self.queues:
+            worker_queue.join()
+        return
+
+    def close(self):
+        """Write remaining outputs, stop worker threads and close the sink; exit with
+           an error status if any output failed to write."""
+        self.flush()
+        for worker_queue in self.queues:
+            worker_queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.sink.close()
+        LOGGER.info('simulation wrapup : output writer wrote %d outputs (%d failed)',
+                    self.n_written, self.n_failed)
+        if self.n_failed:
+            LOGGER.error('ERROR: %d simulation outputs could not be written', self.n_failed)
+            LOGGER.error('       --> exiting simulation')
+            sys.exit(1)
+        return
+
+
+# run-level output writer, if set up; otherwise outputs are written immediately
+WRITER = None
+IMMEDIATE_SINK = FileSink()
+
+
+def set_output_writer(writer):
+    """Route all subsequent outputs through this writer (None for immediate writes)."""
+    global WRITER
+    WRITER = writer
+    return
+
+
+def write_output(kind, fname, payload, message=None, level=logging.INFO):
+    """Write one output through the run-level output writer, or immediately;
+       the message is logged at the given level once the output is written."""
+    if WRITER is not None:
+        WRITER.submit(kind, fname, payload, message, level)
+    else:
+        IMMEDIATE_SINK.write(kind, fname, payload)
+        if message:
+            LOGGER.log(level, message)
+    return
+
+# end OutputWriter_class.py
@@ -0,0 +1,135 @@
+# pylint: disable=C0103,R0205,R0902,R1711
+"""
+Python script "PhaseTimers_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+from contextlib import nullcontext
+import json
+import time
+from MemoryDiagnostics_class import resident_set_size
+from OutputWriter_class import write_output
+
+
+class PhaseTimer(object):
+    """Context manager timing one pass through a simulation phase."""
+
+    def __init__(self, timers, name):
+        self.timers = timers
+        self.name = name
+        self.start = 0.0
+        return
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timers.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class PhaseTimers(object):
+    """Wall-clock time spent in each phase of the simulation time loop, and
+       counters (e.g. fliers queried, airborne, location records reported, bytes
+       written), aggregated per time step and per run, with the resident set size
+       at the end of each time step. The run totals are written as a JSON timing
+       report at wrap-up; per-step records are optionally written as JSON lines
+       (sim.timing_per_step)."""
+
+    def __init__(self, sim, byte_sources=()):
+        self.enabled = sim.phase_timing
+        if sim.experiment_number:
+            self.prefix = '%s_simulation_%s_%s_summary/timing_%s_%s' % \
+                (sim.simulation_name, str(sim.experiment_number).zfill(2),
+                 str(sim.simulation_number).zfill(5), str(sim.experiment_number).zfill(2),
+                 str(sim.simulation_number).zfill(5))
+        else:
+            self.prefix = '%s_simulation_%s_summary/timing_%s' % \
+                (sim.simulation_name, str(sim.simulation_number).zfill(5),
+                 str(sim.simulation_number).zfill(5))
+        self.simulation_name = sim.simulation_name
+        self.byte_sources = [source for source in byte_sources if source is not None]
+        self.start = time.perf_counter()
+        self.n_steps = 0
+        self.run_times = dict()
+        self.run_calls = dict()
+        self.max_step_times = dict()
+        self.run_counts = dict()
+        self.step_times = dict()
+        self.step_counts = dict()
+        self.n_bytes = 0
+        self.peak_rss = 0
+        self.per_step = self.enabled and sim.timing_per_step
+        return
+
+    def phase(self, name):
+        """Time one pass through the named phase: 'with timers.phase(name):'."""
+        if not self.enabled:
+            return nullcontext()
+        return PhaseTimer(self, name)
+
+    def add_time(self, name, seconds):
+        """Add wall-clock time spent in the named phase."""
+        self.step_times[name] = self.step_times.get(name, 0.0) + seconds
+        self.run_times[name] = self.run_times.get(name, 0.0) + seconds
+        self.run_calls[name] = self.run_calls.get(name, 0) + 1
+        return
+
+    def count(self, name, n):
+        """Add to the named counter."""
+        if self.enabled:
+            self.step_counts[name] = self.step_counts.get(name, 0) + n
+            self.run_counts[name] = self.run_counts.get(name, 0) + n
+        return
+
+    def end_step(self, clock):
+        """Close the current time step: count bytes written by the output writer
+           and stores, and write the per-step record if requested."""
+        if not self.enabled:
+            return
+        n_bytes = sum(source.n_bytes for source in self.byte_sources)
+        self.count('bytes_written', n_bytes - self.n_bytes)
+        self.n_bytes = n_bytes
+        rss = resident_set_size()
+        self.peak_rss = max(self.peak_rss, rss)
+        for name, seconds in self.step_times.items():
+            self.max_step_times[name] = max(self.max_step_times.get(name, 0.0), seconds)
+        if self.per_step:
+            record = {'time': clock.current_dt_str, 'step': self.n_steps, 'rss_bytes': rss,
+                      'phases': self.step_times, 'counters': self.step_counts}
+            line = json.dumps(record, separators=(',', ':')) + '\n'
+            write_output('append', '%s_steps.jsonl' % self.prefix, line.encode('utf-8'))
+        self.n_steps += 1
+        self.step_times = dict()
+        self.step_counts = dict()
+        return
+
+    def report(self):
+        """Write the run-level timing report."""
+        if not self.enabled:
+            return
+        n_bytes = sum(source.n_bytes for source in self.byte_sources)
+        self.run_counts['bytes_written'] = n_bytes
+        wall_s = time.perf_counter() - self.start
+        phases = dict()
+        for name, seconds in sorted(self.run_times.items(), key=lambda item: -item[1]):
+            phases[name] = {'total_s': seconds, 'calls': self.run_calls[name],
+                            'mean_s_per_step': seconds / max(self.n_steps, 1),
+                            'max_s_per_step': self.max_step_times.get(name, seconds),
+                            'fraction': seconds / wall_s}
+        report = {'simulation': self.simulation_name, 'n_steps': self.n_steps,
+                  'wall_s': wall_s, 'rss_bytes': resident_set_size(),
+                  'peak_step_rss_bytes': self.peak_rss, 'phases': phases,
+                  'counters': self.run_counts}
+        write_output('text', '%s.json' % self.prefix, json.dumps(report, indent=1),
+                     'simulation wrapup : wrote %s.json' % self.prefix.split('/')[-1])
+        return
+
+# end PhaseTimers_class.py
@@ -0,0 +1,107 @@
+# pylint: disable=C0103,R0205,R0902,R0913,R1711
+"""
+Python script "PlotService_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import logging
+import multiprocessing
+import zlib
+from OutputWriter_class import write_output
+from Plots_gen import render_single_flight
+from Sim_logging import LOGGER
+
+
+class PlotService(object):
+    """Single-flight trajectory plot rendering, out of band from the time loop.
+       The simulation submits lightweight flight records; plots are rendered
+       'sync' (immediately, in the simulation process), 'pool' (by a pool of
+       worker processes while the simulation continues), or 'deferred' (by the
+       worker pool after the simulation ends). A reproducible fraction of
+       fliers (by flier id, independent of the simulation random numbers) is
+       selected for plotting. Rendered images are written by the output writer."""
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.mode = sim.flight_plots
+        self.sample_fraction = sim.flight_plot_sample
+        self.n_workers = sim.flight_plot_workers
+        self.pool = None
+        self.pending = list()
+        self.n_submitted = 0
+        self.n_failed = 0
+        return
+
+    def selected(self, flier_id):
+        """Check if Flier trajectory is in the plotted sample."""
+        if self.sample_fraction >= 1.0:
+            return True
+        flier_hash = zlib.crc32(flier_id.encode('utf-8')) / 2.0**32
+        return flier_hash < self.sample_fraction  # bool
+
+    def start_pool(self):
+        """Start worker processes (on first use). Workers are spawned, not forked:
+           the simulation process already runs output writer threads, and a forked
+           child could inherit a logging or stdout lock held by one of them."""
+        if self.pool is None:
+            context = multiprocessing.get_context('spawn')
+            self.pool = context.Pool(processes=self.n_workers)
+        return
+
+    def write_plot(self, rendered):
+        """Worker result callback: write one rendered plot."""
+        outfname, image = rendered
+        write_output('binary', outfname, image,
+                     'plot service : wrote %s' % outfname.split('/')[-1], logging.DEBUG)
+        return
+
+    def report_failure(self, error):
+        """Worker error callback; a failed plot does not stop the simulation."""
+        self.n_failed += 1
+        LOGGER.warning('plot service : trajectory plot failed (%s)', str(error))
+        return
+
+    def submit(self, clock, flier_id, flight_record, outfname):
+        """Render (or queue rendering of) one Flier's trajectory plot."""
+        if (self.mode == 'off') or (not self.selected(flier_id)):
+            return
+        self.n_submitted += 1
+        if self.mode == 'sync':
+            outfname, image = render_single_flight(self.sim, flight_record, outfname)
+            write_output('binary', outfname, image,
+                         '%s UTC : wrote %s' % (clock.current_dt_str, outfname.split('/')[-1]),
+                         logging.DEBUG)
+        elif self.mode == 'pool':
+            self.start_pool()
+            self.pool.apply_async(render_single_flight, (self.sim, flight_record, outfname),
+                                  callback=self.write_plot, error_callback=self.report_failure)
+        else:  # 'deferred'
+            self.pending.append((flight_record, outfname))
+        return
+
+    def close(self):
+        """Render deferred plots and wait for all workers to finish."""
+        if self.pending:
+            self.start_pool()
+            for flight_record, outfname in self.pending:
+                self.pool.apply_async(render_single_flight,
+                                      (self.sim, flight_record, outfname),
+                                      callback=self.write_plot,
+                                      error_callback=self.report_failure)
+            self.pending = list()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        if self.n_submitted:
+            LOGGER.info('simulation wrapup : %d single-flight plots rendered (%d failed)',
+                        self.n_submitted - self.n_failed, self.n_failed)
+        return
+
+# end PlotService_class.py
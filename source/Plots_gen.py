@@ -10,6 +10,7 @@ Copyright (C) 2019 by Matthew Garcia
 """
 
 
+import io
 import warnings
 import iso8601
 import numpy as np
@@ -20,34 +21,54 @@ from matplotlib.collections import LineCollection
 from mpl_toolkits.basemap import Basemap
 mpl.use('Agg')
 import matplotlib.pyplot as plt
+from OutputWriter_class import write_output
 
 
-def setup_basemap(sim):
-    """Set up common basemap for various plots."""
+# Basemap instances, by plot domain (coastline etc. data are read only once)
+BASEMAPS = dict()
+
+
+def get_basemap(sim):
+    """Get common (cached) basemap for various plots."""
+    bounds = (sim.plot_bottom_lat, sim.plot_top_lat, sim.plot_left_lon, sim.plot_right_lon)
+    if bounds not in BASEMAPS:
+        mid_lat = (sim.plot_bottom_lat + sim.plot_top_lat) / 2.0
+        mid_lon = (sim.plot_left_lon + sim.plot_right_lon) / 2.0
+        BASEMAPS[bounds] = Basemap(projection='tmerc', lon_0=mid_lon, lat_0=mid_lat,
+                                   lat_ts=mid_lat, llcrnrlat=sim.plot_bottom_lat,
+                                   llcrnrlon=sim.plot_left_lon,
+                                   urcrnrlat=sim.plot_top_lat,
+                                   urcrnrlon=sim.plot_right_lon,
+                                   resolution='h', area_thresh=500)
+    return BASEMAPS[bounds]  # Basemap object
+
+
+def draw_basemap(sim, bmap, ax=None):
+    """Draw common basemap features on the indicated (or current) axes."""
     mid_lat = (sim.plot_bottom_lat + sim.plot_top_lat) / 2.0
     mid_lon = (sim.plot_left_lon + sim.plot_right_lon) / 2.0
-    bmap = Basemap(projection='tmerc', lon_0=mid_lon, lat_0=mid_lat, lat_ts=mid_lat,
-                   llcrnrlat=sim.plot_bottom_lat, llcrnrlon=sim.plot_left_lon,
-                   urcrnrlat=sim.plot_top_lat, urcrnrlon=sim.plot_right_lon,
-                   resolution='h', area_thresh=500)
-    bmap.drawcoastlines()
-    bmap.drawstates()
-    bmap.drawcountries()
+    bmap.drawcoastlines(ax=ax)
+    bmap.drawstates(ax=ax)
+    bmap.drawcountries(ax=ax)
     #
     # draw map references
     bmap.drawmapscale(lon=sim.plot_left_lon+0.75, lat=sim.plot_top_lat-0.5,
-                      lon0=mid_lon, lat0=mid_lat, length=100.0, barstyle='fancy')
+                      lon0=mid_lon, lat0=mid_lat, length=100.0, barstyle='fancy', ax=ax)
     parallels = np.arange(30., 60., 1.)
-    bmap.drawparallels(parallels, labels=[1, 0, 0, 0], fontsize=10)
+    bmap.drawparallels(parallels, labels=[1, 0, 0, 0], fontsize=10, ax=ax)
     meridians = np.arange(270., 360., 1.)
-    bmap.drawmeridians(meridians, labels=[0, 0, 0, 1], fontsize=10)
+    bmap.drawmeridians(meridians, labels=[0, 0, 0, 1], fontsize=10, ax=ax)
     return bmap
 
 
-def plot_single_flight(sim, status_df, outfname):
-    """2-panel figure of flight map and profile, with temperature colored."""
-    warnings.filterwarnings("ignore", message="Tight layout not applied")
-    #
+def setup_basemap(sim, ax=None):
+    """Set up common basemap for various plots."""
+    return draw_basemap(sim, get_basemap(sim), ax)  # Basemap object
+
+
+def single_flight_record(status_df):
+    """Extract lightweight flight record (elapsed time [min], lat, lon, altitude,
+       surface elevation, temperature arrays) for plotting; None if no flight."""
     date_time_all = list(status_df['date_time'])
     lat_all = np.array(status_df['lat'])
     lon_all = np.array(status_df['lon'])
@@ -56,7 +77,7 @@ def plot_single_flight(sim, status_df, outfname):
     T_all = np.array(status_df['T'])
     #
     if np.sum(alt_all - sfc_all) == 0:
-        return False
+        return None
     idx1 = 0
     for idx, alt in enumerate(alt_all):
         if alt > sfc_all[idx]:
@@ -68,17 +89,33 @@ def plot_single_flight(sim, status_df, outfname):
             idx2 = idx + 2
             break
     date_time = date_time_all[idx1:idx2]
-    lat = lat_all[idx1:idx2]
-    lon = lon_all[idx1:idx2]
-    alt = alt_all[idx1:idx2]
-    sfc = sfc_all[idx1:idx2]
-    T = T_all[idx1:idx2]
     #
-    init_time = iso8601.parse_date(date_time[0])
-    elapsed_time = []
-    for tt in date_time:
-        tdiff = iso8601.parse_date(tt) - init_time
-        elapsed_time.append(tdiff.seconds / 60.0)
+    if isinstance(date_time[0], str):
+        init_time = iso8601.parse_date(date_time[0])
+        elapsed_time = []
+        for tt in date_time:
+            tdiff = iso8601.parse_date(tt) - init_time
+            elapsed_time.append(tdiff.seconds / 60.0)
+    else:  # integer seconds since simulation start
+        elapsed_time = list((np.array(date_time) - date_time[0]) / 60.0)
+    return [elapsed_time, lat_all[idx1:idx2], lon_all[idx1:idx2], alt_all[idx1:idx2],
+            sfc_all[idx1:idx2], T_all[idx1:idx2]]  # list of arrays
+
+
+def figure_bytes(outfname):
+    """Save and close the current figure; image file contents, in the format
+       indicated by the output file name."""
+    image = io.BytesIO()
+    plt.savefig(image, format=outfname.split('.')[-1], dpi=300, bbox_inches='tight')
+    plt.close()
+    return image.getvalue()  # bytes
+
+
+def render_single_flight(sim, flight_record, outfname):
+    """2-panel figure of flight map and profile, with temperature colored;
+       output file name and image file contents."""
+    warnings.filterwarnings("ignore", message="Tight layout not applied")
+    elapsed_time, lat, lon, alt, sfc, T = flight_record
     #
     # set up figure
     plt.figure(figsize=(8, 12))
@@ -110,8 +147,15 @@ def plot_single_flight(sim, status_df, outfname):
     #
     # save and close figure
     plt.tight_layout()
-    plt.savefig(outfname, dpi=300, bbox_inches='tight')
-    plt.close()
+    return outfname, figure_bytes(outfname)  # str + bytes
+
+
+def plot_single_flight(sim, status_df, outfname):
+    """2-panel figure of flight map and profile, with temperature colored."""
+    flight_record = single_flight_record(status_df)
+    if flight_record is None:
+        return False
+    write_output('binary', *render_single_flight(sim, flight_record, outfname))
     return True
 
 
@@ -162,8 +206,8 @@ def plot_all_flights(sim, wrf_grids, trajectories, outfname):
     #
     # save and close figure
     plt.tight_layout()
-    plt.savefig(outfname, dpi=300, bbox_inches='tight')
-    plt.close()
+    write_output('binary', outfname, figure_bytes(outfname),
+                 'simulation wrapup : wrote %s' % outfname.split('/')[-1])
     return
 
 
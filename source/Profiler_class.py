@@ -0,0 +1,183 @@
+# pylint: disable=C0103,R0205,R0902,R1711,W0212
+"""
+Python script "Profiler_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from OutputSchedule_class import parse_schedule_time
+from OutputWriter_class import write_output
+from Sim_logging import LOGGER
+
+
+def profile_args(sim, args):
+    """Take a '--profile=MODE[,START,END]' option (MODE 'cprofile' or 'sampling',
+       START/END UTC times as for sim.profile_window) from the command line
+       arguments; remaining arguments."""
+    remaining = list()
+    for arg in args:
+        if arg.startswith('--profile'):
+            options = arg.split('=', 1)[1].split(',') if '=' in arg else ['sampling']
+            sim.profile_mode = options[0]
+            if len(options) == 3:
+                sim.profile_window = (options[1], options[2])
+        else:
+            remaining.append(arg)
+    return remaining  # list of str
+
+
+def window_seconds(clock, timestr, after_s=0):
+    """Profiling window bound as integer seconds since simulation start; a daily
+       'HH:MM' time is taken at its first occurrence at or after after_s."""
+    sched_time = parse_schedule_time(timestr)
+    if isinstance(sched_time, datetime):
+        return clock.seconds(sched_time)  # int
+    date_time = datetime.combine(clock.to_datetime(after_s).date(), sched_time,
+                                 tzinfo=timezone.utc)
+    if clock.seconds(date_time) < after_s:
+        date_time += timedelta(days=1)
+    return clock.seconds(date_time)  # int
+
+
+class SimProfiler(object):
+    """Opt-in profiling of the simulation time loop within a window of simulated
+       time (sim.profile_window, or the whole time loop). 'cprofile' runs the
+       deterministic profiler and saves its statistics (.prof, for pstats or
+       snakeviz) and a text summary; 'sampling' samples the main thread's call
+       stack every sim.profile_interval seconds of wall-clock time from a
+       background thread and saves collapsed stacks (.collapsed, for
+       flamegraph tools) and a text summary."""
+
+    def __init__(self, sim, clock):
+        self.mode = sim.profile_mode
+        if sim.experiment_number:
+            self.prefix = '%s_simulation_%s_%s_summary/profile_%s_%s' % \
+                (sim.simulation_name, str(sim.experiment_number).zfill(2),
+                 str(sim.simulation_number).zfill(5), str(sim.experiment_number).zfill(2),
+                 str(sim.simulation_number).zfill(5))
+        else:
+            self.prefix = '%s_simulation_%s_summary/profile_%s' % \
+                (sim.simulation_name, str(sim.simulation_number).zfill(5),
+                 str(sim.simulation_number).zfill(5))
+        if sim.profile_window:
+            self.start_s = window_seconds(clock, sim.profile_window[0])
+            self.end_s = window_seconds(clock, sim.profile_window[1], self.start_s)
+        else:
+            self.start_s, self.end_s = 0, clock.end_s + 1
+        self.interval = sim.profile_interval
+        self.running = False
+        self.done = False
+        self.profiler = None
+        self.sampler = None
+        self.stop_event = threading.Event()
+        self.stacks = dict()
+        self.n_samples = 0
+        return
+
+    def update(self, clock):
+        """Start or stop profiling as the time step enters or leaves the window."""
+        if self.mode is None or self.done:
+            return
+        if (not self.running) and (self.start_s <= clock.current_s < self.end_s):
+            self.start(clock)
+        elif self.running and (clock.current_s >= self.end_s):
+            self.stop(clock)
+        return
+
+    def start(self, clock):
+        """Start profiling."""
+        LOGGER.info('%s : starting %s profiler', clock.current_dt_str, self.mode)
+        if self.mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.stop_event.clear()
+            self.sampler = threading.Thread(target=self.sample,
+                                            args=(threading.main_thread().ident,), daemon=True)
+            self.sampler.start()
+        self.running = True
+        return
+
+    def sample(self, thread_id):
+        """Sample the profiled thread's call stack until stopped."""
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = list()
+            while frame is not None:
+                code = frame.f_code
+                stack.append('%s:%s' % (os.path.basename(code.co_filename), code.co_name))
+                frame = frame.f_back
+            key = ';'.join(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.n_samples += 1
+        return
+
+    def stop(self, clock):
+        """Stop profiling and write the profile data."""
+        LOGGER.info('%s : stopping %s profiler', clock.current_dt_str, self.mode)
+        if self.mode == 'cprofile':
+            self.profiler.disable()
+            self.profiler.create_stats()  # as in Profile.dump_stats
+            write_output('binary', '%s.prof' % self.prefix, marshal.dumps(self.profiler.stats),
+                         '%s : wrote %s.prof' % (clock.current_dt_str,
+                                                 self.prefix.split('/')[-1]))
+            summary = io.StringIO()
+            stats = pstats.Stats(self.profiler, stream=summary)
+            stats.sort_stats('cumulative').print_stats(50)
+            stats.sort_stats('tottime').print_stats(50)
+        else:
+            self.stop_event.set()
+            self.sampler.join()
+            collapsed = ''.join('%s %d\n' % (key, count)
+                                for key, count in sorted(self.stacks.items()))
+            write_output('text', '%s.collapsed' % self.prefix, collapsed,
+                         '%s : wrote %s.collapsed (%d samples)' %
+                         (clock.current_dt_str, self.prefix.split('/')[-1], self.n_samples))
+            summary = io.StringIO()
+            self.sample_summary(summary)
+        write_output('text', '%s.txt' % self.prefix, summary.getvalue(),
+                     '%s : wrote %s.txt' % (clock.current_dt_str, self.prefix.split('/')[-1]))
+        self.running = False
+        self.done = True
+        return
+
+    def sample_summary(self, summary):
+        """Top functions by samples on top of stack (self) and anywhere in
+           stack (total)."""
+        self_counts = dict()
+        total_counts = dict()
+        for key, count in self.stacks.items():
+            frames = key.split(';')
+            self_counts[frames[-1]] = self_counts.get(frames[-1], 0) + count
+            for frame in set(frames):
+                total_counts[frame] = total_counts.get(frame, 0) + count
+        n_samples = max(self.n_samples, 1)
+        summary.write('%d samples at %.4f s intervals\n\n' % (self.n_samples, self.interval))
+        for title, counts in [('self', self_counts), ('total', total_counts)]:
+            summary.write('%8s %7s  function (by %s samples)\n' % ('samples', 'percent', title))
+            ranked = sorted(counts.items(), key=lambda item: -item[1])[:50]
+            for frame, count in ranked:
+                summary.write('%8d %6.1f%%  %s\n' % (count, 100.0 * count / n_samples, frame))
+            summary.write('\n')
+        return
+
+    def close(self, clock):
+        """Stop profiling at end of time loop, if still running."""
+        if self.running:
+            self.stop(clock)
+        return
+
+# end Profiler_class.py
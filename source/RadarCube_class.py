@@ -0,0 +1,111 @@
+# pylint: disable=C0103,R0205,R0902,R0913,R0914,R1711
+"""
+Python script "RadarCube_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import numpy as np
+from OutputWriter_class import write_output
+from Sim_logging import LOGGER
+
+
+class RadarCube(object):
+    """Run-level sparse (time, row, col) cubes of radar-relative Flier density
+       and Doppler velocity grids, one per radar in the radar network. At each
+       time step only the occupied grid cells are kept (row, col, Flier count,
+       mean Doppler velocity); each radar's cube is saved at end of simulation
+       as one compressed .npz file in place of the per-time-step
+       dens_*/dvel_*_grid.npy files."""
+
+    def __init__(self, sim, clock, radars):
+        self.radars = radars
+        self.fnames = dict()
+        for radar in radars:
+            if sim.experiment_number:
+                self.fnames[radar.radar_id] = \
+                    '%s_simulation_%s_%s_summary/radar_cube_%s_%s_%s.npz' % \
+                    (sim.simulation_name, str(sim.experiment_number).zfill(2),
+                     str(sim.simulation_number).zfill(5), str(sim.experiment_number).zfill(2),
+                     str(sim.simulation_number).zfill(5), radar.radar_id)
+            else:
+                self.fnames[radar.radar_id] = \
+                    '%s_simulation_%s_summary/radar_cube_%s_%s.npz' % \
+                    (sim.simulation_name, str(sim.simulation_number).zfill(5),
+                     str(sim.simulation_number).zfill(5), radar.radar_id)
+        self.start_dt_str = clock.start_dt_str
+        self.times_s = list()
+        self.times = list()
+        self.offsets = {radar_id: [0] for radar_id in radars.radar_ids}
+        self.cells = {radar_id: list() for radar_id in radars.radar_ids}
+        return
+
+    def append(self, clock, locations):
+        """Grid Flier density and mean Doppler velocity for all radars at the
+           current time step."""
+        self.times_s.append(clock.current_s)
+        self.times.append(clock.current_dt_str)
+        for radar_id, (rows, cols, dens, dvel) in self.radars.sparse_grids(locations).items():
+            self.offsets[radar_id].append(self.offsets[radar_id][-1] + len(rows))
+            self.cells[radar_id].append((rows.astype(np.int16), cols.astype(np.int16),
+                                         dens.astype(np.int32), dvel.astype(np.float32)))
+            if len(rows):
+                LOGGER.debug('%s UTC : gridded %d flying fliers in %d %s radar grid cells',
+                             clock.current_dt_str, int(np.sum(dens)), len(rows), radar_id)
+        return
+
+    def close(self):
+        """Save each radar's cube at end of simulation."""
+        for radar in self.radars:
+            if self.cells[radar.radar_id]:
+                rows, cols, dens, dvel = \
+                    [np.concatenate(field) for field in zip(*self.cells[radar.radar_id])]
+            else:  # no time steps gridded, e.g. all scheduled times outside the run
+                rows, cols = np.zeros(0, dtype=np.int16), np.zeros(0, dtype=np.int16)
+                dens, dvel = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+            fname = self.fnames[radar.radar_id]
+            cube = dict(times_s=np.array(self.times_s, dtype=np.int64),
+                        times=np.array(self.times, dtype=str),
+                        offsets=np.array(self.offsets[radar.radar_id], dtype=np.int64),
+                        rows=rows, cols=cols, dens=dens, dvel=dvel,
+                        start_dt=self.start_dt_str, radar_id=radar.radar_id,
+                        UTM_zone=radar.UTM_zone, nrows=radar.grid_nrows,
+                        ncols=radar.grid_ncols, sw_east=radar.grid_sw_east,
+                        sw_north=radar.grid_sw_north, dx=radar.grid_dx, dy=radar.grid_dy)
+            write_output('npz', fname, cube,
+                         'simulation wrapup : wrote %d time steps (%d occupied grid cells) to %s' %
+                         (len(self.times), self.offsets[radar.radar_id][-1],
+                          fname.split('/')[-1]))
+        return
+
+
+def read_radar_cube(fname):
+    """Load all arrays of a radar grid cube."""
+    with np.load(fname) as cube_file:
+        cube = {key: cube_file[key] for key in cube_file.files}
+    return cube  # dict of numpy arrays
+
+
+def cube_grid(cube, timestr, field):
+    """Dense 'dens' or 'dvel' grid at one time step of a radar grid cube, as
+       in the per-time-step *_grid.npy files; None if time is not in cube."""
+    t_idx = np.flatnonzero(cube['times'] == timestr)
+    if not len(t_idx):
+        return None
+    start, end = cube['offsets'][t_idx[0]], cube['offsets'][t_idx[0] + 1]
+    grid = np.zeros((int(cube['nrows']), int(cube['ncols'])))
+    grid[cube['rows'][start:end], cube['cols'][start:end]] = cube[field][start:end]
+    return grid  # numpy 2D array
+
+
+def cube_occupied_times(cube):
+    """Time steps of a radar grid cube with any flying Fliers on the grid."""
+    occupied = np.diff(cube['offsets']) > 0
+    return [str(timestr) for timestr in cube['times'][occupied]]  # list of str
+
+# end RadarCube_class.py
@@ -0,0 +1,75 @@
+# pylint: disable=C0103,R0205,R0902,R0913,R1711
+"""
+Python script "RadarNetwork_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import numpy as np
+from Radar_class import Radar
+
+
+class RadarNetwork(object):
+    """All radars covering the simulation domain: the primary radar (sim.radar_*)
+       and any additional radar sites (sim.extra_radars). Flier Doppler motion
+       attributes are relative to the primary radar; density and Doppler
+       velocity grids are produced for every radar from the same population
+       snapshot of Flier locations and motion."""
+
+    def __init__(self, sim):
+        self.radars = [Radar(sim)] + [Radar(sim, site) for site in sim.extra_radars]
+        self.primary = self.radars[0]
+        self.radar_ids = [radar.radar_id for radar in self.radars]
+        self.min_alt_AGL = min(radar.min_alt_AGL for radar in self.radars)
+        return
+
+    def __len__(self):
+        return len(self.radars)
+
+    def __iter__(self):
+        return iter(self.radars)
+
+    def doppler_vels(self, UTM_zones, eastings, northings, V_x, V_y):
+        """Polar motion components of many Fliers centered on the primary radar."""
+        return self.primary.doppler_vels(UTM_zones, eastings, northings, V_x, V_y)
+
+    def snapshot(self, locations):
+        """Flying Fliers' locations and ground-relative motion (columns as the
+           summarize_motion lists) at the current time step, as an array."""
+        if not locations:
+            return np.zeros((0, 13))
+        values = np.array(list(locations.values()), dtype=np.float64)
+        return values[values[:, 2] > self.min_alt_AGL]  # numpy 2D array
+
+    def radar_snapshots(self, locations):
+        """For each radar, flying Flier locations (northing, easting) in the radar
+           UTM zone and Doppler radial velocity relative to the radar."""
+        upa = self.snapshot(locations)
+        for radar in self.radars:
+            visible = upa[upa[:, 2] > radar.min_alt_AGL]
+            eastings, northings = radar.radar_coords(visible[:, 5], visible[:, 6],
+                                                     visible[:, 7])
+            V_r, _ = radar.polar_motion(eastings, northings, visible[:, 8], visible[:, 9])
+            yield radar, northings, eastings, V_r
+
+    def grid_stats(self, locations):
+        """Density and mean Doppler velocity grids for every radar."""
+        grids = dict()
+        for radar, northings, eastings, V_r in self.radar_snapshots(locations):
+            count, mean, _ = radar.grid_stats(northings, eastings, V_r)
+            grids[radar.radar_id] = (count, mean)
+        return grids  # dict of 2 * numpy 2D array
+
+    def sparse_grids(self, locations):
+        """Occupied-cell density and mean Doppler velocity for every radar."""
+        grids = dict()
+        for radar, northings, eastings, V_r in self.radar_snapshots(locations):
+            grids[radar.radar_id] = radar.sparse_grid(northings, eastings, V_r)
+        return grids  # dict of 4 * numpy 1D array
+
+# end RadarNetwork_class.py
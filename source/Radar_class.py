@@ -10,33 +10,43 @@ Copyright (C) 2019, 2020 by Matthew Garcia
 """
 
 
-import warnings
 import numpy as np
-from pyproj import Proj
+from pyproj import Proj, Transformer
 from Geography import get_utm_zone
 
 
 class Radar(object):
     """Initialize and define an individual radar location and coverage grid."""
 
-    def __init__(self, sim):
-        self.radar_id = sim.radar_name
+    def __init__(self, sim, site=None):
+        # site: optional dict of radar specifications (keys as the sim.radar_*
+        # attributes) for additional radars; unspecified values follow sim
+        spec = dict() if site is None else dict(site)
+        for key in ['radar_name', 'radar_lat', 'radar_lon', 'radar_grid_sw_east',
+                    'radar_grid_sw_north', 'radar_grid_ne_east', 'radar_grid_ne_north',
+                    'radar_grid_dx', 'radar_grid_dy']:
+            if key not in spec:
+                spec[key] = getattr(sim, key)
+        self.radar_id = spec['radar_name']
         #
         # radar location information
-        self.lat = sim.radar_lat
-        self.lon = sim.radar_lon
+        self.lat = spec['radar_lat']
+        self.lon = spec['radar_lon']
         self.UTM_zone = get_utm_zone(self.lon)
-        proj = Proj(proj="utm", zone=self.UTM_zone, ellps="WGS84",
-                    south=bool(self.lat < 0))
-        self.easting, self.northing = proj(self.lon, self.lat)
+        self.proj = Proj(proj="utm", zone=self.UTM_zone, ellps="WGS84",
+                         south=bool(self.lat < 0))
+        self.easting, self.northing = self.proj(self.lon, self.lat)
+        #
+        # cached reprojections from other UTM zones to radar UTM zone
+        self.zone_transformers = dict()
         #
         # coverage grid definition
-        self.grid_sw_east = sim.radar_grid_sw_east
-        self.grid_sw_north = sim.radar_grid_sw_north
-        self.grid_ne_east = sim.radar_grid_ne_east
-        self.grid_ne_north = sim.radar_grid_ne_north
-        self.grid_dx = sim.radar_grid_dx
-        self.grid_dy = sim.radar_grid_dy
+        self.grid_sw_east = spec['radar_grid_sw_east']
+        self.grid_sw_north = spec['radar_grid_sw_north']
+        self.grid_ne_east = spec['radar_grid_ne_east']
+        self.grid_ne_north = spec['radar_grid_ne_north']
+        self.grid_dx = spec['radar_grid_dx']
+        self.grid_dy = spec['radar_grid_dy']
         self.grid_nrows = int((self.grid_ne_north - self.grid_sw_north) / self.grid_dy)
         self.grid_ncols = int((self.grid_ne_east - self.grid_sw_east) / self.grid_dx)
         #
@@ -47,50 +57,99 @@ class Radar(object):
         self.min_alt_AGL = 20.0
         return
 
-    def doppler_vel(self, UTM_zone, easting, northing, V_x, V_y):
-        """Convert Flier motion to polar components centered on radar."""
-        if UTM_zone != self.UTM_zone:
-            proj1 = Proj(proj="utm", zone=UTM_zone, ellps="WGS84",
-                         south=bool(self.lat < 0))
-            lon, lat = proj1(easting, northing, inverse=True)
-            proj2 = Proj(proj="utm", zone=self.UTM_zone, ellps="WGS84",
-                         south=bool(self.lat < 0))
-            easting, northing = proj2(lon, lat)
-        x_dist = easting - self.easting
-        y_dist = northing - self.northing
+    def zone_transformer(self, UTM_zone):
+        """Cached reprojection from another UTM zone to radar UTM zone."""
+        if UTM_zone not in self.zone_transformers:
+            proj = Proj(proj="utm", zone=UTM_zone, ellps="WGS84", south=bool(self.lat < 0))
+            self.zone_transformers[UTM_zone] = Transformer.from_proj(proj, self.proj)
+        return self.zone_transformers[UTM_zone]  # Transformer object
+
+    def radar_coords(self, UTM_zones, eastings, northings):
+        """Locations in radar UTM zone; locations outside radar UTM zone are
+           reprojected in one batch per zone."""
+        UTM_zones = np.asarray(UTM_zones).astype(int)
+        eastings = np.array(eastings, dtype=float)
+        northings = np.array(northings, dtype=float)
+        for UTM_zone in np.unique(UTM_zones[UTM_zones != self.UTM_zone]):
+            in_zone = (UTM_zones == UTM_zone)
+            eastings[in_zone], northings[in_zone] = \
+                self.zone_transformer(int(UTM_zone)).transform(eastings[in_zone],
+                                                               northings[in_zone])
+        return eastings, northings  # 2 * numpy 1D array
+
+    def doppler_vels(self, UTM_zones, eastings, northings, V_x, V_y):
+        """Convert motion of many Fliers to polar components centered on radar."""
+        eastings, northings = self.radar_coords(UTM_zones, eastings, northings)
+        return self.polar_motion(eastings, northings, V_x, V_y)
+
+    def polar_motion(self, eastings, northings, V_x, V_y):
+        """Polar motion components centered on radar, for locations in radar UTM zone."""
+        V_x = np.asarray(V_x, dtype=float)
+        V_y = np.asarray(V_y, dtype=float)
+        x_dist = eastings - self.easting
+        y_dist = northings - self.northing
         r_dist = np.sqrt(x_dist**2 + y_dist**2)
         V_r = ((x_dist * V_x) + (y_dist * V_y)) / r_dist
         V_a = np.sqrt(V_x**2 + V_y**2 - V_r**2)
-        return V_r, V_a  # 2 * float
+        return V_r, V_a  # 2 * numpy 1D array
+
+    def doppler_vel(self, UTM_zone, easting, northing, V_x, V_y):
+        """Convert Flier motion to polar components centered on radar."""
+        V_r, V_a = self.doppler_vels([UTM_zone], [easting], [northing], [V_x], [V_y])
+        return V_r[0], V_a[0]  # 2 * float
+
+    def grid_cells(self, norths, easts):
+        """Flattened radar grid cell index of each location, and mask of
+           locations inside the grid."""
+        rows = np.round((np.asarray(norths, dtype=float) - self.grid_sw_north) /
+                        self.grid_dy).astype(np.int64)
+        cols = np.round((np.asarray(easts, dtype=float) - self.grid_sw_east) /
+                        self.grid_dx).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.grid_nrows) & (cols >= 0) & (cols < self.grid_ncols)
+        return rows[inside] * self.grid_ncols + cols[inside], inside  # 2 * numpy 1D array
+
+    def bincount_grid(self, cells, weights=None):
+        """Sum weights (or count) by flattened cell index on radar grid."""
+        grid = np.bincount(cells, weights=weights,
+                           minlength=self.grid_nrows * self.grid_ncols)
+        return grid.reshape((self.grid_nrows, self.grid_ncols)).astype(float)
 
     def count_grid(self, norths, easts):
         """Count values on radar grid according to location."""
-        grid = np.copy(self.empty_grid)
-        for north, east in zip(norths, easts):
-            r = int(round((north - self.grid_sw_north) / self.grid_dy))
-            c = int(round((east - self.grid_sw_east) / self.grid_dx))
-            if 0 <= r < self.grid_nrows:
-                if 0 <= c < self.grid_ncols:
-                    grid[r, c] += 1
-        return grid
+        cells, _ = self.grid_cells(norths, easts)
+        return self.bincount_grid(cells)
 
     def accumulate_grid(self, norths, easts, vals):
         """Accumulate values on radar grid according to location."""
-        grid = np.copy(self.empty_grid)
-        for north, east, val in zip(norths, easts, vals):
-            r = int(round((north - self.grid_sw_north) / self.grid_dy))
-            c = int(round((east - self.grid_sw_east) / self.grid_dx))
-            if 0 <= r < self.grid_nrows:
-                if 0 <= c < self.grid_ncols:
-                    grid[r, c] += val
-        return grid
+        cells, inside = self.grid_cells(norths, easts)
+        return self.bincount_grid(cells, np.asarray(vals, dtype=float)[inside])
+
+    def grid_stats(self, norths, easts, vals):
+        """Count, mean and (population) variance of values on radar grid
+           according to location; mean and variance are 0 in empty cells."""
+        cells, inside = self.grid_cells(norths, easts)
+        vals = np.asarray(vals, dtype=float)[inside]
+        count = self.bincount_grid(cells)
+        total = self.bincount_grid(cells, vals)
+        total_sq = self.bincount_grid(cells, vals**2)
+        occupied = count > 0
+        mean = np.zeros_like(count)
+        mean[occupied] = total[occupied] / count[occupied]
+        variance = np.zeros_like(count)
+        variance[occupied] = np.maximum(total_sq[occupied] / count[occupied] -
+                                        mean[occupied]**2, 0.0)
+        return count, mean, variance  # 3 * numpy 2D array
 
     def average_grid(self, norths, easts, vals):
         """Get average values on radar grid according to location."""
-        warnings.filterwarnings("ignore", message="invalid value encountered")
-        accumulated_grid = self.accumulate_grid(norths, easts, vals)
-        counted_grid = self.count_grid(norths, easts)
-        grid = np.where(counted_grid > 0, accumulated_grid / counted_grid, 0)
-        return grid
+        _, mean, _ = self.grid_stats(norths, easts, vals)
+        return mean
+
+    def sparse_grid(self, norths, easts, vals):
+        """Count and average values on radar grid according to location, for
+           occupied grid cells only (rows, cols, counts, means)."""
+        count, mean, _ = self.grid_stats(norths, easts, vals)
+        rows, cols = np.nonzero(count)
+        return rows, cols, count[rows, cols].astype(np.int64), mean[rows, cols]
 
 # end Radar_class.py
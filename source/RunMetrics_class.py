@@ -0,0 +1,173 @@
+# pylint: disable=C0103,R0205,R0902,R0913,R1711
+"""
+Python script "RunMetrics_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+import time
+from MemoryDiagnostics_class import resident_set_size
+from Sim_logging import LOGGER
+
+
+# exported run metrics: name, type, help text
+RUN_METRICS = [('atm_simulated_seconds', 'gauge', 'Simulated time since simulation start'),
+               ('atm_simulated_end_seconds', 'gauge', 'Simulated time at simulation end'),
+               ('atm_wall_seconds', 'gauge', 'Wall-clock time since time loop start'),
+               ('atm_steps_total', 'counter', 'Time steps completed'),
+               ('atm_steps_per_second', 'gauge', 'Time steps per wall-clock second, recent'),
+               ('atm_last_step_timestamp_seconds', 'gauge',
+                'Unix time at end of the latest time step'),
+               ('atm_fliers', 'gauge', 'Fliers in simulation by state'),
+               ('atm_fliers_airborne', 'gauge', 'Fliers above ground'),
+               ('atm_wrf_load_seconds_total', 'counter',
+                'Wall-clock time spent loading and swapping WRF grids'),
+               ('atm_output_queue_depth', 'gauge', 'Outputs queued for the output writer'),
+               ('atm_resident_memory_bytes', 'gauge', 'Resident set size'),
+               ('atm_completed', 'gauge', '1 once the time loop has ended')]
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serve the latest metrics text on any GET request."""
+
+    def do_GET(self):
+        """Send the metrics page."""
+        body = self.server.metrics_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return
+
+    def log_message(self, *args):
+        """No per-request log lines."""
+        return
+
+
+class RunMetrics(object):
+    """Live run metrics (simulated and wall time, step rate, fliers by state,
+       airborne fliers, WRF load time, output queue depth, resident memory) in
+       Prometheus text exposition format, refreshed at most every
+       sim.metrics_interval wall-clock seconds: rewritten as a file in the summary
+       directory (sim.metrics_export = 'file') or served on a local HTTP port
+       (sim.metrics_export = 'http', sim.metrics_port)."""
+
+    def __init__(self, sim, clock):
+        self.mode = sim.metrics_export
+        if sim.experiment_number:
+            run = '%s_%s' % (str(sim.experiment_number).zfill(2),
+                             str(sim.simulation_number).zfill(5))
+            self.fname = '%s_simulation_%s_summary/metrics_%s.prom' % \
+                (sim.simulation_name, run, run)
+        else:
+            run = str(sim.simulation_number).zfill(5)
+            self.fname = '%s_simulation_%s_summary/metrics_%s.prom' % \
+                (sim.simulation_name, run, run)
+        self.labels = 'simulation="%s",run="%s"' % (sim.simulation_name, run)
+        self.interval = sim.metrics_interval
+        self.end_s = clock.end_s
+        self.start = time.time()
+        self.last_export = None
+        self.last_steps = 0
+        self.n_steps = 0
+        self.wrf_load_s = 0.0
+        self.text = ''
+        self.lock = threading.Lock()
+        self.server = None
+        if self.mode == 'http':
+            self.server = ThreadingHTTPServer(('127.0.0.1', sim.metrics_port), MetricsHandler)
+            self.server.metrics_text = self.metrics_text
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return
+
+    def add_wrf_load(self, seconds):
+        """Add wall-clock time spent loading WRF grids (e.g. before the time loop)."""
+        self.wrf_load_s += seconds
+        return
+
+    @contextmanager
+    def wrf_load(self):
+        """Time one WRF grid load or swap: 'with metrics.wrf_load():'."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_wrf_load(time.perf_counter() - start)
+
+    def metrics_text(self):
+        """Latest metrics, in Prometheus text exposition format."""
+        with self.lock:
+            return self.text  # str
+
+    def update(self, clock, fliers, output_writer):
+        """Count a completed time step; refresh the metrics if due."""
+        self.n_steps += 1
+        if self.mode is None:
+            return
+        if (self.last_export is None) or (time.time() - self.last_export >= self.interval):
+            self.export(clock, fliers, output_writer)
+        return
+
+    def export(self, clock, fliers, output_writer, completed=False):
+        """Refresh the metrics text (and file)."""
+        now = time.time()
+        if self.last_export is None:
+            steps_per_s = self.n_steps / max(now - self.start, 1.0e-9)
+        else:
+            steps_per_s = (self.n_steps - self.last_steps) / max(now - self.last_export, 1.0e-9)
+        self.last_export = now
+        self.last_steps = self.n_steps
+        values = {'atm_simulated_seconds': [('', clock.current_s)],
+                  'atm_simulated_end_seconds': [('', self.end_s)],
+                  'atm_wall_seconds': [('', now - self.start)],
+                  'atm_steps_total': [('', self.n_steps)],
+                  'atm_steps_per_second': [('', steps_per_s)],
+                  'atm_last_step_timestamp_seconds': [('', now)],
+                  'atm_fliers': [(',state="%s"' % state, count) for state, count
+                                 in sorted(Counter(flier.state
+                                                   for flier in fliers.values()).items())],
+                  'atm_fliers_airborne': [('', sum(flier.alt_AGL > 0.0
+                                                   for flier in fliers.values()))],
+                  'atm_wrf_load_seconds_total': [('', self.wrf_load_s)],
+                  'atm_output_queue_depth': [('', output_writer.queue_depth())],
+                  'atm_resident_memory_bytes': [('', resident_set_size())],
+                  'atm_completed': [('', int(completed))]}
+        lines = list()
+        for name, metric_type, help_text in RUN_METRICS:
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s %s' % (name, metric_type))
+            for labels, value in values[name]:
+                lines.append('%s{%s%s} %s' % (name, self.labels, labels, repr(float(value))))
+        with self.lock:
+            self.text = '\n'.join(lines) + '\n'
+        if self.mode == 'file':
+            with open(self.fname + '.tmp', 'w') as metricsfile:
+                metricsfile.write(self.text)
+            os.replace(self.fname + '.tmp', self.fname)
+        return
+
+    def close(self, clock, fliers, output_writer):
+        """Final metrics at end of time loop; stop serving."""
+        if self.mode is None:
+            return
+        self.export(clock, fliers, output_writer, completed=True)
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        destination = self.fname.split('/')[-1] if self.mode == 'file' else 'http'
+        LOGGER.info('%s : final run metrics exported (%s)', clock.current_dt_str, destination)
+        return
+
+# end RunMetrics_class.py
@@ -83,8 +83,10 @@ class SBW:
         return nu_L
 
     def calc_nu_T(self, T):
-        """Regniere et al. [2019]."""
+        """Regniere et al. [2019]; T may be a scalar or an array."""
         nu_T = self.nu_max / (1.0 + np.exp(-1 * self.b * (T - self.a)))
+        if np.ndim(nu_T):
+            return np.where(nu_T < 20.0, 0.0, nu_T)  # array
         if nu_T < 20.0:
             nu_T = 0.0
         return nu_T
@@ -0,0 +1,105 @@
+# pylint: disable=C0103,R0205,R1711,W0603
+"""
+Python script "Sim_logging.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import json
+import logging
+import sys
+
+
+# simulation log: setup and wrap-up messages and per-step summaries at INFO,
+#   routine per-step messages at DEBUG, problems at WARNING/ERROR
+LOGGER = logging.getLogger('ATM')
+
+# per-Flier messages (e.g. removal), rate limited per time step
+FLIER_LOGGER = logging.getLogger('ATM.fliers')
+
+# per-step summary line format: 'text' or 'json'
+STEP_FORMAT = 'text'
+
+
+class FlierRateLimit(logging.Filter):
+    """Pass at most max_per_step per-Flier messages per time step (-1: no limit),
+       counting the messages suppressed."""
+
+    def __init__(self, max_per_step=-1):
+        super().__init__()
+        self.max_per_step = max_per_step
+        self.n_step = 0
+        self.n_suppressed = 0
+        return
+
+    def filter(self, record):
+        self.n_step += 1
+        if (self.max_per_step < 0) or (self.n_step <= self.max_per_step):
+            return True
+        self.n_suppressed += 1
+        return False
+
+    def reset(self):
+        """Start counting for a new time step; number of messages suppressed."""
+        n_suppressed = self.n_suppressed
+        self.n_step = 0
+        self.n_suppressed = 0
+        return n_suppressed  # int
+
+
+RATE_LIMIT = FlierRateLimit()
+FLIER_LOGGER.addFilter(RATE_LIMIT)
+
+
+def configure_logging(level='INFO', log_file=None, step_format='text', max_flier_messages=-1):
+    """Set simulation log level, destination (stdout or log file), per-step
+       summary format and per-Flier message limit."""
+    global STEP_FORMAT
+    if log_file:
+        handler = logging.FileHandler(log_file, mode='w')
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for old_handler in list(LOGGER.handlers):
+        LOGGER.removeHandler(old_handler)
+        old_handler.close()
+    LOGGER.addHandler(handler)
+    LOGGER.setLevel(level)
+    LOGGER.propagate = False
+    STEP_FORMAT = step_format
+    RATE_LIMIT.max_per_step = max_flier_messages
+    RATE_LIMIT.reset()
+    return
+
+
+def end_log_step(clock):
+    """Report per-Flier messages suppressed during the current time step."""
+    n_suppressed = RATE_LIMIT.reset()
+    if n_suppressed:
+        LOGGER.info('%s : %d further per-flier messages suppressed',
+                    clock.current_dt_str, n_suppressed)
+    return
+
+
+def log_step_summary(clock, name, summary):
+    """Log one compact per-step summary record (dict of counts) as a text line
+       ('<time> : <name> key=value ...') or a JSON line."""
+    if STEP_FORMAT == 'json':
+        record = {'time': clock.current_dt_str, 'record': name}
+        record.update(summary)
+        LOGGER.info(json.dumps(record, separators=(',', ':')))
+    else:
+        LOGGER.info('%s : %s %s', clock.current_dt_str, name,
+                    ' '.join('%s=%s' % (key, val) for key, val in summary.items()))
+    return
+
+
+# defaults until the simulation log is configured (e.g. in tests and postprocessing)
+configure_logging()
+
+# end Sim_logging.py
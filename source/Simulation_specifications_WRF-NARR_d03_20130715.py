@@ -46,6 +46,15 @@ class Simulation(object):
         # other simulation time specifications
         self.dt = 60                  # [s]
         self.UTC_offset = -4.0        # [h] --> Eastern Daylight Time
+        # grounded fliers sleep until liftoff conditions/sunrise/readiness can be met
+        #   (sleeping fliers are not re-evaluated and record no per-step status rows)
+        self.use_wake_queue = False
+        # jump ahead while no flier is airborne (requires use_wake_queue); skipped time
+        #   steps produce no per-step location outputs or status rows
+        self.adaptive_dt = False
+        self.adaptive_output_interval = 15  # [min] max. jump, for ground-phase outputs
+        # end simulation once no remaining flier can change state before its end
+        self.early_termination = False
         #
         # ancillary maps
         self.topography_fname = 'WRF'  # 'WRF' or GeoTIFF file name
@@ -89,6 +98,10 @@ class Simulation(object):
         # energy conservation
         self.delta_nu = 1.0          # cruising altitude adjustment factor
         #
+        # trajectory integrator options: 'euler' (forward), 'rk2' (midpoint), 'rk4'
+        self.flight_integrator = 'euler'
+        self.flight_step_doubling = False  # step-doubling error estimate (rk2/rk4 only)
+        #
         # non-calibration flight parameters
         self.climb_decision_hgt = 60.0  # [m AGL] from Greenbank (1980)
         self.min_flight_speed = 1.0     # minimum ground-relative flight speed [m/s]
@@ -105,11 +118,78 @@ class Simulation(object):
         self.radar_grid_sw_east, self.radar_grid_ne_east = 481000.0, 726000.0
         self.radar_grid_sw_north, self.radar_grid_ne_north = 5249000.0, 5493000.0
         self.radar_grid_dx, self.radar_grid_dy = 1000.0, 1000.0
+        # additional radars gridded from the same simulation, as dicts keyed like
+        # the radar_* attributes above (unspecified values follow the primary
+        # radar), e.g. {'radar_name': ..., 'radar_lat': ..., 'radar_lon': ...,
+        #               'radar_grid_sw_east': ..., 'radar_grid_ne_east': ...,
+        #               'radar_grid_sw_north': ..., 'radar_grid_ne_north': ...}
+        self.extra_radars = list()
+        #
+        # for flight status records
+        self.status_chunk_size = 65536  # records per column chunk
+        self.status_spill = True  # keep filled chunks in a temporary file, not in memory
+        # 'all' or 'changes' (transitions/samples/moves only; skipped records repeat the
+        #   last stored record, including its environment values, on reading)
+        self.status_recording = 'all'
+        self.status_sample_interval = 900  # [s] max. time between stored records, 0 = none
+        self.status_position_tol = 0.0  # [m] store record on position/altitude change
+        self.status_output = 'store'  # 'store' (run-level binary file) or 'csv' (per flier)
+        #
+        # for flier location records
+        # 'csv' (locs_*.csv per step, as read by the postprocess scripts) or 'store'
+        #   (run-level binary file; convert with postprocess/convert_location_store.py)
+        self.location_output = 'csv'
         #
         # for output grids
         self.npy_grids = False
+        # 'npy' (dens_/dvel_*_grid.npy per step) or 'cube' (run-level sparse .npz, read by
+        #   combine_dens_grids.py and combine_dvel_grids.py)
+        self.radar_grid_output = 'npy'
+        #
+        # per-time-step output cadence for 'locations' and 'radar_grids': N (every N-th
+        # time step), list of UTC times ('HH:MM' daily or ISO), or scan schedule file name
+        self.output_cadence = {'locations': 1, 'radar_grids': 1}
+        #
+        # for output writing (all simulation outputs, incl. run-level stores, plots and
+        #   profiles, written by background threads; only log files and the live
+        #   metrics file are written directly)
+        self.output_sink = 'files'  # 'files', 'archive' (run-level .zip), 'memory', 'null'
+        self.output_workers = 1  # writer threads (0: write outputs immediately)
+        self.output_queue_size = 64  # outputs queued before the simulation waits
+        #
+        # for log output
+        self.log_level = 'INFO'  # 'DEBUG' adds routine per-step and per-file messages
+        self.log_quiet = False  # warnings and errors only
+        self.log_file = None  # None (stdout) or log file name
+        self.log_step_format = 'text'  # per-step summary lines: 'text' or 'json'
+        self.log_flier_messages = 20  # max. per-flier messages per time step (-1: no limit)
+        #
+        # for time loop phase timing (JSON timing report at wrap-up)
+        self.phase_timing = True
+        self.timing_per_step = False  # also per-step timing records (JSON lines)
+        #
+        # for opt-in time loop profiling (or command line --profile=MODE[,START,END])
+        self.profile_mode = None  # None, 'cprofile' (deterministic) or 'sampling'
+        self.profile_window = None  # (start, end) UTC times ('HH:MM' or ISO); None: all
+        self.profile_interval = 0.005  # [s] wall-clock sampling interval for 'sampling'
+        #
+        # for memory diagnostics (tracemalloc snapshots; slows the simulation)
+        self.memory_diagnostics = False
+        self.memory_snapshot_steps = 60  # snapshot every N steps (0: only at WRF swaps, end)
+        self.memory_top_sites = 25  # allocation sites reported per snapshot
+        self.memory_trace_frames = 1  # call stack frames kept per allocation
+        #
+        # for live run metrics (Prometheus text format)
+        self.metrics_export = None  # None, 'file' (summary directory) or 'http' (local port)
+        self.metrics_interval = 10.0  # [s] wall-clock time between metrics refreshes
+        self.metrics_port = 9108  # local HTTP port for 'http'
         #
         # for output maps
+        # single-flight plots: 'sync', 'pool' (worker processes during the simulation;
+        #   failed plots are counted, not raised), 'deferred' (worker pool at wrap-up), 'off'
+        self.flight_plots = 'sync'
+        self.flight_plot_workers = 2  # worker processes for 'pool'/'deferred' plots
+        self.flight_plot_sample = 1.0  # fraction of flights plotted
         self.plot_bottom_lat, self.plot_top_lat = 44.0, 51.0
         self.plot_left_lon, self.plot_right_lon = -73.0, -64.0
 
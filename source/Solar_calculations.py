@@ -154,18 +154,21 @@ class Sun(object):
         self.sunset_t = self.solarnoon_t + hourangle * 4.0 / 1440.0
 
 
+def utc_suntimes(clock, lat, lon):
+    """Sunset (on the simulation start date) and sunrise (on the simulation end date)
+       times in UTC at the given location, as datetime objects."""
+    sun = Sun(lat=lat, lon=lon, UTC_offset=clock.UTC_offset)
+    utc_sunset_time = sun.sunset(when=clock.start_dt).replace(tzinfo=tz.utc)
+    utc_sunrise_time = sun.sunrise(when=clock.end_dt).replace(tzinfo=tz.utc)
+    return utc_sunset_time, utc_sunrise_time  # 2 * datetime
+
+
 def update_suntimes(clock, flier):
-    """Update sunset/sunrise times based on location."""
-    sun = Sun(lat=flier.lat, lon=flier.lon, UTC_offset=clock.UTC_offset)
-    flier.local_sunset_time = sun.sunset(when=clock.start_dt) + \
-        timedelta(hours=clock.UTC_offset)
-    flier.utc_sunset_time = flier.local_sunset_time - \
-        timedelta(hours=clock.UTC_offset)
-    flier.utc_sunset_time = flier.utc_sunset_time.replace(tzinfo=tz.utc)
-    flier.local_sunrise_time = sun.sunrise(when=clock.end_dt) + \
-        timedelta(hours=clock.UTC_offset)
-    flier.utc_sunrise_time = flier.local_sunrise_time - \
-        timedelta(hours=clock.UTC_offset)
-    flier.utc_sunrise_time = flier.utc_sunrise_time.replace(tzinfo=tz.utc)
+    """Update sunset/sunrise times (integer seconds since simulation start) based on
+       location."""
+    utc_sunset_time, utc_sunrise_time = utc_suntimes(clock, flier.lat, flier.lon)
+    flier.sunset_s = clock.seconds(utc_sunset_time)
+    flier.sunrise_s = clock.seconds(utc_sunrise_time)
+    return
 
 # end Solar_calculations.py
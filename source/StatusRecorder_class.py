@@ -0,0 +1,284 @@
+# pylint: disable=C0103,R0205,R0902,R0913,R0914,R1711
+"""
+Python script "StatusRecorder_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import tempfile
+import numpy as np
+import pandas as pd
+from Flier_summary import flight_status_columns
+
+
+# Flier states, as stored in integer state codes
+FLIER_STATES = ['NONE', 'INITIALIZED', 'OVIPOSITION', 'READY', 'LIFTOFF', 'FLIGHT',
+                'LANDING_W', 'LANDING_T', 'LANDING_P', 'LANDING_S', 'CRASH', 'HOST',
+                'FOREST', 'NONFOREST', 'SUNRISE', 'SPENT', 'SPLASHED', 'EXIT',
+                'MAXFLIGHTS', 'EXHAUSTED']
+STATE_CODES = {state: code for code, state in enumerate(FLIER_STATES)}
+
+# Flier attribute recorded in each flight status column
+STATUS_ATTRIBUTES = {'flight_status': 'flight_status_idx', 'northing': 'northing',
+                     'easting': 'easting', 'UTM_zone': 'UTM_zone', 'lat': 'lat', 'lon': 'lon',
+                     'sfc_elev': 'sfc_elev', 'alt_AGL': 'alt_AGL', 'alt_MSL': 'alt_MSL',
+                     'defoliation': 'defoliation_level', 'sex': 'sex', 'M': 'mass',
+                     'A': 'forewing_A', 'F_0': 'fecundity_0', 'F': 'fecundity',
+                     'gravidity': 'gravidity', 'nu': 'nu', 'nu_L': 'nu_L', 'v_h': 'v_h',
+                     'v_x': 'v_x', 'v_y': 'v_y', 'v_z': 'v_z', 'v_r': 'v_radial',
+                     'v_a': 'v_azimuthal', 'bearing': 'bearing', 'range': 'flight_range',
+                     'P': 'P', 'T': 'T', 'Precip': 'Precip', 'GpH': 'GpH', 'U': 'U',
+                     'V': 'V', 'W': 'W'}
+
+# column types: integer codes and times in compact integer types, environment and
+#   motion values in single precision, positions and Flier biology (all other
+#   columns) at full precision
+STATUS_DTYPES = {'flight_status': np.int32, 'date_time': np.int64, 'prev_state': np.int8,
+                 'state': np.int8, 'UTM_zone': np.int16, 'sex': np.int8}
+STATUS_DTYPES.update({col: np.float32 for col in ['v_h', 'v_x', 'v_y', 'v_z', 'v_r', 'v_a',
+                                                  'bearing', 'P', 'T', 'Precip', 'GpH',
+                                                  'U', 'V', 'W']})
+
+
+def expand_status(data, n_updates, dt_interval):
+    """Reconstruct every status update of a Flier from its stored records (column
+       arrays including flight_status and date_time): skipped updates repeat the last
+       stored record, including its environment values, one regular time step apart."""
+    k_stored = data['flight_status']
+    k_all = np.arange(n_updates, dtype=k_stored.dtype)
+    if len(k_all) == len(k_stored):
+        return data  # dict
+    src = np.searchsorted(k_stored, k_all, side='right') - 1
+    full = {col: values[src] for col, values in data.items()}
+    full['flight_status'] = k_all
+    full['date_time'] = data['date_time'][src] + (k_all - k_stored[src]) * dt_interval
+    return full  # dict
+
+
+class StatusRecorder(object):
+    """Population-wide flight status record, one growable (chunked) array per
+       flight_status_columns() field. Times are integer seconds since simulation
+       start and states are integer codes; each record is linked to the previous
+       record of the same Flier, so a single Flier's history is read without
+       scanning the whole population record.
+       Recording policy 'all' stores every Flier status update; 'changes' stores
+       an update only on a state transition, after status_sample_interval seconds,
+       when position or altitude changes by more than status_position_tol meters,
+       or after an irregular time step (sleeping Flier, adaptive step). Skipped
+       updates are reconstructed on reading by carrying the last record forward
+       (see expand_status), so they repeat its environment values.
+       With status_spill, filled chunks are moved to a temporary file and read
+       back through memory maps, so only the chunk being filled stays in memory.
+       Records of released (removed) Fliers are dropped by compacting the live
+       records into new chunks once they make up less than half of the records."""
+
+    def __init__(self, sim):
+        self.chunk_size = sim.status_chunk_size
+        self.policy = sim.status_recording
+        self.sample_interval = sim.status_sample_interval
+        self.position_tol = sim.status_position_tol
+        self.dt_interval = sim.dt
+        self.spill = sim.status_spill
+        self.spillfile = None
+        self.columns = flight_status_columns()
+        self.dtypes = {col: STATUS_DTYPES.get(col, np.float64) for col in self.columns}
+        self.dtypes['flier'] = np.int32
+        self.dtypes['prev_row'] = np.int64
+        self.chunks = {col: list() for col in self.dtypes}
+        self.n_records = 0
+        self.n_live = 0  # records not yet released
+        #
+        # Flier registry: integer index per Flier, and per Flier the last record row,
+        # the number of status updates, and the time of the last status update
+        self.flier_ids = list()
+        self.last_row = np.zeros(0, dtype=np.int64)
+        self.n_updates = np.zeros(0, dtype=np.int64)
+        self.last_update_s = np.zeros(0, dtype=np.int64)
+        return
+
+    def __len__(self):
+        return self.n_records
+
+    def register(self, flier):
+        """Assign integer index to Flier and attach this recorder."""
+        flier.recorder = self
+        flier.recorder_idx = len(self.flier_ids)
+        self.flier_ids.append(flier.flier_id)
+        if flier.recorder_idx == len(self.last_row):
+            n_new = max(1, len(self.last_row))
+            self.last_row = np.append(self.last_row, np.zeros(n_new, dtype=np.int64))
+            self.n_updates = np.append(self.n_updates, np.zeros(n_new, dtype=np.int64))
+            self.last_update_s = np.append(self.last_update_s,
+                                           np.zeros(n_new, dtype=np.int64))
+        self.last_row[flier.recorder_idx] = -1
+        self.n_updates[flier.recorder_idx] = 0
+        return
+
+    def add_chunk(self):
+        """Allocate next chunk of records for all columns (spilling the filled
+           chunk, as indicated)."""
+        for col, dtype in self.dtypes.items():
+            if self.spill and self.chunks[col]:
+                self.chunks[col][-1] = self.spill_chunk(self.chunks[col][-1])
+            self.chunks[col].append(np.zeros(self.chunk_size, dtype=dtype))
+        return
+
+    def spill_chunk(self, chunk):
+        """Move a filled chunk to the spill file; read-only memory map of it."""
+        if self.spillfile is None:
+            self.spillfile = tempfile.TemporaryFile()
+        offset = self.spillfile.seek(0, 2)
+        self.spillfile.write(chunk.tobytes())
+        self.spillfile.flush()
+        return np.memmap(self.spillfile, dtype=chunk.dtype, mode='r', offset=offset,
+                         shape=chunk.shape)  # numpy memmap
+
+    def status_changed(self, flier, clock):
+        """Check if Flier status update must be stored under the 'changes' policy."""
+        f = flier.recorder_idx
+        row = self.last_row[f]
+        if row < 0:
+            return True
+        if clock.current_s - self.last_update_s[f] != self.dt_interval:
+            return True
+        c, r = divmod(row, self.chunk_size)
+        chunks = self.chunks
+        if chunks['state'][c][r] != STATE_CODES[flier.state]:
+            return True
+        if chunks['prev_state'][c][r] != STATE_CODES[flier.prev_state]:
+            return True
+        if self.sample_interval and \
+                (clock.current_s - chunks['date_time'][c][r] >= self.sample_interval):
+            return True
+        for col in ['easting', 'northing', 'alt_MSL', 'alt_AGL']:
+            if abs(getattr(flier, col) - chunks[col][c][r]) > self.position_tol:
+                return True
+        return False
+
+    def record(self, flier, clock):
+        """Record current Flier status at the current time step, per recording policy."""
+        f = flier.recorder_idx
+        store = (self.policy == 'all') or self.status_changed(flier, clock)
+        self.n_updates[f] += 1
+        self.last_update_s[f] = clock.current_s
+        if not store:
+            return
+        c, r = divmod(self.n_records, self.chunk_size)
+        if c == len(self.chunks['flier']):
+            self.add_chunk()
+        chunks = self.chunks
+        chunks['flier'][c][r] = flier.recorder_idx
+        chunks['prev_row'][c][r] = self.last_row[flier.recorder_idx]
+        chunks['date_time'][c][r] = clock.current_s
+        for col, attr in STATUS_ATTRIBUTES.items():
+            chunks[col][c][r] = getattr(flier, attr)
+        chunks['prev_state'][c][r] = STATE_CODES[flier.prev_state]
+        chunks['state'][c][r] = STATE_CODES[flier.state]
+        self.last_row[flier.recorder_idx] = self.n_records
+        self.n_records += 1
+        self.n_live += 1
+        return
+
+    def flier_rows(self, flier_idx):
+        """Record rows for indicated Flier, in time order."""
+        rows = list()
+        row = self.last_row[flier_idx]
+        while row >= 0:
+            rows.append(row)
+            c, r = divmod(row, self.chunk_size)
+            row = self.chunks['prev_row'][c][r]
+        return np.array(rows[::-1], dtype=np.int64)  # numpy 1D array
+
+    def gather(self, col, rows):
+        """Values of one column at the indicated record rows."""
+        c_idx, r_idx = np.divmod(rows, self.chunk_size)
+        values = np.zeros(len(rows), dtype=self.dtypes[col])
+        for c in np.unique(c_idx):
+            mask = c_idx == c
+            values[mask] = self.chunks[col][c][r_idx[mask]]
+        return values  # numpy 1D array
+
+    def expand(self, flier_idx, data):
+        """Reconstruct every status update of a Flier from its stored records."""
+        return expand_status(data, self.n_updates[flier_idx], self.dt_interval)  # dict
+
+    def flier_columns(self, flier_idx, columns, expand=True):
+        """Indicated columns of a Flier's flight status history, one value per
+           status update (times as integer seconds, states as integer codes), or
+           only the stored records if expand is False."""
+        columns = list(columns)
+        if 'flight_status' not in columns:
+            columns.append('flight_status')
+        if 'date_time' not in columns:
+            columns.append('date_time')
+        rows = self.flier_rows(flier_idx)
+        data = {col: self.gather(col, rows) for col in columns}
+        if not expand:
+            return data  # dict
+        return self.expand(flier_idx, data)  # dict
+
+    def flier_frame(self, flier_idx, clock=None):
+        """Flight status history of indicated Flier as a DataFrame with
+           flight_status_columns(), one row per status update; with clock, times
+           are given as ISO strings and states as names (for output), otherwise as
+           integer codes."""
+        data = self.flier_columns(flier_idx, self.columns)
+        if clock is not None:
+            data['date_time'] = [clock.isoformat(s) for s in data['date_time']]
+            for col in ['prev_state', 'state']:
+                data[col] = [FLIER_STATES[code] for code in data[col]]
+        flier_id = self.flier_ids[flier_idx]
+        index = ['%s_%s' % (flier_id, str(idx).zfill(7)) for idx in data['flight_status']]
+        return pd.DataFrame(data, index=index, columns=self.columns)  # DataFrame
+
+    def release(self, flier_idx):
+        """Drop a (removed) Flier's history; records are compacted once less than
+           half of them are live."""
+        self.n_live -= len(self.flier_rows(flier_idx))
+        self.last_row[flier_idx] = -1
+        self.n_updates[flier_idx] = 0
+        if (self.n_records > self.chunk_size) and (2 * self.n_live < self.n_records):
+            self.compact()
+        return
+
+    def compact(self):
+        """Move the live records (those of unreleased Fliers) into new chunks, in
+           record order, renumbering record rows and links; released records are
+           freed."""
+        live = self.last_row[self.gather('flier', np.arange(self.n_records))] >= 0
+        live_rows = np.flatnonzero(live)
+        n_chunks = max(1, -(-len(live_rows) // self.chunk_size))
+        old_spillfile, self.spillfile = self.spillfile, None
+        for col, dtype in self.dtypes.items():
+            values = self.gather(col, live_rows)
+            if col == 'prev_row':  # old row numbers of live records, in increasing order
+                linked = values >= 0
+                values[linked] = np.searchsorted(live_rows, values[linked])
+            chunks = list()
+            for c in range(n_chunks):
+                chunk = np.zeros(self.chunk_size, dtype=dtype)
+                part = values[c * self.chunk_size:(c + 1) * self.chunk_size]
+                chunk[:len(part)] = part
+                if self.spill and (c < n_chunks - 1):
+                    chunk = self.spill_chunk(chunk)
+                chunks.append(chunk)
+            self.chunks[col] = chunks
+        if old_spillfile is not None:
+            old_spillfile.close()
+        linked = self.last_row >= 0
+        self.last_row[linked] = np.searchsorted(live_rows, self.last_row[linked])
+        self.n_records = len(live_rows)
+        self.n_live = len(live_rows)
+        return
+
+    def nbytes(self):
+        """Memory currently allocated for records (not counting spilled chunks)."""
+        return sum(chunk.nbytes for chunks in self.chunks.values() for chunk in chunks
+                   if not isinstance(chunk, np.memmap))
+
+# end StatusRecorder_class.py
@@ -0,0 +1,122 @@
+# pylint: disable=C0103,R0205,R0902,R0913,R0914,R1711
+"""
+Python script "StatusStore_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import json
+from datetime import timedelta
+import iso8601
+import numpy as np
+import pandas as pd
+from OutputWriter_class import write_output
+from StatusRecorder_class import FLIER_STATES, expand_status
+from Sim_logging import LOGGER
+
+
+class StatusStore(object):
+    """Run-level append-only store of Flier flight status histories.
+       Each removed Flier's history is appended as one contiguous block of
+       fixed-width binary records (<prefix>.bin), as stored by the recorder (i.e.
+       only the stored records under the 'changes' recording policy); the block
+       offset and length and the number of status updates are appended to an index
+       sidecar (<prefix>_index.csv), and the record layout is described once in
+       <prefix>_meta.json. Times are stored as integer seconds since simulation
+       start and states as integer codes; skipped status updates are reconstructed
+       on reading. All store files are written through the output writer."""
+
+    def __init__(self, sim, clock, recorder):
+        if sim.experiment_number:
+            self.prefix = '%s_simulation_%s_%s_output/flier_status_%s_%s' % \
+                (sim.simulation_name, str(sim.experiment_number).zfill(2),
+                 str(sim.simulation_number).zfill(5), str(sim.experiment_number).zfill(2),
+                 str(sim.simulation_number).zfill(5))
+        else:
+            self.prefix = '%s_simulation_%s_output/flier_status_%s' % \
+                (sim.simulation_name, str(sim.simulation_number).zfill(5),
+                 str(sim.simulation_number).zfill(5))
+        self.columns = recorder.columns
+        self.dtype = np.dtype([(col, recorder.dtypes[col]) for col in self.columns])
+        self.n_records = 0
+        self.n_fliers = 0
+        #
+        meta = {'columns': self.columns,
+                'dtypes': [np.dtype(recorder.dtypes[col]).str for col in self.columns],
+                'states': FLIER_STATES, 'start_dt': clock.start_dt_str,
+                'dt_interval': clock.dt_interval}
+        write_output('text', '%s_meta.json' % self.prefix, json.dumps(meta, indent=1))
+        write_output('append', '%s_index.csv' % self.prefix,
+                     b'flier_id,offset,n_records,n_updates\n')
+        write_output('append', '%s.bin' % self.prefix, b'')
+        return
+
+    def append(self, recorder, flier_idx):
+        """Append one Flier's stored status records from the recorder."""
+        data = recorder.flier_columns(flier_idx, self.columns, expand=False)
+        records = np.zeros(len(data['flight_status']), dtype=self.dtype)
+        for col in self.columns:
+            records[col] = data[col]
+        write_output('append', '%s.bin' % self.prefix, records.tobytes())
+        line = '%s,%d,%d,%d\n' % (recorder.flier_ids[flier_idx], self.n_records, len(records),
+                                  recorder.n_updates[flier_idx])
+        write_output('append', '%s_index.csv' % self.prefix, line.encode('utf-8'))
+        self.n_records += len(records)
+        self.n_fliers += 1
+        return
+
+    def close(self):
+        """Report the store contents at end of simulation."""
+        LOGGER.info('simulation wrapup : wrote %d flier status histories (%d records) to %s.bin',
+                    self.n_fliers, self.n_records, self.prefix.split('/')[-1])
+        return
+
+
+def read_status_meta(prefix):
+    """Record layout and time reference of a status store."""
+    with open('%s_meta.json' % prefix, 'r') as metafile:
+        meta = json.load(metafile)
+    dtype = np.dtype([(col, dt) for col, dt in zip(meta['columns'], meta['dtypes'])])
+    return meta, dtype  # dict + numpy dtype
+
+
+def read_status_index(prefix):
+    """Flier index (offset, number of records and number of status updates per Flier)
+       of a status store."""
+    index_df = pd.read_csv('%s_index.csv' % prefix, index_col='flier_id', dtype={'flier_id': str})
+    return index_df  # DataFrame
+
+
+def read_flier_status(prefix, flier_id, iso_times=True):
+    """Read one Flier's flight status history from a status store, as in the
+       per-Flier report CSV (ISO times and state names) or with integer times
+       and state codes if iso_times is False; one row per status update."""
+    meta, dtype = read_status_meta(prefix)
+    index_df = read_status_index(prefix)
+    offset, n_records, n_updates = index_df.loc[flier_id, ['offset', 'n_records', 'n_updates']]
+    records = np.fromfile('%s.bin' % prefix, dtype=dtype, count=int(n_records),
+                          offset=int(offset) * dtype.itemsize)
+    data = {col: records[col] for col in meta['columns']}
+    data = expand_status(data, int(n_updates), meta['dt_interval'])
+    if iso_times:
+        start_dt = iso8601.parse_date(meta['start_dt'])
+        data['date_time'] = [(start_dt + timedelta(seconds=int(s))).isoformat()
+                             for s in data['date_time']]
+        for col in ['prev_state', 'state']:
+            data[col] = [meta['states'][code] for code in data[col]]
+    index = ['%s_%s' % (flier_id, str(idx).zfill(7)) for idx in data['flight_status']]
+    return pd.DataFrame(data, index=index, columns=meta['columns'])  # DataFrame
+
+
+def export_flier_status_csv(prefix, flier_id, outfname):
+    """Write one Flier's flight status history from a status store as a report CSV."""
+    status_df = read_flier_status(prefix, flier_id)
+    write_output('csv', outfname, status_df)
+    return
+
+# end StatusStore_class.py
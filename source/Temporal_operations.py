@@ -12,29 +12,33 @@ Copyright (C) 2021 by Matthew Garcia
 
 import copy
 from datetime import timedelta
+import numpy as np
 from WRFgrids_class import WRFgrids
 from Interpolation import interpolate_time
 from Solar_calculations import update_suntimes
-from Circadian_calculations import calc_circadian_p
+from Circadian_calculations import calc_circadian_p, calc_circadian_ready_time
+from WakeQueue_class import calc_liftoff_wake_times
+from Trajectory_calculations import integrate_flier_trajectories
+from Sim_logging import LOGGER, FLIER_LOGGER
 
 
 def count_active_fliers(sim, clock, fliers, output=True):
     """Report count of active fliers in simulation."""
     n_active = sum(flier.active for flier in fliers.values())
     if output:
-        print('%s : %d active fliers (of %d specified)' %
-              (clock.current_dt_str, n_active, sim.n_fliers))
+        LOGGER.info('%s : %d active fliers (of %d specified)', clock.current_dt_str, n_active,
+                    sim.n_fliers)
     return n_active  # int
 
 
 def end_sim_no_flights(sim, clock, fliers):
     """If no flights occur by 5 hours into simulation, end simulation."""
     end_sim = False
-    if clock.elapsed_time.seconds >= (5 * 60 * 60):
+    if clock.current_s >= (5 * 60 * 60):
         n_active = count_active_fliers(sim, clock, fliers, output=False)
         if not n_active:
-            print('%s : no active fliers remain' % clock.current_dt_str)
-            print('%s : ending simulation' % clock.current_dt_str)
+            LOGGER.info('%s : no active fliers remain', clock.current_dt_str)
+            LOGGER.info('%s : ending simulation', clock.current_dt_str)
             end_sim = True
     return end_sim  # bool
 
@@ -49,8 +53,27 @@ def end_sim_no_fliers(fliers, clock):
                            'SPLASHED', 'EXIT', 'MAXFLIGHTS', 'EXHAUSTED']:
             n_fliers += 1
     if not n_fliers:
-        print('%s : no fliers remain' % clock.current_dt_str)
-        print('%s : ending simulation' % clock.current_dt_str)
+        LOGGER.info('%s : no fliers remain', clock.current_dt_str)
+        LOGGER.info('%s : ending simulation', clock.current_dt_str)
+        end_sim = True
+    return end_sim  # bool
+
+
+def end_sim_no_future_flights(sim, clock, fliers):
+    """If early termination is indicated, end simulation once no remaining flier can
+       change state before the simulation end: no fliers remain, or every remaining
+       flier is 'INITIALIZED'/'OVIPOSITION' and reaches circadian readiness only after
+       the simulation end. Flier states are left as the fixed time loop would leave
+       them; the remaining time steps (and their per-step records) are skipped."""
+    end_sim = False
+    if sim.early_termination:
+        for flier in fliers.values():
+            if flier.state not in ['INITIALIZED', 'OVIPOSITION']:
+                return end_sim  # bool
+            if calc_circadian_ready_time(clock, flier) <= clock.end_s:
+                return end_sim  # bool
+        LOGGER.info('%s : no further flier state changes are possible', clock.current_dt_str)
+        LOGGER.info('%s : ending simulation', clock.current_dt_str)
         end_sim = True
     return end_sim  # bool
 
@@ -58,46 +81,55 @@ def end_sim_no_fliers(fliers, clock):
 def query_flier_environments(sim, clock, wrf_time, wrf_grids, flier_locations,
                              topography, landcover):
     """Get environmental variables for all fliers."""
-    print('%s : querying flier environments using %s WRF grids' %
-          (clock.current_dt_str, str(wrf_time.isoformat())))
+    LOGGER.debug('%s : querying flier environments using %s WRF grids', clock.current_dt_str,
+                 str(wrf_time.isoformat()))
     flier_environments = \
         wrf_grids.get_flier_environments(sim, flier_locations,
                                          topography, landcover)
     return flier_environments  # dict
 
 
-def update_flier_environments(clock, fliers, environments):
+def update_flier_environments(clock, fliers, environments, wake_queue=None):
     """Update flier accounts of environmental variables."""
-    print('%s : updating flier environments' % clock.current_dt_str)
+    LOGGER.debug('%s : updating flier environments', clock.current_dt_str)
     for flier_id, flier in fliers.items():
+        if wake_queue and wake_queue.is_asleep(flier_id):
+            continue
         env = environments[flier_id]
         flier.update_environment(env[3:])
     return
 
 
 def interpolate_flier_environments(clock, fliers, environments_last,
-                                   environments_next, last_wrf_time, next_wrf_time):
+                                   environments_next, last_wrf_time, next_wrf_time,
+                                   wake_queue=None):
     """Interpolate between two sets of WRF grids for flier environments."""
-    print('%s : interpolating flier environments' % clock.current_dt_str)
+    LOGGER.debug('%s : interpolating flier environments', clock.current_dt_str)
+    last_wrf_s = clock.seconds(last_wrf_time)
+    next_wrf_s = clock.seconds(next_wrf_time)
     for flier_id, flier in fliers.items():
+        if wake_queue and wake_queue.is_asleep(flier_id):
+            continue
         last_env = environments_last[flier_id]
         next_env = environments_next[flier_id]
         flier_env = list()
         flier_env.append(last_env[3])  # surface elevation
         flier_env.append(last_env[4])  # landcover index
         for i in range(5, 11):
-            flier_env.append(interpolate_time(last_env[i], last_wrf_time,
-                                              next_env[i], next_wrf_time,
-                                              clock.current_dt))
+            flier_env.append(interpolate_time(last_env[i], last_wrf_s,
+                                              next_env[i], next_wrf_s,
+                                              clock.current_s))
         flier.update_environment(flier_env)
     return
 
 
-def update_flier_locations(clock, fliers):
+def update_flier_locations(clock, fliers, wake_queue=None):
     """Update locations of all fliers (using flier motion)."""
-    print('%s : updating flier locations' % clock.current_dt_str)
+    LOGGER.debug('%s : updating flier locations', clock.current_dt_str)
     n_moving = 0
-    for flier in fliers.values():
+    for flier_id, flier in fliers.items():
+        if wake_queue and wake_queue.is_asleep(flier_id):
+            continue
         if flier.active:
             flier.update_location(clock)
             update_suntimes(clock, flier)
@@ -107,22 +139,110 @@ def update_flier_locations(clock, fliers):
     return n_moving  # int
 
 
+def integrate_flier_locations(sim, clock, fliers, wrf_brackets, wake_queue=None):
+    """Update locations of all fliers using a higher-order trajectory integrator
+       (sim.flight_integrator = 'rk2' or 'rk4') with winds re-sampled from the
+       bracketing WRF grids at intermediate positions."""
+    LOGGER.debug('%s : integrating flier trajectories (%s)', clock.current_dt_str,
+                 sim.flight_integrator)
+    n_moving = 0
+    airborne = list()
+    for flier_id, flier in fliers.items():
+        if wake_queue and wake_queue.is_asleep(flier_id):
+            continue
+        if flier.active:
+            if flier.state in ['LIFTOFF', 'FLIGHT', 'LANDING_W', 'LANDING_T',
+                               'LANDING_P', 'LANDING_S', 'EXHAUSTED']:
+                airborne.append(flier)
+            if flier.state in ['LIFTOFF', 'FLIGHT', 'LANDING_S',
+                               'LANDING_W', 'LANDING_T', 'LANDING_P']:
+                n_moving += 1
+    integrate_flier_trajectories(sim, clock, airborne, wrf_brackets)
+    for flier_id, flier in fliers.items():
+        if wake_queue and wake_queue.is_asleep(flier_id):
+            continue
+        if flier.active:
+            update_suntimes(clock, flier)
+    return n_moving  # int
+
+
 def update_flier_states(sim, clock, sbw, defoliation, radar, fliers,
-                        liftoff_locs, landing_locs, survivors):
+                        liftoff_locs, landing_locs, survivors, wake_queue=None):
     """Update operating states of all fliers."""
-    print('%s : updating states of active fliers' % clock.current_dt_str)
+    LOGGER.debug('%s : updating states of active fliers', clock.current_dt_str)
     to_remove = list()
+    updated = list()
     for flier_id, flier in fliers.items():
+        if wake_queue and wake_queue.is_asleep(flier_id):
+            continue
         if flier.state in ['INITIALIZED', 'OVIPOSITION']:
             calc_circadian_p(clock, flier)
         remove, liftoff_locs, landing_locs, survivors = \
             flier.state_decisions(sim, clock, sbw, defoliation, radar,
                                   liftoff_locs, landing_locs, survivors)
+        updated.append(flier)
         if remove:
-            print('%s : flier %s indicated for removal' %
-                  (clock.current_dt_str, flier.flier_id))
+            FLIER_LOGGER.info('%s : flier %s indicated for removal', clock.current_dt_str,
+                              flier.flier_id)
             to_remove.append(flier_id)
-    return liftoff_locs, landing_locs, survivors, to_remove  # 3 * dict + list
+    if sim.use_radar:
+        update_flier_dopplers(radar, updated)
+    for flier in updated:
+        flier.update_status(clock)
+    liftoff_locs.commit()
+    landing_locs.commit()
+    return liftoff_locs, landing_locs, survivors, to_remove  # 2 * EventTable + dict + list
+
+
+def update_flier_dopplers(radar, fliers):
+    """Radar-relative (Doppler) motion of all airborne Fliers whose motion was
+       updated, in one vectorized call."""
+    due = [flier for flier in fliers if flier.doppler_due]
+    if not due:
+        return
+    UTM_zones = np.array([flier.UTM_zone for flier in due])
+    eastings = np.array([flier.easting for flier in due])
+    northings = np.array([flier.northing for flier in due])
+    V_x = np.array([flier.U + flier.v_x for flier in due])
+    V_y = np.array([flier.V + flier.v_y for flier in due])
+    V_r, V_a = radar.doppler_vels(UTM_zones, eastings, northings, V_x, V_y)
+    for flier, v_radial, v_azimuthal in zip(due, V_r, V_a):
+        flier.v_radial = float(v_radial)
+        flier.v_azimuthal = float(v_azimuthal)
+        flier.doppler_due = False
+    return
+
+
+def wake_fliers(clock, wake_queue):
+    """Wake sleeping fliers that are due for re-evaluation at this time step."""
+    woken = wake_queue.wake_due(clock.current_s)
+    LOGGER.debug('%s : woke %d fliers (%d still sleeping)', clock.current_dt_str, len(woken),
+                 len(wake_queue))
+    return
+
+
+def schedule_grounded_fliers(sim, clock, sbw, fliers, wake_queue, environments_last,
+                             environments_next, last_wrf_time, next_wrf_time):
+    """Put awake grounded fliers to sleep until their next possible state change:
+       circadian readiness for 'INITIALIZED'/'OVIPOSITION' fliers, and liftoff
+       conditions or sunrise (within the current WRF interval) for fliers on the
+       ground in 'READY', 'HOST', 'FOREST', 'NONFOREST' states."""
+    waiting = list()
+    grounded = list()
+    for flier_id, flier in fliers.items():
+        if wake_queue.is_asleep(flier_id):
+            continue
+        if flier.state in ['INITIALIZED', 'OVIPOSITION']:
+            waiting.append(flier)
+        elif flier.state in ['READY', 'HOST', 'FOREST', 'NONFOREST']:
+            grounded.append(flier)
+    for flier in waiting:
+        wake_queue.sleep(flier.flier_id, calc_circadian_ready_time(clock, flier))
+    wake_times = calc_liftoff_wake_times(sim, clock, sbw, grounded, environments_last,
+                                         environments_next, last_wrf_time, next_wrf_time)
+    for flier, wake_s in zip(grounded, wake_times):
+        wake_queue.sleep(flier.flier_id, wake_s)
+    return
 
 
 def update_flier_status(clock, fliers):
@@ -132,33 +252,60 @@ def update_flier_status(clock, fliers):
     return
 
 
-def remove_fliers(sim, clock, fliers, flight_status, trajectories,
-                  egg_deposition, to_remove):
-    """Remove lost/dead fliers (record egg deposition history first)."""
+def remove_fliers(sim, clock, fliers, flight_stats, trajectories,
+                  egg_deposition, to_remove, status_store=None, plot_service=None):
+    """Remove lost/dead fliers (report status history, accumulate flight statistics
+       and record egg deposition history first, then release status history)."""
     for flier_id in to_remove:
         flier = fliers[flier_id]
-        flight_status[flier_id] = flier.flight_status
-        trajectories = flier.report_status(sim, clock, trajectories)
+        trajectories = flier.report_status(sim, clock, trajectories, status_store,
+                                           plot_service)
+        flight_stats.add_flier(flier.recorder, flier.recorder_idx)
+        flier.recorder.release(flier.recorder_idx)
         if flier.sex and flier.eggs_laid:
             for eggs_id, egg_location in flier.eggs_laid.items():
                 egg_deposition[eggs_id] = egg_location
         del fliers[flier_id]
-        print('%s : removed %s Flier object' % (clock.current_dt_str, flier_id))
-    return fliers, flight_status, trajectories, egg_deposition  # 4 * dict
+        FLIER_LOGGER.info('%s : removed %s Flier object', clock.current_dt_str, flier_id)
+    egg_deposition.commit()
+    return fliers, flight_stats, trajectories, egg_deposition  # dict + object + dict + object
+
+
+def next_event_time(sim, clock, fliers, wake_queue, next_wrf_time, output_schedule=None):
+    """Next meaningful time step for adaptive stepping: if every remaining flier is
+       asleep (i.e. none is in LIFTOFF/FLIGHT/LANDING states), jump to the earliest of
+       the next wake-up, the next WRF time, the next ground output time, the next
+       scheduled output time, and the simulation end; otherwise advance by the
+       regular time step. Time steps jumped over have no location outputs or status
+       rows, so per-flier histories differ from a fixed-step run."""
+    next_s = clock.current_s + clock.dt_interval
+    if len(wake_queue) < len(fliers):
+        return next_s  # int seconds since simulation start
+    output_s = sim.adaptive_output_interval * 60
+    n_outputs = (clock.current_s // output_s) + 1
+    candidates = [clock.seconds(next_wrf_time), n_outputs * output_s, clock.end_s]
+    wake_s = wake_queue.next_wake_s()
+    if wake_s is not None:
+        candidates.append(wake_s)
+    if output_schedule is not None:
+        sched_s = output_schedule.next_output_s(clock.current_s)
+        if sched_s is not None:
+            candidates.append(sched_s)
+    return max(next_s, min(candidates))  # int seconds since simulation start
 
 
 def load_next_WRF_grids(sim, clock):
     """Load next WRF grids in temporal sequence."""
     next_time = clock.current_dt + timedelta(minutes=sim.WRF_input_interval)
     next_grids = WRFgrids(next_time, sim.WRF_input_path, sim.WRF_grid, clock.current_dt_str)
-    print('%s : WRF %s grids object initialized' % (clock.current_dt_str,
-                                                    str(next_time.isoformat())))
+    LOGGER.info('%s : WRF %s grids object initialized', clock.current_dt_str,
+                str(next_time.isoformat()))
     return next_time, next_grids  # datetime + WRFgrids objects
 
 
 def shuffle_WRF_grids(sim, clock, next_time, next_grids):
     """Shuffle next WRF grids to last, load new grids."""
-    print('%s : updating WRF grids' % clock.current_dt_str)
+    LOGGER.info('%s : updating WRF grids', clock.current_dt_str)
     last_time = copy.deepcopy(next_time)  # datetime objects in UTC
     last_grids = copy.deepcopy(next_grids)  # WRFgrids object
     next_time, next_grids = load_next_WRF_grids(sim, clock)
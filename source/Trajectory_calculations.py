@@ -0,0 +1,115 @@
+# pylint: disable=C0103,R0913,R0914,R1711
+"""
+Python script "Trajectory_calculations.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+from datetime import timedelta
+import numpy as np
+from Geography import utm_to_lat_lon, calc_GpH
+from Sim_logging import LOGGER
+
+
+# Runge-Kutta stage times (fraction of step) and weights
+RK_STAGES = {'rk2': ([0.0, 0.5], [0.0, 1.0]),
+             'rk4': ([0.0, 0.5, 0.5, 1.0], [1.0 / 6.0, 2.0 / 6.0, 2.0 / 6.0, 1.0 / 6.0])}
+
+# Runge-Kutta order, for Richardson step-doubling error estimate
+RK_ORDER = {'rk2': 2, 'rk4': 4}
+
+
+def sample_flier_winds(sim, sample_dt, fliers, positions, wrf_brackets):
+    """Get WRF U, V, W at (intermediate) Flier positions for a given time.
+       positions are [easting, northing, alt_MSL] arrays in each Flier's UTM zone;
+       wrf_brackets are (last_wrf_time, last_wrf_grids, next_wrf_time, next_wrf_grids).
+       Sample times outside the WRF bracket are clamped to its ends."""
+    last_wrf_time, last_wrf_grids, next_wrf_time, next_wrf_grids = wrf_brackets
+    locations = dict()
+    for i, flier in enumerate(fliers):
+        lat, lon = utm_to_lat_lon(positions[0][i], positions[1][i], flier.UTM_zone)
+        alt_MSL = positions[2][i]
+        locations[flier.flier_id] = [lat, lon, alt_MSL - flier.sfc_elev, alt_MSL,
+                                     calc_GpH(lat, alt_MSL)]
+    last_vals = last_wrf_grids.interpolate_space(sim, locations)
+    next_vals = next_wrf_grids.interpolate_space(sim, locations)
+    t_frac = (sample_dt - last_wrf_time).total_seconds() / \
+        (next_wrf_time - last_wrf_time).total_seconds()
+    t_frac = min(max(t_frac, 0.0), 1.0)
+    winds = np.zeros((3, len(fliers)))
+    for i, flier in enumerate(fliers):
+        last_env = last_vals[flier.flier_id]
+        next_env = next_vals[flier.flier_id]
+        for j, k in enumerate([8, 9, 10]):
+            winds[j, i] = last_env[k] + (next_env[k] - last_env[k]) * t_frac
+    # outside the WRF grid (e.g. non-nearest hinterp): keep current Flier winds
+    current = np.array([[flier.U, flier.V, flier.W] for flier in fliers]).T
+    winds = np.where(np.isfinite(winds), winds, current)
+    return winds  # numpy 2D array [U, V, W] x fliers
+
+
+def ground_velocities(own_velocities, winds):
+    """Ground-relative Flier velocities: wind-relative motion plus wind."""
+    return own_velocities + winds  # numpy 2D array
+
+
+def rk_step(sim, fliers, start_dt, dt_interval, positions, own_velocities,
+            k1, wrf_brackets):
+    """Single Runge-Kutta step for all given Fliers (Flier motion is held constant
+       over the step, winds are re-sampled at each intermediate stage)."""
+    stage_fracs, stage_weights = RK_STAGES[sim.flight_integrator]
+    stages = [k1]
+    for s_idx in range(1, len(stage_fracs)):
+        h = stage_fracs[s_idx] * dt_interval
+        stage_positions = positions + h * stages[-1]
+        stage_dt = start_dt + timedelta(seconds=h)
+        winds = sample_flier_winds(sim, stage_dt, fliers, stage_positions, wrf_brackets)
+        stages.append(ground_velocities(own_velocities, winds))
+    velocity = sum(w * k for w, k in zip(stage_weights, stages))
+    return positions + dt_interval * velocity  # numpy 2D array
+
+
+def integrate_flier_trajectories(sim, clock, fliers, wrf_brackets):
+    """Advance airborne Fliers over the last time step with the indicated
+       higher-order integrator, optionally with a step-doubling error estimate.
+       Stage 1 uses the Flier environment at the start of the step, as in the
+       forward Euler update in Flier.update_location."""
+    if not fliers:
+        return
+    start_dt = clock.current_dt - timedelta(seconds=clock.dt_interval)
+    positions = np.array([[flier.easting, flier.northing, flier.alt_MSL]
+                          for flier in fliers]).T
+    own_velocities = np.array([[flier.v_x, flier.v_y, flier.v_z] for flier in fliers]).T
+    winds = np.array([[flier.U, flier.V, flier.W] for flier in fliers]).T
+    k1 = ground_velocities(own_velocities, winds)
+    full_step = rk_step(sim, fliers, start_dt, clock.dt_interval, positions,
+                        own_velocities, k1, wrf_brackets)
+    if sim.flight_step_doubling:
+        half_interval = clock.dt_interval / 2.0
+        half_step = rk_step(sim, fliers, start_dt, half_interval, positions,
+                            own_velocities, k1, wrf_brackets)
+        mid_dt = start_dt + timedelta(seconds=half_interval)
+        winds = sample_flier_winds(sim, mid_dt, fliers, half_step, wrf_brackets)
+        k1_mid = ground_velocities(own_velocities, winds)
+        two_steps = rk_step(sim, fliers, mid_dt, half_interval, half_step,
+                            own_velocities, k1_mid, wrf_brackets)
+        errors = np.abs(two_steps - full_step) / (2**RK_ORDER[sim.flight_integrator] - 1)
+        step_errors = np.sqrt(errors[0]**2 + errors[1]**2 + errors[2]**2)
+        new_positions = two_steps
+        LOGGER.debug('%s : trajectory step error estimate mean = %.2f m, max = %.2f m',
+                     clock.current_dt_str, np.mean(step_errors), np.max(step_errors))
+    else:
+        step_errors = np.zeros(len(fliers))
+        new_positions = full_step
+    displacements = new_positions - positions
+    for i, flier in enumerate(fliers):
+        flier.displace(displacements[0][i], displacements[1][i], displacements[2][i])
+        flier.step_error = step_errors[i]
+    return
+
+# end Trajectory_calculations.py
@@ -18,6 +18,7 @@ from wrf import to_np, getvar, smooth2d, latlon_coords
 from Interpolation import get_vals_1D
 from Interpolation import get_nearest_vals_2D, get_nearest_columns
 from Interpolation import get_interp_vals_2D
+from Sim_logging import LOGGER
 
 
 def check_for_WRF_file(file_date_time, path, wrf_grid):
@@ -47,7 +48,7 @@ class WRFgrids(object):
         self.date_time = file_date_time
         file_exists, self.fname = check_for_WRF_file(file_date_time, path, wrf_grid)
         if file_exists:
-            print('%s : reading %s' % (dt_str, self.fname))
+            LOGGER.info('%s : reading %s', dt_str, self.fname)
             ncfile = Dataset('%s/%s' % (path, self.fname), 'r')
             # get lat/lon coordinate grids
             T2_var = getvar(ncfile, 'T2')
@@ -77,7 +78,7 @@ class WRFgrids(object):
             #
             ncfile.close()
         else:
-            print('ERROR: WRF file %s does not exist!' % self.fname)
+            LOGGER.error('ERROR: WRF file %s does not exist!', self.fname)
             sys.exit()
         return
 
@@ -251,6 +252,7 @@ class WRFgrids(object):
                                       'nearest', locs_lon, locs_lat)
         locs_col = get_interp_vals_2D(self.lons, self.lats, cols,
                                       'nearest', locs_lon, locs_lat)
-        return locs_row, locs_col
+        # griddata returns floats even for integer grids; indexes must be integers
+        return locs_row.astype(int), locs_col.astype(int)
 
 # end WRFgrids_class.py
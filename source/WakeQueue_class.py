@@ -0,0 +1,115 @@
+# pylint: disable=C0103,R0205,R0913,R0914,R1711
+"""
+Python script "WakeQueue_class.py"
+by Matthew Garcia, Postdoctoral Research Associate
+Dept. of Forest and Wildlife Ecology
+University of Wisconsin - Madison
+matt.e.garcia@gmail.com
+
+Copyright (C) 2021 by Matthew Garcia
+"""
+
+
+import heapq
+import numpy as np
+
+
+class WakeQueue(object):
+    """Priority queue of sleeping (grounded) Fliers, keyed by wake-up time.
+       A sleeping Flier is not moved, re-queried, or re-evaluated until its
+       wake-up time (a simulation time step, integer seconds since simulation
+       start) arrives; no status record is made for it while it sleeps."""
+
+    def __init__(self):
+        self.heap = list()
+        self.wake_times = dict()
+        return
+
+    def __len__(self):
+        return len(self.wake_times)
+
+    def sleep(self, flier_id, wake_s):
+        """Put Flier to sleep until the indicated time step."""
+        self.wake_times[flier_id] = wake_s
+        heapq.heappush(self.heap, (wake_s, flier_id))
+        return
+
+    def is_asleep(self, flier_id):
+        """Check if Flier is currently sleeping."""
+        return flier_id in self.wake_times
+
+    def discard(self, flier_id):
+        """Remove Flier from the queue without waking it (e.g. removed Flier)."""
+        self.wake_times.pop(flier_id, None)
+        return
+
+    def wake_due(self, current_s):
+        """Wake all Fliers with wake-up times at or before the current time step."""
+        woken = list()
+        while self.heap and (self.heap[0][0] <= current_s):
+            wake_s, flier_id = heapq.heappop(self.heap)
+            if self.wake_times.get(flier_id) == wake_s:  # skip stale entries
+                del self.wake_times[flier_id]
+                woken.append(flier_id)
+        return woken  # list
+
+    def next_wake_s(self):
+        """Earliest pending wake-up time, or None if no Flier is sleeping."""
+        while self.heap and (self.wake_times.get(self.heap[0][1]) != self.heap[0][0]):
+            heapq.heappop(self.heap)
+        if self.heap:
+            return self.heap[0][0]
+        return None  # int seconds since simulation start or None
+
+
+def calc_liftoff_wake_times(sim, clock, sbw, fliers, environments_last,
+                            environments_next, last_wrf_time, next_wrf_time):
+    """Earliest time step at which each grounded Flier could lift off or meet sunrise.
+       Environments are interpolated between the bracketing WRF values exactly as in
+       interpolate_flier_environments, and liftoff conditions are evaluated as in
+       Flier.liftoff_conditions, for all given Fliers at once. Fliers that cannot lift
+       off before the next WRF time are woken at that time for re-evaluation."""
+    n_fliers = len(fliers)
+    last_wrf_s = clock.seconds(last_wrf_time)
+    next_wrf_s = clock.seconds(next_wrf_time)
+    wake_times = [next_wrf_s] * n_fliers
+    if not n_fliers:
+        return wake_times  # list
+    #
+    # WRF-bracketed environments (grounded Fliers always use surface values)
+    T_last = np.array([environments_last[flier.flier_id][5] for flier in fliers])
+    T_next = np.array([environments_next[flier.flier_id][5] for flier in fliers])
+    R_last = np.array([environments_last[flier.flier_id][7] for flier in fliers])
+    R_next = np.array([environments_next[flier.flier_id][7] for flier in fliers])
+    U_last = np.array([environments_last[flier.flier_id][8] for flier in fliers])
+    U_next = np.array([environments_next[flier.flier_id][8] for flier in fliers])
+    V_last = np.array([environments_last[flier.flier_id][9] for flier in fliers])
+    V_next = np.array([environments_next[flier.flier_id][9] for flier in fliers])
+    W_last = np.array([environments_last[flier.flier_id][10] for flier in fliers])
+    W_next = np.array([environments_next[flier.flier_id][10] for flier in fliers])
+    nu_L = np.array([flier.nu_L for flier in fliers])
+    sunrise_s = np.array([flier.sunrise_s for flier in fliers])
+    #
+    # step through the remaining time steps of this WRF interval
+    t_interval = next_wrf_s - last_wrf_s
+    pending = np.ones(n_fliers, dtype=bool)
+    wake_s = clock.current_s + clock.dt_interval
+    while (wake_s < next_wrf_s) and np.any(pending):
+        t_frac = float(wake_s - last_wrf_s) / float(t_interval)
+        T = T_last + (T_next - T_last) * t_frac
+        Precip = R_last + (R_next - R_last) * t_frac
+        U = U_last + (U_next - U_last) * t_frac
+        V = V_last + (V_next - V_last) * t_frac
+        W = W_last + (W_next - W_last) * t_frac
+        nu = sbw.calc_nu_T(T) * sim.delta_nu
+        windspeed = np.sqrt(U**2 + V**2)
+        liftoff = (Precip < sim.max_precip) & (W >= 0.0) & (T <= sbw.threshold_T) & \
+            (windspeed >= sim.min_windspeed) & (nu >= nu_L)
+        sunrise = wake_s > sunrise_s
+        for i in np.where(pending & (liftoff | sunrise))[0]:
+            wake_times[i] = wake_s
+            pending[i] = False
+        wake_s += clock.dt_interval
+    return wake_times  # list of int seconds since simulation start
+
+# end WakeQueue_class.py
@@ -0,0 +1,41 @@
+import os
+import tempfile
+from types import SimpleNamespace
+import numpy as np
+from Clock import Clock
+from LocationStore_class import LocationStore, LOCATION_COLUMNS
+from LocationStore_class import read_locations_at, read_flier_locations
+
+
+sim = SimpleNamespace(start_year=2013, start_month=7, start_day=15, start_hour=21,
+                      start_minute=0, end_year=2013, end_month=7, end_day=16, end_hour=10,
+                      end_minute=0, UTC_offset=-4.0, dt=60, simulation_name='test',
+                      experiment_number=0, simulation_number=1)
+os.chdir(tempfile.mkdtemp())
+os.mkdir('test_simulation_00001_summary')
+prefix = 'test_simulation_00001_summary/locs_00001'
+print()
+
+# store with no location records yet (e.g. no fliers reported)
+clock = Clock(sim)
+store = LocationStore(sim, clock)
+store.append(clock, dict())
+assert os.path.getsize('%s.bin' % prefix) == 0
+assert read_locations_at(prefix, clock.current_s).empty
+assert read_flier_locations(prefix, 'flier_1').empty
+
+# records keep the full precision of the locs_*.csv values
+values = {'flier_%d' % f: [48.4783 + f, -67.5822, 250.0, 550.0, 5600.123456789, 19,
+                           500000.0 + f, 5370000.0, 1.0 / 3.0, -2.0 / 3.0, 0.1,
+                           np.pi, np.e] for f in range(3)}
+clock.current_s += clock.dt_interval
+store.append(clock, values)
+store.close()
+locs_df = read_locations_at(prefix, clock.current_dt_str)
+print(locs_df)
+for flier_id, flier_values in values.items():
+    assert list(locs_df.loc[flier_id, LOCATION_COLUMNS]) == flier_values
+flier_df = read_flier_locations(prefix, 'flier_2')
+assert list(flier_df.index) == [clock.current_dt_str]
+assert flier_df['v_a'].iloc[0] == np.e
+print()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import zipfile
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from OutputWriter_class import OutputWriter, set_output_writer, write_output
+
+
+def make_sim(sink, workers):
+    """Minimal simulation specifications for the output writer."""
+    sim = SimpleNamespace(output_sink=sink, output_workers=workers, output_queue_size=2,
+                          simulation_name='test', experiment_number=0, simulation_number=1)
+    return sim
+
+
+def write_outputs():
+    """One output of each kind, and a store-like file appended in many pieces."""
+    write_output('csv', 'out/table.csv', pd.DataFrame({'a': [1, 2]}))
+    write_output('npy', 'out/grid.npy', np.eye(3))
+    write_output('text', 'out/report.txt', 'report\n')
+    write_output('binary', 'out/image.png', b'\x89PNG')
+    for i in range(100):
+        write_output('append', 'out/store.bin', np.arange(i, i + 1).tobytes())
+    return
+
+
+expected = np.arange(100).tobytes()
+os.chdir(tempfile.mkdtemp())
+os.mkdir('out')
+print()
+
+for sink, workers in [('files', 0), ('files', 3)]:
+    writer = OutputWriter(make_sim(sink, workers))
+    set_output_writer(writer)
+    write_outputs()
+    write_outputs()  # appended file continues within a run, starts over in a new run
+    writer.close()
+    with open('out/store.bin', 'rb') as storefile:
+        stored = storefile.read()
+    print('%s sink, %d workers : %d outputs, %d bytes' % (sink, workers, writer.n_written,
+                                                          writer.n_bytes))
+    assert stored == expected + expected
+    assert sorted(os.listdir('out')) == ['grid.npy', 'image.png', 'report.txt', 'store.bin',
+                                         'table.csv']
+for fname in os.listdir('out'):
+    os.remove('out/%s' % fname)
+
+# archive sink: all outputs, including appended ones, are archive members
+writer = OutputWriter(make_sim('archive', 2))
+set_output_writer(writer)
+write_outputs()
+writer.close()
+with zipfile.ZipFile(writer.sink.fname) as archive:
+    print('archive sink : %s' % ', '.join(sorted(archive.namelist())))
+    assert archive.read('out/store.bin') == expected
+    assert archive.read('out/image.png') == b'\x89PNG'
+assert not os.listdir('out')
+
+# memory and null sinks write no files
+for sink in ['memory', 'null']:
+    writer = OutputWriter(make_sim(sink, 2))
+    set_output_writer(writer)
+    write_outputs()
+    writer.close()
+    assert not os.listdir('out')
+assert writer.n_written == 104
+set_output_writer(None)
+print()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+from types import SimpleNamespace
+import numpy as np
+from Clock import Clock
+from RadarCube_class import RadarCube, read_radar_cube, cube_grid, cube_occupied_times
+
+
+class TestNetwork(object):
+    """Minimal stand-in for RadarNetwork: one radar, fixed occupied cells."""
+
+    def __init__(self):
+        self.radars = [SimpleNamespace(radar_id='XAM', UTM_zone=19, grid_nrows=4,
+                                       grid_ncols=5, grid_sw_east=0.0, grid_sw_north=0.0,
+                                       grid_dx=1000.0, grid_dy=1000.0)]
+        self.radar_ids = ['XAM']
+
+    def __iter__(self):
+        return iter(self.radars)
+
+    def sparse_grids(self, locations):
+        """One occupied cell per Flier location."""
+        n = len(locations)
+        return {'XAM': (np.arange(n), np.arange(n), np.ones(n), np.full(n, 2.5))}
+
+
+sim = SimpleNamespace(start_year=2013, start_month=7, start_day=15, start_hour=21,
+                      start_minute=0, end_year=2013, end_month=7, end_day=16, end_hour=10,
+                      end_minute=0, UTC_offset=-4.0, dt=60, simulation_name='test',
+                      experiment_number=0, simulation_number=1)
+os.chdir(tempfile.mkdtemp())
+os.mkdir('test_simulation_00001_summary')
+fname = 'test_simulation_00001_summary/radar_cube_00001_XAM.npz'
+print()
+
+# cube closed without any gridded time steps (e.g. no scheduled times in the run)
+clock = Clock(sim)
+cube = RadarCube(sim, clock, TestNetwork())
+cube.close()
+data = read_radar_cube(fname)
+print('empty cube : %d time steps, %d occupied cells' % (len(data['times']), len(data['rows'])))
+assert len(data['times']) == 0
+assert list(data['offsets']) == [0]
+assert data['rows'].dtype == np.int16 and data['dens'].dtype == np.int32
+assert data['dvel'].dtype == np.float32
+assert not cube_occupied_times(data)
+
+# cube with one empty and one occupied time step
+cube = RadarCube(sim, clock, TestNetwork())
+cube.append(clock, dict())
+clock.current_s += clock.dt_interval
+cube.append(clock, {'f1': None, 'f2': None})
+cube.close()
+data = read_radar_cube(fname)
+print('cube : %d time steps, %d occupied cells' % (len(data['times']), len(data['rows'])))
+assert cube_occupied_times(data) == [cube.times[1]]
+grid = cube_grid(data, cube.times[1], 'dvel')
+assert grid.shape == (4, 5) and grid[1, 1] == 2.5 and np.sum(grid > 0) == 2
+assert cube_grid(data, 'not a time', 'dens') is None
+print()
@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+import numpy as np
+from Clock import Clock
+from StatusRecorder_class import StatusRecorder, STATUS_ATTRIBUTES
+
+
+n_fliers = 5
+n_steps = 60
+liftoff_step = 40
+
+
+def make_sim(policy):
+    """Minimal simulation specifications for the clock and recorder (filled chunks
+       are spilled under the 'changes' policy)."""
+    sim = SimpleNamespace(start_year=2013, start_month=7, start_day=15, start_hour=21,
+                          start_minute=0, end_year=2013, end_month=7, end_day=16,
+                          end_hour=10, end_minute=0, UTC_offset=-4.0, dt=60,
+                          status_chunk_size=16, status_spill=(policy == 'changes'),
+                          status_recording=policy,
+                          status_sample_interval=900, status_position_tol=0.0)
+    return sim
+
+
+def make_flier(flier_id, sex):
+    """Minimal stand-in carrying the recorded Flier attributes."""
+    flier = SimpleNamespace(**{attr: 0.0 for attr in STATUS_ATTRIBUTES.values()})
+    flier.flier_id = flier_id
+    flier.flight_status_idx = 0
+    flier.prev_state = 'NONE'
+    flier.state = 'INITIALIZED'
+    flier.UTM_zone = 19
+    flier.sex = sex
+    flier.lat = 48.4783
+    flier.lon = -67.5822
+    return flier
+
+
+def run_recorder(policy):
+    """Fliers sit on the ground, then lift off; fliers update at different rates."""
+    sim = make_sim(policy)
+    clock = Clock(sim)
+    recorder = StatusRecorder(sim)
+    fliers = [make_flier('flier_%d' % f, f % 2) for f in range(n_fliers)]
+    for flier in fliers:
+        recorder.register(flier)
+    for step in range(n_steps):
+        for f, flier in enumerate(fliers):
+            if step % (f + 1):
+                continue  # e.g. sleeping fliers, interleaving records
+            flier.prev_state = flier.state
+            flier.state = 'FLIGHT' if step > liftoff_step else 'READY'
+            flier.T = 20.0 - 0.05 * step
+            if step > liftoff_step:
+                flier.alt_AGL = 10.0 * (step - liftoff_step)
+                flier.alt_MSL = flier.alt_AGL
+            recorder.record(flier, clock)
+            flier.flight_status_idx += 1
+        clock.current_s += clock.dt_interval
+    return clock, recorder, fliers
+
+
+clock, recorder_all, fliers = run_recorder('all')
+clock, recorder_changes, fliers = run_recorder('changes')
+print()
+for recorder in [recorder_all, recorder_changes]:
+    print('%s : %d records in %d chunks, %d bytes' %
+          (recorder.policy, len(recorder), len(recorder.chunks['flier']),
+           recorder.nbytes()))
+print()
+for flier in fliers:
+    status_all = recorder_all.flier_frame(flier.recorder_idx, clock)
+    status_changes = recorder_changes.flier_frame(flier.recorder_idx, clock)
+    print('%s : %d updates, first %s, last %s, final state %s' %
+          (flier.flier_id, len(status_all), status_all['date_time'].iloc[0],
+           status_all['date_time'].iloc[-1], status_all['state'].iloc[-1]))
+    assert list(status_all['flight_status']) == list(range(flier.flight_status_idx))
+    for col in status_all.columns:
+        if col != 'T':  # ground temperatures are carried forward between samples
+            assert np.all(status_all[col].values == status_changes[col].values), col
+print()
+print(recorder_changes.flier_frame(fliers[0].recorder_idx, clock)[['date_time', 'prev_state',
+                                                                   'state', 'T', 'alt_AGL']])
+print()
+
+# releasing (removed) fliers compacts the interleaved records of the remaining fliers
+for recorder in [recorder_all, recorder_changes]:
+    kept = {f: recorder.flier_frame(fliers[f].recorder_idx, clock) for f in [3, 4]}
+    nbytes_before = recorder.nbytes()
+    for f in [0, 1, 2]:
+        recorder.release(fliers[f].recorder_idx)
+    print('%s : released 3 fliers, %d -> %d bytes' %
+          (recorder.policy, nbytes_before, recorder.nbytes()))
+    assert recorder.n_live == sum(len(recorder.flier_rows(flier.recorder_idx))
+                                  for flier in fliers)
+    assert 2 * recorder.n_live >= len(recorder)
+    if recorder.spill:  # only the chunk being filled is in memory
+        assert recorder.nbytes() == sum(np.dtype(dtype).itemsize * recorder.chunk_size
+                                        for dtype in recorder.dtypes.values())
+    else:
+        assert recorder.nbytes() < nbytes_before
+    for f, status_df in kept.items():
+        assert status_df.equals(recorder.flier_frame(fliers[f].recorder_idx, clock))
+print()
@@ -0,0 +1,26 @@
+import numpy as np
+from Interpolation import get_nearest_vals_2D, get_nearest_columns
+from WRFgrids_class import WRFgrids
+
+
+# small regular lat/lon grid, as in a WRF subset file (rows south to north)
+lons, lats = np.meshgrid(np.linspace(-68.0, -67.0, 5), np.linspace(48.0, 48.6, 4))
+grids = object.__new__(WRFgrids)  # grid geometry only, no WRF file
+grids.lons = lons
+grids.lats = lats
+print()
+
+locs_lon = np.array([-67.98, -67.52, -67.03])
+locs_lat = np.array([48.01, 48.38, 48.59])
+rows, cols = grids.get_nearest_locs(locs_lon, locs_lat)
+print('nearest rows %s, cols %s (%s)' % (rows.tolist(), cols.tolist(), rows.dtype))
+assert np.issubdtype(rows.dtype, np.integer) and np.issubdtype(cols.dtype, np.integer)
+assert list(rows) == [0, 2, 3]
+assert list(cols) == [0, 2, 4]
+
+# indexes are usable for nearest-neighbor values and columns
+var = np.arange(20.0).reshape(4, 5)
+assert get_nearest_vals_2D(var, rows, cols) == [0.0, 12.0, 19.0]
+var_3D = np.stack([var, var + 100.0])
+assert np.all(get_nearest_columns(var_3D, rows, cols)[:, 1] == [12.0, 112.0])
+print()